@@ -0,0 +1,139 @@
+"""
+Micro-benchmark: decoder lama (recursive) vs deluge_codec.
+
+Payload meniru `core.get_torrents_status` untuk 10k torrent dengan
+keys/values bytes (deluge_client tanpa decode_utf8), termasuk nested
+files, peers dan trackers.
+
+Run: python benchmarks/bench_decode.py [--torrents 10000] [--repeat 5]
+"""
+
+import os
+import sys
+import time
+import argparse
+import importlib.util
+
+# Load modul codec langsung, tanpa import package moccha (butuh Flask dll)
+_CODEC = os.path.join(
+    os.path.dirname(__file__), "..", "moccha", "services", "deluge_codec.py"
+)
+_spec = importlib.util.spec_from_file_location("deluge_codec", _CODEC)
+codec = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(codec)
+
+
+def legacy_decode(value):
+    """Salinan DelugeService._decode sebelum diganti."""
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    elif isinstance(value, dict):
+        return {
+            legacy_decode(k): legacy_decode(v)
+            for k, v in value.items()
+        }
+    elif isinstance(value, (list, tuple)):
+        return [legacy_decode(item) for item in value]
+    return value
+
+
+LIST_FIELDS = [
+    'name', 'state', 'progress',
+    'download_payload_rate', 'upload_payload_rate',
+    'num_seeds', 'num_peers',
+    'total_wanted', 'total_done',
+    'eta', 'ratio', 'save_path',
+]
+
+
+def make_payload(n, as_text=False):
+    """Payload seperti hasil RPC; as_text=True meniru decode_utf8."""
+    enc = (lambda s: s) if as_text else (lambda s: s.encode())
+    payload = {}
+    for i in range(n):
+        tid = enc(f"{i:040x}")
+        payload[tid] = {
+            enc('name'): enc(f"Some.Linux.Distro.{i}.iso"),
+            enc('state'): enc("Downloading" if i % 3 else "Seeding"),
+            enc('progress'): float(i % 100),
+            enc('download_payload_rate'): i * 10,
+            enc('upload_payload_rate'): i * 3,
+            enc('num_seeds'): i % 50,
+            enc('num_peers'): i % 20,
+            enc('total_wanted'): 1 << 30,
+            enc('total_done'): i << 16,
+            enc('eta'): i,
+            enc('ratio'): 0.5,
+            enc('save_path'): enc("/content/downloads/torrents"),
+            enc('tracker_host'): enc("tracker.example.org"),
+            enc('files'): [
+                {
+                    enc('index'): j,
+                    enc('path'): enc(f"Distro.{i}/part{j}.bin"),
+                    enc('size'): 1 << 20,
+                    enc('offset'): j << 20,
+                }
+                for j in range(4)
+            ],
+            enc('peers'): [
+                {
+                    enc('ip'): enc(f"10.0.{j}.{i % 255}:6881"),
+                    enc('client'): enc("qBittorrent 4.6"),
+                    enc('down_speed'): j,
+                    enc('up_speed'): j,
+                }
+                for j in range(2)
+            ],
+            enc('trackers'): [
+                {enc('url'): enc("udp://tracker.example.org:1337"), enc('tier'): 0},
+            ],
+        }
+    return payload
+
+
+def bench(label, fn, make, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        payload = make()          # decoder baru mutasi input → payload segar
+        t0 = time.perf_counter()
+        fn(payload)
+        best = min(best, time.perf_counter() - t0)
+    print(f"  {label:38s} {best * 1000:9.1f} ms")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--torrents", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    n, r = args.torrents, args.repeat
+    print(f"Decoding {n} torrents (best of {r})")
+
+    def rows_legacy(raw):
+        out = []
+        for tid, info in raw.items():
+            d = legacy_decode(info)
+            d['id'] = legacy_decode(tid)
+            out.append(d)
+        return out
+
+    base = bench("legacy recursive (full)", rows_legacy,
+                 lambda: make_payload(n), r)
+    bench("codec.decode (full, bytes)", codec.decode,
+          lambda: make_payload(n), r)
+    bench("codec.decode_rows (12 fields, bytes)",
+          lambda raw: codec.decode_rows(raw, LIST_FIELDS),
+          lambda: make_payload(n), r)
+    fast = bench("codec.decode_rows (12 fields, utf8)",
+                 lambda raw: codec.decode_rows(raw, LIST_FIELDS),
+                 lambda: make_payload(n, as_text=True), r)
+    bench("codec.decode (full, utf8)", codec.decode,
+          lambda: make_payload(n, as_text=True), r)
+
+    print(f"\n  speedup (list path): {base / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,7 +3,9 @@
 import os
 import json
 import logging
-from flask import Flask, request, jsonify
+import mimetypes
+from urllib.parse import quote
+from flask import Flask, Response, request, jsonify
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +17,16 @@ def create_app(api_key=None, workspace=None):
     app.config["WORKSPACE"] = workspace or os.path.expanduser("~/moccha_workspace")
 
     # ── Initialize ServiceManager ──
-    from moccha.service_manager import ServiceManager
+    from moccha.services.service_manager import ServiceManager
+    from moccha.services.torrent_query import TorrentQuery
+    from moccha.services.stats_history import parse_duration
+    from moccha.utils.http_range import RangeNotSatisfiable, content_range, parse_range
+    from moccha.utils import file_serve
+    from moccha.utils.zipstream import ZipStream, collect
+    from moccha.services.torrent_files import (
+        FILE_FIELDS, FILE_DEFAULT_FIELDS, PEER_FIELDS, TRACKER_FIELDS,
+        FileMatch, FileSelection, PageQuery,
+    )
 
     sm = ServiceManager(workspace=app.config["WORKSPACE"])
     app.config["SERVICE_MANAGER"] = sm
@@ -54,6 +65,128 @@ def create_app(api_key=None, workspace=None):
         }
         return jsonify(info)
 
+    # ─────────────────────────────────────────
+    # Files
+    # ─────────────────────────────────────────
+
+    def _list_dir(path):
+        """Listing dari WorkspaceIndex; scandir langsung jika belum siap."""
+        index = sm.file_index()
+        if index.covers(path) and index.wait_ready(2):
+            items = index.listing(path)
+            if items is not None:
+                return items
+        return file_serve.listing(path)
+
+    @app.route("/files", methods=["GET"])
+    def list_files():
+        path = file_serve.resolve(sm.download_roots(), request.args.get("path"), base=sm.workspace)
+        if path is None:
+            return jsonify({"success": False, "error": "Path not found"}), 404
+        if not os.path.isdir(path):
+            return jsonify({"success": False, "error": "Not a directory"}), 400
+        try:
+            items = _list_dir(path)
+        except OSError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        return jsonify({"path": path, "items": items})
+
+    # ?path=  → isi direktori (+ agregat size/jumlah file)
+    # ?q=     → cari nama (case-insensitive) di bawah path
+    # ?largest=N → N file terbesar di bawah path
+    @app.route("/api/files", methods=["GET"])
+    def api_files():
+        path = file_serve.resolve(sm.download_roots(), request.args.get("path"), base=sm.workspace)
+        if path is None:
+            return jsonify({"success": False, "error": "Path not found"}), 404
+        if not os.path.isdir(path):
+            return jsonify({"success": False, "error": "Not a directory"}), 400
+
+        try:
+            limit = min(int(request.args.get("limit", 100)), 1000)
+            largest = request.args.get("largest")
+            largest = int(largest) if largest else None
+        except ValueError:
+            return jsonify({"success": False, "error": "Invalid limit/largest"}), 400
+
+        index = sm.file_index()
+        query = request.args.get("q")
+        if query or largest:
+            if not index.wait_ready(5):
+                return jsonify({"success": False, "error": "File index is building"}), 503
+            results = (
+                index.search(query, path, limit) if query
+                else index.largest(path, min(largest, 1000))
+            )
+            return jsonify({"success": True, "path": path, "results": results})
+
+        try:
+            items = _list_dir(path)
+        except OSError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        return jsonify({
+            "success": True,
+            "path": path,
+            "items": items,
+            "summary": index.summary(path) if index.wait_ready(0) else None,
+            "index": index.stats(),
+        })
+
+    @app.route("/download/<path:filepath>", methods=["GET"])
+    def download(filepath):
+        """
+        File: Range/If-Range, body dikirim via sendfile.
+        Direktori: zip STORED di-generate on the fly (tanpa temp file).
+        """
+        path = file_serve.resolve(sm.download_roots(), filepath, base=sm.workspace)
+        if path is None:
+            return jsonify({"success": False, "error": "File not found"}), 404
+
+        name = os.path.basename(path)
+        if os.path.isdir(path):
+            stream = ZipStream(collect(path))
+            return Response(
+                stream,
+                headers={
+                    "Content-Length": str(len(stream)),
+                    "Content-Disposition": f"attachment; filename*=UTF-8''{quote(name + '.zip')}",
+                },
+                mimetype="application/zip",
+                direct_passthrough=True,
+            )
+
+        st = os.stat(path)
+        size = st.st_size
+        headers = {
+            "Accept-Ranges": "bytes",
+            "ETag": file_serve.etag(st),
+            "Last-Modified": file_serve.last_modified(st),
+            "Content-Disposition": f"attachment; filename*=UTF-8''{quote(name)}",
+        }
+
+        span = None
+        if file_serve.if_range_matches(request.headers.get("If-Range"), st):
+            try:
+                span = parse_range(request.headers.get("Range"), size)
+            except RangeNotSatisfiable:
+                headers["Content-Range"] = f"bytes */{size}"
+                return Response(status=416, headers=headers)
+
+        start, end = span or (0, size - 1)
+        length = max(0, end - start + 1)
+        headers["Content-Length"] = str(length)
+        if span:
+            headers["Content-Range"] = content_range(start, end, size)
+
+        mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        return Response(
+            file_serve.FileRangeBody(path, start, length, request.environ),
+            status=206 if span else 200,
+            headers=headers,
+            mimetype=mimetype,
+            direct_passthrough=True,
+        )
+
     # ─────────────────────────────────────────
     # Service API
     # ─────────────────────────────────────────
@@ -85,22 +218,77 @@ def create_app(api_key=None, workspace=None):
         result = sm.get_service_status(name)
         return jsonify(result)
 
+    # ETag per service: GET + If-None-Match → 304, POST + If-Match → 412
+    # jika config service sudah diubah client lain sejak dibaca
     @app.route("/api/services/<name>/config", methods=["GET"])
     def api_service_config_get(name):
-        config = sm.get_config(name)
-        return jsonify(config)
+        snapshot = sm.config_snapshot()
+        etag = snapshot.etag("services", name)
+        headers = {"ETag": etag, "X-Config-Version": str(snapshot.version)}
+        if request.headers.get("If-None-Match") == etag:
+            return Response(status=304, headers=headers)
+        response = jsonify(snapshot.get("services", name) or {})
+        response.headers.update(headers)
+        return response
 
     @app.route("/api/services/<name>/config", methods=["POST"])
     def api_service_config_update(name):
         data = request.get_json() or {}
-        result = sm.update_config(name, data)
-        code = 200 if result.get("success") else 400
-        return jsonify(result), code
+        result = sm.update_config(name, data, if_match=request.headers.get("If-Match"))
+        if result.get("conflict"):
+            code = 412
+        else:
+            code = 200 if result.get("success") else 400
+        response = jsonify(result)
+        if result.get("etag"):
+            response.headers["ETag"] = result["etag"]
+        if result.get("version"):
+            response.headers["X-Config-Version"] = str(result["version"])
+        return response, code
 
     @app.route("/api/services/status", methods=["GET"])
     def api_all_services_status():
         return jsonify(sm.get_all_status())
 
+    def _lifecycle_response(run):
+        # ?wait=1 → blok sampai selesai; default 202 + progress di /lifecycle
+        if request.args.get("wait", "").lower() in ("1", "true", "yes"):
+            results = run.wait()
+            snap = run.snapshot()
+            snap["results"] = results
+            return jsonify(snap), 200 if snap["success"] else 400
+        return jsonify(run.snapshot()), 202
+
+    @app.route("/api/services/start-all", methods=["POST"])
+    def api_start_all_services():
+        return _lifecycle_response(sm.start_all_async())
+
+    @app.route("/api/services/stop-all", methods=["POST"])
+    def api_stop_all_services():
+        return _lifecycle_response(sm.stop_all_async())
+
+    @app.route("/api/services/lifecycle", methods=["GET"])
+    def api_services_lifecycle():
+        run = sm.lifecycle()
+        if run is None:
+            return jsonify({"action": None, "done": True, "services": {}})
+        return jsonify(run.snapshot())
+
+    @app.route("/api/services/lifecycle/events", methods=["GET"])
+    def api_services_lifecycle_events():
+        run = sm.lifecycle()
+        if run is None:
+            return jsonify({"success": False, "error": "No start/stop in progress"}), 404
+        try:
+            since = max(0, int(request.args.get("since") or 0))
+        except ValueError:
+            return jsonify({"success": False, "error": "since must be an integer"}), 400
+
+        return Response(run.sse(since), mimetype="text/event-stream", headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        })
+
     # ─────────────────────────────────────────
     # Torrent API (delegates to Deluge service)
     # ─────────────────────────────────────────
@@ -124,7 +312,16 @@ def create_app(api_key=None, workspace=None):
                 "success": False,
                 "error": "Deluge not running. Start: moccha service start deluge"
             }), 400
-        return jsonify(deluge.list_torrents())
+
+        # ?state=&name~=&fields=&sort=&offset=&limit=&cursor=
+        try:
+            query = TorrentQuery.from_args(request.args)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        result = deluge.list_torrents(query)
+        code = 200 if result.get("success") else 400
+        return jsonify(result), code
 
     @app.route("/api/torrents/add", methods=["POST"])
     def api_add_torrent():
@@ -135,15 +332,174 @@ def create_app(api_key=None, workspace=None):
                 "error": "Deluge not running"
             }), 400
 
+        # Magnet metadata-first: {"magnet": ..., "metadata_first": true,
+        #   "include": ["*.mkv"], "exclude": ["*sample*"]}
         data = request.get_json() or {}
+        try:
+            selection = FileSelection.from_args(data)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
         result = deluge.add_torrent(
             magnet=data.get("magnet"),
             torrent_url=data.get("torrent_url"),
             torrent_file=data.get("torrent_file"),
+            metadata_first=bool(data.get("metadata_first")),
+            selection=selection or None,
         )
+        if result.get("pending"):
+            return jsonify(result), 202
         code = 200 if result.get("success") else 400
         return jsonify(result), code
 
+    @app.route("/api/torrents/magnets", methods=["GET"])
+    def api_magnets():
+        deluge = sm.get_service("deluge")
+        if not deluge:
+            return jsonify({"success": False, "error": "Deluge not running"}), 400
+        return jsonify(deluge.get_magnet_status())
+
+    # ?wait=30 → long-poll sampai metadata resolve dan torrent di-add
+    @app.route("/api/torrents/magnets/<torrent_id>", methods=["GET"])
+    def api_magnet_status(torrent_id):
+        deluge = sm.get_service("deluge")
+        if not deluge:
+            return jsonify({"success": False, "error": "Deluge not running"}), 400
+        try:
+            wait = min(float(request.args.get("wait", 0)), 60.0)
+        except ValueError:
+            return jsonify({"success": False, "error": "Invalid wait"}), 400
+
+        result = deluge.get_magnet_status(torrent_id, wait)
+        return jsonify(result), 200 if result.get("success") else 404
+
+    @app.route("/api/torrents/add-bulk", methods=["POST"])
+    def api_add_bulk():
+        deluge = sm.get_service("deluge")
+        if not deluge:
+            return jsonify({"success": False, "error": "Deluge not available"}), 400
+
+        # {"items": ["magnet:...", "https://..."]} atau {"text": "...\n..."}
+        data = request.get_json() or {}
+        lines = data.get("items")
+        if lines is None:
+            lines = (data.get("text") or "").splitlines()
+        if not isinstance(lines, list) or not lines:
+            return jsonify({
+                "success": False,
+                "error": "Provide 'items' (list) or 'text'"
+            }), 400
+
+        result = deluge.add_bulk([str(l) for l in lines])
+        return jsonify(result), 202 if result.get("accepted") else 200
+
+    @app.route("/api/torrents/add-bulk", methods=["GET"])
+    def api_add_bulk_summary():
+        deluge = sm.get_service("deluge")
+        if not deluge:
+            return jsonify({"success": False, "error": "Deluge not available"}), 400
+        return jsonify(deluge.bulk_status())
+
+    @app.route("/api/torrents/add-bulk/<batch_id>", methods=["GET"])
+    def api_add_bulk_batch(batch_id):
+        deluge = sm.get_service("deluge")
+        if not deluge:
+            return jsonify({"success": False, "error": "Deluge not available"}), 400
+
+        try:
+            offset = int(request.args.get("offset", 0))
+            limit = int(request.args.get("limit", 100))
+        except ValueError:
+            return jsonify({"success": False, "error": "Invalid offset/limit"}), 400
+
+        result = deluge.bulk_status(
+            batch_id, request.args.get("status"), offset, limit
+        )
+        return jsonify(result), 200 if result.get("success") else 404
+
+    @app.route("/api/torrents/upload", methods=["POST"])
+    def api_upload_torrents():
+        deluge = sm.get_service("deluge")
+        if not deluge:
+            return jsonify({"success": False, "error": "Deluge not running"}), 400
+
+        # multipart/form-data (satu/lebih file) atau raw body (.torrent,
+        # zip, tar). Body di-stream ke spool file, tidak dibuffer di memori.
+        if request.mimetype == "multipart/form-data":
+            uploads = [
+                (f.stream, f.filename or "upload.torrent")
+                for _, f in request.files.items(multi=True)
+            ]
+            if not uploads:
+                return jsonify({"success": False, "error": "No files uploaded"}), 400
+        else:
+            name = (
+                request.args.get("name")
+                or request.headers.get("X-Filename")
+                or "upload.torrent"
+            )
+            uploads = [(request.stream, name)]
+
+        results, added, failed = [], 0, 0
+        for stream, name in uploads:
+            r = deluge.upload_torrents(stream, name)
+            if "results" not in r:
+                r = {"results": [{"name": name, "success": False,
+                                  "error": r.get("error", "unknown")}],
+                     "added": 0, "failed": 1}
+            results.extend(r["results"])
+            added += r["added"]
+            failed += r["failed"]
+
+        return jsonify({
+            "success": added > 0,
+            "added": added,
+            "failed": failed,
+            "results": results,
+        }), 200 if added or not failed else 400
+
+    @app.route("/api/torrents/batch", methods=["POST"])
+    def api_batch_torrents():
+        deluge = sm.get_service("deluge")
+        if not deluge:
+            return jsonify({"success": False, "error": "Deluge not running"}), 400
+
+        # {"action": "pause", "ids": [...]} atau {"action": ..., "filter": {...}}
+        data = request.get_json() or {}
+        ids = data.get("ids")
+        query = None
+        try:
+            if data.get("filter") is not None:
+                query = TorrentQuery.from_filter(data["filter"])
+            elif not isinstance(ids, list):
+                raise ValueError("Provide 'ids' (list) or 'filter'")
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        result = deluge.batch_torrents(
+            data.get("action", ""),
+            ids=ids,
+            query=query,
+            remove_data=bool(data.get("remove_data", False)),
+        )
+        code = 200 if result.get("success") or "results" in result else 400
+        return jsonify(result), code
+
+    @app.route("/api/torrents/events", methods=["GET"])
+    def api_torrent_events():
+        deluge = sm.get_service("deluge")
+        if not deluge:
+            return jsonify({"success": False, "error": "Deluge not running"}), 400
+
+        stream = deluge.torrent_events()
+        if isinstance(stream, dict):
+            return jsonify(stream), 503
+
+        return Response(stream, mimetype="text/event-stream", headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        })
+
     @app.route("/api/torrents/stats", methods=["GET"])
     def api_torrent_stats():
         deluge = sm.get_service("deluge")
@@ -151,6 +507,20 @@ def create_app(api_key=None, workspace=None):
             return jsonify({"success": False, "error": "Deluge not running"}), 400
         return jsonify(deluge.get_stats())
 
+    @app.route("/api/torrents/stats/history", methods=["GET"])
+    def api_torrent_stats_history():
+        deluge = sm.get_service("deluge")
+        if not deluge:
+            return jsonify({"success": False, "error": "Deluge not running"}), 400
+
+        try:
+            span = parse_duration(request.args.get("range"), "range") or 3600
+            step = parse_duration(request.args.get("step"), "step")
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        return jsonify(deluge.get_stats_history(span, step))
+
     @app.route("/api/torrents/<torrent_id>", methods=["GET"])
     def api_torrent_detail(torrent_id):
         deluge = sm.get_service("deluge")
@@ -158,6 +528,121 @@ def create_app(api_key=None, workspace=None):
             return jsonify({"success": False, "error": "Deluge not running"}), 400
         return jsonify(deluge.get_torrent_details(torrent_id))
 
+    # ?prefix=&glob=&regex=&ext=&fields=&offset=&limit= (limit maks 1000)
+    @app.route("/api/torrents/<torrent_id>/files", methods=["GET"])
+    def api_torrent_files(torrent_id):
+        deluge = sm.get_service("deluge")
+        if not deluge:
+            return jsonify({"success": False, "error": "Deluge not running"}), 400
+        try:
+            query = PageQuery.from_args(request.args, FILE_FIELDS, FILE_DEFAULT_FIELDS)
+            match = FileMatch.from_args(request.args)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        return jsonify(deluge.get_torrent_files(torrent_id, query, match))
+
+    @app.route("/api/torrents/<torrent_id>/files/priority", methods=["POST"])
+    def api_torrent_file_priority(torrent_id):
+        """
+        Body: {"priority": 4, "glob": "*.mkv", "others": 0}
+        Selector: prefix / glob / regex / ext / indexes (di-AND).
+        """
+        deluge = sm.get_service("deluge")
+        if not deluge:
+            return jsonify({"success": False, "error": "Deluge not running"}), 400
+
+        data = request.get_json(silent=True) or {}
+        if "priority" not in data:
+            return jsonify({"success": False, "error": "'priority' required"}), 400
+        try:
+            match = FileMatch.from_args(data)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        result = deluge.set_file_priorities(
+            torrent_id, data["priority"], match, data.get("others")
+        )
+        code = 200 if result.get("success") else 400
+        return jsonify(result), code
+
+    @app.route("/api/torrents/<torrent_id>/stream", methods=["POST"])
+    def api_torrent_stream(torrent_id):
+        """Body: {"enabled": true, "file_index": 3}"""
+        deluge = sm.get_service("deluge")
+        if not deluge:
+            return jsonify({"success": False, "error": "Deluge not running"}), 400
+
+        data = request.get_json(silent=True) or {}
+        file_index = data.get("file_index")
+        if file_index is not None and not isinstance(file_index, int):
+            return jsonify({"success": False, "error": "'file_index' must be an integer"}), 400
+
+        result = deluge.set_stream_mode(
+            torrent_id, bool(data.get("enabled", True)), file_index
+        )
+        return jsonify(result), 200 if result.get("success") else 400
+
+    @app.route("/api/torrents/<torrent_id>/peers", methods=["GET"])
+    def api_torrent_peers(torrent_id):
+        deluge = sm.get_service("deluge")
+        if not deluge:
+            return jsonify({"success": False, "error": "Deluge not running"}), 400
+        try:
+            query = PageQuery.from_args(request.args, PEER_FIELDS)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        return jsonify(deluge.get_torrent_peers(torrent_id, query))
+
+    @app.route("/api/torrents/<torrent_id>/trackers", methods=["GET"])
+    def api_torrent_trackers(torrent_id):
+        deluge = sm.get_service("deluge")
+        if not deluge:
+            return jsonify({"success": False, "error": "Deluge not running"}), 400
+        try:
+            query = PageQuery.from_args(request.args, TRACKER_FIELDS)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        return jsonify(deluge.get_torrent_trackers(torrent_id, query))
+
+    # Range request dari file yang masih di-download; piece yang belum
+    # ada ditunggu (dan priority-nya dinaikkan)
+    @app.route("/api/files/<torrent_id>/<int:file_index>", methods=["GET"])
+    def api_torrent_file_content(torrent_id, file_index):
+        deluge = sm.get_service("deluge")
+        if not deluge:
+            return jsonify({"success": False, "error": "Deluge not running"}), 400
+
+        result = deluge.open_file_stream(torrent_id, file_index)
+        if not result.get("success"):
+            return jsonify(result), 404
+        stream, size = result["stream"], result["size"]
+
+        try:
+            span = parse_range(request.headers.get("Range"), size)
+        except RangeNotSatisfiable:
+            return Response(
+                status=416, headers={"Content-Range": f"bytes */{size}"}
+            )
+
+        start, end = span or (0, size - 1)
+        headers = {
+            "Accept-Ranges": "bytes",
+            "Content-Length": str(max(0, end - start + 1)),
+            "Content-Disposition": f"inline; filename*=UTF-8''{quote(result['name'])}",
+        }
+        if span:
+            headers["Content-Range"] = content_range(start, end, size)
+
+        mimetype = mimetypes.guess_type(result["name"])[0] or "application/octet-stream"
+        body = stream.iter_range(start, end) if size else iter(())
+        return Response(
+            body,
+            status=206 if span else 200,
+            headers=headers,
+            mimetype=mimetype,
+            direct_passthrough=True,
+        )
+
     @app.route("/api/torrents/<torrent_id>/pause", methods=["POST"])
     def api_pause_torrent(torrent_id):
         deluge = sm.get_service("deluge")
@@ -7,6 +7,7 @@ import time
 import argparse
 import subprocess
 import secrets
+from urllib.parse import urlencode
 
 from moccha.daemon import (
     stop_daemon, is_running,
@@ -198,6 +199,93 @@ def _api_request(method, endpoint, data=None):
         return None
 
 
+def _api_upload(endpoint, path):
+    """Helper: stream file lokal ke server sebagai raw body."""
+    import requests
+
+    url, key = _get_api()
+    if not url:
+        return None
+
+    headers = {
+        "X-API-Key": key,
+        "Content-Type": "application/octet-stream",
+        "X-Filename": os.path.basename(path),
+    }
+
+    try:
+        with open(path, "rb") as f:
+            r = requests.post(f"{url}{endpoint}", headers=headers, data=f, timeout=300)
+        return r.json()
+
+    except requests.exceptions.ConnectionError:
+        print(f"❌ Cannot connect to server at {url}")
+        return None
+    except Exception as e:
+        print(f"❌ Upload failed: {e}")
+        return None
+
+
+def _api_events(endpoint):
+    """Helper: baca stream SSE → yield (event, data dict)."""
+    import requests
+
+    url, key = _get_api()
+    if not url:
+        return
+
+    try:
+        with requests.get(f"{url}{endpoint}", headers={"X-API-Key": key},
+                          stream=True, timeout=(15, 60)) as r:
+            event, data = None, []
+            for line in r.iter_lines(decode_unicode=True):
+                if line is None:
+                    continue
+                if not line:
+                    if event and data:
+                        yield event, json.loads("\n".join(data))
+                    event, data = None, []
+                elif line.startswith("event:"):
+                    event = line[6:].strip()
+                elif line.startswith("data:"):
+                    data.append(line[5:].strip())
+
+    except requests.exceptions.ConnectionError:
+        print(f"❌ Cannot connect to server at {url}")
+    except Exception as e:
+        print(f"❌ Stream failed: {e}")
+
+
+def _service_all(action):
+    """start/stop semua service: progress per service via SSE."""
+    icons = {"running": "⏳", "done": "✅", "failed": "❌", "timeout": "⌛", "skipped": "⏭️"}
+    verb, done = ("Starting", "started") if action == "start" else ("Stopping", "stopped")
+    print(f"🚀 {verb} all services...")
+
+    result = _api_request("POST", f"/api/services/{action}-all")
+    if not result:
+        return
+    if not result.get("services"):
+        print("📭 No services initialized")
+        return
+
+    for event, data in _api_events("/api/services/lifecycle/events"):
+        if event == "progress" and data.get("service"):
+            state = data.get("state")
+            line = f"  {icons.get(state, '•')} {data['service']:15s} {state}"
+            if data.get("duration_ms") is not None:
+                line += f" ({data['duration_ms'] / 1000:.1f}s)"
+            if data.get("error"):
+                line += f": {data['error']}"
+            print(line)
+        elif event == "complete":
+            elapsed = data.get("elapsed_ms", 0) / 1000
+            if data.get("success"):
+                print(f"✅ All services {done} in {elapsed:.1f}s")
+            else:
+                print(f"⚠️ Finished in {elapsed:.1f}s: {data.get('counts')}")
+
+
 def cmd_service(args):
     """Service management commands."""
     action = args.action
@@ -237,6 +325,10 @@ def cmd_service(args):
             print()
         return
 
+    if service_name == "all" and action in ("start", "stop"):
+        _service_all(action)
+        return
+
     if not service_name:
         print("❌ Service name required")
         print("   Usage: moccha service start deluge")
@@ -306,11 +398,74 @@ def cmd_service(args):
 # Torrent Commands
 # ─────────────────────────────────────────────
 
+def _read_ids(path):
+    """Baca torrent ID dari file (satu per baris) atau '-' untuk stdin."""
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path) as f:
+            lines = f.read().splitlines()
+    return [l.strip() for l in lines if l.strip() and not l.startswith("#")]
+
+
+def _torrent_batch(action, args):
+    """pause/resume/remove banyak torrent lewat satu request batch."""
+    data = {"action": action}
+    if args.filter:
+        data["filter"] = args.filter
+    else:
+        try:
+            data["ids"] = _read_ids(args.ids_from)
+        except OSError as e:
+            print(f"❌ Cannot read IDs: {e}")
+            return
+        if not data["ids"]:
+            print("📭 No torrent IDs given")
+            return
+    if action == "remove" and getattr(args, 'remove_data', False):
+        data["remove_data"] = True
+
+    result = _api_request("POST", "/api/torrents/batch", data)
+    if not result:
+        print("❌ Failed: no response")
+        return
+    if "results" not in result:
+        print(f"❌ Failed: {result.get('error', 'unknown')}")
+        return
+
+    print(f"✅ {action}: {result.get('succeeded', 0)} ok, "
+          f"{result.get('failed', 0)} failed ({result.get('mode')})")
+    for tid, r in result["results"].items():
+        if not r.get("success"):
+            print(f"   ❌ {tid[:16]}... {r.get('error', 'unknown')}")
+
+
 def cmd_torrent(args):
     """Torrent management commands."""
     action = args.action
 
-    if action == "add":
+    if action == "add" and args.from_file:
+        try:
+            with open(args.from_file) as f:
+                lines = f.read().splitlines()
+        except OSError as e:
+            print(f"❌ Cannot read {args.from_file}: {e}")
+            return
+
+        print(f"📥 Queueing {len(lines)} lines...")
+        result = _api_request("POST", "/api/torrents/add-bulk", {"items": lines})
+        if result and result.get("success"):
+            print(f"✅ Queued {result.get('accepted', 0)} torrents "
+                  f"({result.get('duplicates', 0)} duplicates skipped)")
+            invalid = result.get("invalid") or []
+            if invalid:
+                print(f"⚠️ {len(invalid)} invalid lines, e.g.: {invalid[0][:60]}")
+            if result.get("batch_id"):
+                print(f"   Progress: moccha torrent queue --batch {result['batch_id']}")
+        else:
+            print(f"❌ Failed: {result.get('error', 'unknown') if result else 'no response'}")
+
+    elif action == "add":
         if not args.url:
             print("❌ URL/magnet required: moccha torrent add <magnet_or_url>")
             return
@@ -318,33 +473,101 @@ def cmd_torrent(args):
         url_or_magnet = args.url
         data = {}
 
+        # File lokal (.torrent / zip / tar) → upload
+        if os.path.isfile(url_or_magnet):
+            print(f"📤 Uploading {os.path.basename(url_or_magnet)}...")
+            result = _api_upload("/api/torrents/upload", url_or_magnet)
+            if not result:
+                return
+            for r in result.get("results", []):
+                if r.get("success"):
+                    print(f"✅ {r['name']}: {r.get('torrent_id', '?')}")
+                else:
+                    print(f"❌ {r['name']}: {r.get('error', 'unknown')}")
+            print(f"   Added {result.get('added', 0)}, failed {result.get('failed', 0)}")
+            return
+
         if url_or_magnet.startswith("magnet:"):
             data["magnet"] = url_or_magnet
-            print(f"🧲 Adding magnet link...")
+            if args.only or args.exclude or args.metadata_first:
+                # Metadata dulu, lalu hanya file yang cocok di-download
+                data["metadata_first"] = True
+                data["include"] = [args.only] if args.only else []
+                data["exclude"] = [args.exclude] if args.exclude else []
+                print("🧲 Fetching magnet metadata...")
+            else:
+                print("🧲 Adding magnet link...")
         else:
             data["torrent_url"] = url_or_magnet
             print(f"📥 Adding torrent URL...")
 
         result = _api_request("POST", "/api/torrents/add", data)
-        if result:
+        if result and result.get("pending"):
+            tid = result.get("torrent_id", "?")
+            deadline = time.time() + 300
+            while result and result.get("success") and time.time() < deadline:
+                magnet = result.get("magnet", result)
+                if magnet.get("state") not in (None, "metadata"):
+                    break
+                result = _api_request("GET", f"/api/torrents/magnets/{tid}?wait=10")
+            magnet = (result or {}).get("magnet", {})
+            state = magnet.get("state")
+            if state in ("added", "hold"):
+                size_mb = magnet.get("selected_bytes", 0) / 1024 / 1024
+                print(f"✅ Torrent added! ID: {tid}")
+                print(f"   {magnet.get('selected_count', 0)}/{magnet.get('file_count', 0)} "
+                      f"files selected ({size_mb:.1f} MB)")
+                if state == "hold":
+                    print(f"   ⏸️ No files selected; pick with: moccha torrent files --id {tid} --only '<glob>'")
+            elif state == "duplicate":
+                print(f"⚠️ Torrent already exists: {tid}")
+            else:
+                error = magnet.get("error") or (result or {}).get("error", "still waiting for metadata")
+                print(f"❌ Failed: {error}")
+        elif result:
             if result.get("success"):
                 tid = result.get("torrent_id", "?")
                 print(f"✅ Torrent added! ID: {tid}")
+            elif result.get("duplicate"):
+                print(f"⚠️ Torrent already exists: {result.get('torrent_id', '?')}")
             else:
                 print(f"❌ Failed: {result.get('error', 'unknown')}")
 
     elif action == "list":
-        result = _api_request("GET", "/api/torrents")
+        # Minta hanya halaman + field yang ditampilkan
+        params = {
+            "fields": "name,state,progress,"
+                      "download_payload_rate,upload_payload_rate",
+            "limit": args.limit,
+        }
+        if args.offset:
+            params["offset"] = args.offset
+        if args.cursor:
+            params["cursor"] = args.cursor
+        if args.state:
+            params["state"] = args.state
+        if args.name:
+            params["name~"] = args.name
+        if args.sort:
+            params["sort"] = args.sort
+
+        result = _api_request("GET", f"/api/torrents?{urlencode(params)}")
         if result:
+            if not result.get("success", True):
+                print(f"❌ Failed: {result.get('error', 'unknown')}")
+                return
+
             torrents = result.get("torrents", [])
             count = result.get("count", 0)
+            total = result.get("total", count)
 
             if count == 0:
                 print("📭 No torrents")
                 return
 
+            first = result.get("offset", 0) + 1
             print(f"\n{'='*65}")
-            print(f"  📦 Torrents ({count})")
+            print(f"  📦 Torrents ({first}-{first + count - 1} of {total})")
             print(f"{'='*65}")
 
             for t in torrents:
@@ -376,8 +599,14 @@ def cmd_torrent(args):
                 print(f"     {state} | ⬇️ {dl_rate:.1f} KB/s | ⬆️ {ul_rate:.1f} KB/s")
                 print(f"     ID: {tid[:16]}...")
 
+            next_cursor = result.get("next_cursor")
+            if next_cursor:
+                print(f"\n  ➡️ Next page: moccha torrent list --cursor {next_cursor}")
             print()
 
+    elif action in ("pause", "resume", "remove") and (args.ids_from or args.filter):
+        _torrent_batch(action, args)
+
     elif action == "pause":
         if not args.torrent_id:
             print("❌ Torrent ID required: moccha torrent pause <id>")
@@ -423,21 +652,88 @@ def cmd_torrent(args):
             print(f"  📦 {torrent.get('name', '?')}")
             print(f"{'='*50}")
             for k, v in torrent.items():
-                if k not in ("files", "trackers", "peers"):
-                    print(f"  {k}: {v}")
-
-            files = torrent.get("files", [])
-            if files:
-                print(f"\n  📁 Files ({len(files)}):")
-                for f in files[:10]:
-                    size_mb = f.get("size", 0) / 1024 / 1024
+                print(f"  {k}: {v}")
+
+            files = _api_request(
+                "GET", f"/api/torrents/{args.torrent_id}/files?limit=10&fields=path,size"
+            )
+            if files and files.get("success") and files.get("files"):
+                total = files.get("total", 0)
+                print(f"\n  📁 Files ({total}):")
+                for f in files["files"]:
+                    size_mb = (f.get("size") or 0) / 1024 / 1024
                     print(f"     {f.get('path', '?')} ({size_mb:.1f} MB)")
-                if len(files) > 10:
-                    print(f"     ... and {len(files) - 10} more")
+                if total > len(files["files"]):
+                    print(f"     ... and {total - len(files['files'])} more")
+            print()
+        else:
+            print(f"❌ Failed: {result.get('error', 'unknown') if result else 'no response'}")
+
+    elif action == "files":
+        if not args.torrent_id:
+            print("❌ Torrent ID required: moccha torrent files --id <id>")
+            return
+        base = f"/api/torrents/{args.torrent_id}/files"
+
+        if args.only or args.skip:
+            # --only: yang cocok di-download, sisanya skip (priority 0)
+            # --skip: yang cocok di-skip, sisanya dibiarkan
+            if args.only:
+                data = {"glob": args.only, "priority": args.priority, "others": 0}
+            else:
+                data = {"glob": args.skip, "priority": 0}
+            result = _api_request("POST", f"{base}/priority", data)
+            if result and result.get("success"):
+                wanted_mb = result.get("wanted_bytes", 0) / 1024 / 1024
+                print(f"🎯 {result.get('matched', 0)}/{result.get('total', 0)} files matched, "
+                      f"{result.get('skipped', 0)} skipped, {wanted_mb:.1f} MB wanted")
+            else:
+                print(f"❌ Failed: {result.get('error', 'unknown') if result else 'no response'}")
+            return
+
+        params = {"limit": args.limit, "offset": args.offset}
+        result = _api_request("GET", f"{base}?{urlencode(params)}")
+        if result and result.get("success"):
+            files = result.get("files", [])
+            print(f"\n📁 Files {args.offset + 1}-{args.offset + len(files)} "
+                  f"of {result.get('total', 0)}:")
+            for f in files:
+                size_mb = (f.get("size") or 0) / 1024 / 1024
+                mark = "⏭️" if f.get("priority") == 0 else "  "
+                print(f"  {mark} [{f.get('index')}] {f.get('path', '?')} "
+                      f"({size_mb:.1f} MB, {(f.get('progress') or 0) * 100:.0f}%)")
             print()
         else:
             print(f"❌ Failed: {result.get('error', 'unknown') if result else 'no response'}")
 
+    elif action == "queue":
+        if args.batch:
+            endpoint = f"/api/torrents/add-bulk/{args.batch}?status=failed&limit=20"
+            result = _api_request("GET", endpoint)
+            if result and result.get("success"):
+                counts = result.get("counts", {})
+                print(f"\n📋 Batch {args.batch}:")
+                for status, n in sorted(counts.items()):
+                    print(f"  {status:10s} {n}")
+                for item in result.get("items", []):
+                    print(f"  ❌ {item.get('source', '?')[:60]} — {item.get('error')}")
+                print()
+            else:
+                print(f"❌ Failed: {result.get('error', 'unknown') if result else 'no response'}")
+        else:
+            result = _api_request("GET", "/api/torrents/add-bulk")
+            if result and result.get("success"):
+                totals = result.get("totals", {})
+                if not totals:
+                    print("📭 Ingest queue is empty")
+                    return
+                print("\n📋 Ingest queue: " + ", ".join(
+                    f"{k}={v}" for k, v in sorted(totals.items())))
+                for batch_id, counts in result.get("batches", {}).items():
+                    print(f"  {batch_id}: " + ", ".join(
+                        f"{k}={v}" for k, v in sorted(counts.items())))
+                print()
+
     elif action == "stats":
         result = _api_request("GET", "/api/torrents/stats")
         if result and result.get("success"):
@@ -452,7 +748,68 @@ def cmd_torrent(args):
 
     else:
         print(f"❌ Unknown action: {action}")
-        print("   Actions: add, list, pause, resume, remove, info, stats")
+        print("   Actions: add, list, pause, resume, remove, info, files, stats, queue")
+
+
+# ─────────────────────────────────────────────
+# Debug Commands
+# ─────────────────────────────────────────────
+
+def cmd_debug(args):
+    """Diagnostics yang jalan lokal (tanpa server)."""
+    if args.action != "startup":
+        print(f"❌ Unknown action: {args.action}")
+        return
+
+    from moccha.utils.startup_report import run_report
+
+    print("⏱️  Measuring startup (python -X importtime)...")
+    report = run_report(workspace=args.workspace, load=args.load, top=args.top)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    if not report.get("success"):
+        print(f"❌ Probe failed: {report.get('error', 'unknown')}")
+        if not report.get("modules"):
+            return
+
+    print(f"\n{'='*55}")
+    print(f"  🚀 Startup: {report['modules']} modules, "
+          f"{report['import_ms']:.0f} ms import, {report['wall_ms']:.0f} ms wall")
+    print(f"{'='*55}")
+
+    for phase, ms in (report.get("phases") or {}).items():
+        print(f"  {phase:22s} {ms:8.1f} ms")
+
+    if report.get("registry"):
+        print("\n  📦 Services (imported before first use?)")
+        imported = report.get("service_modules_imported", {})
+        enabled = report.get("enabled", [])
+        for name, spec in report["registry"].items():
+            flag = "⚠️ yes" if imported.get(name) else "no"
+            state = "enabled" if name in enabled else "disabled"
+            print(f"  {name:15s} {state:9s} {flag:6s} {spec['target']}")
+        heavy = report.get("heavy_modules_imported") or []
+        if heavy:
+            print(f"  ⚠️ Imported at startup: {', '.join(heavy)}")
+
+    for name, info in (report.get("loads") or {}).items():
+        icon = "✅" if info["ok"] else "❌"
+        line = f"  {icon} load {name}: {info['total_ms']:.1f} ms"
+        if info.get("import_ms") is not None:
+            line += f" (import {info['import_ms']:.1f} ms)"
+        if info.get("error"):
+            line += f" — {info['error']}"
+        print(line)
+
+    print("\n  Top packages (self time):")
+    for p in report["by_package"]:
+        print(f"  {p['package']:28s} {p['ms']:8.1f} ms")
+    print("\n  Slowest modules (self / cumulative):")
+    for m in report["slowest"]:
+        print(f"  {m['module'][:40]:40s} {m['self_ms']:7.1f} {m['cumulative_ms']:8.1f} ms")
+    print()
 
 
 # ─────────────────────────────────────────────
@@ -470,8 +827,14 @@ Examples:
   moccha status                         Show status
   moccha service list                   List services
   moccha service start deluge           Start Deluge
+  moccha service start all              Start all enabled services (parallel)
   moccha torrent add "magnet:?xt=..."   Add torrent
   moccha torrent list                   List torrents
+  moccha torrent files --id X --only '*.mkv'
+                                        Download only the .mkv files
+  moccha torrent pause --filter 'state=Downloading'
+                                        Pause all downloading torrents
+  moccha debug startup --load deluge    Import-time / startup report
   moccha logs                           Show logs
   moccha stop                           Stop server
         """
@@ -518,22 +881,70 @@ Examples:
                    choices=["list", "start", "stop", "restart", "status", "config"],
                    help="Action to perform")
     p.add_argument("name", type=str, nargs="?", default=None,
-                   help="Service name (deluge, jdownloader, mega)")
+                   help="Service name (deluge, jdownloader, mega, or 'all' for start/stop)")
     p.set_defaults(func=cmd_service)
 
     # ── torrent ──
     p = sub.add_parser("torrent", help="Manage torrents")
     p.add_argument("action", type=str,
-                   choices=["add", "list", "pause", "resume", "remove", "info", "stats"],
+                   choices=["add", "list", "pause", "resume", "remove", "info",
+                            "files", "stats", "queue"],
                    help="Action to perform")
     p.add_argument("url", type=str, nargs="?", default=None,
-                   help="Magnet link or torrent URL (for add)")
+                   help="Magnet link, torrent URL, or local .torrent/zip/tar (for add)")
     p.add_argument("--id", dest="torrent_id", type=str, default=None,
-                   help="Torrent ID (for pause/resume/remove/info)")
+                   help="Torrent ID (for pause/resume/remove/info/files)")
     p.add_argument("--remove-data", action="store_true", default=False,
                    help="Also remove downloaded data (for remove)")
+    p.add_argument("--from-file", type=str, default=None,
+                   help="File with one magnet/URL per line (for add)")
+    p.add_argument("--batch", type=str, default=None,
+                   help="Bulk-add batch ID (for queue)")
+    p.add_argument("--ids-from", type=str, default=None,
+                   help="File with one torrent ID per line, '-' = stdin "
+                        "(for pause/resume/remove)")
+    p.add_argument("--filter", type=str, default=None,
+                   help="Filter, e.g. 'state=Paused&name~=ubuntu' "
+                        "(for pause/resume/remove)")
+    p.add_argument("--limit", type=int, default=20,
+                   help="Items per page (for list/files)")
+    p.add_argument("--offset", type=int, default=0,
+                   help="Skip first N items (for list/files)")
+    p.add_argument("--cursor", type=str, default=None,
+                   help="Continue from a previous page (for list)")
+    p.add_argument("--state", type=str, default=None,
+                   help="Filter by state, e.g. Downloading,Seeding (for list)")
+    p.add_argument("--name", type=str, default=None,
+                   help="Filter by name substring (for list)")
+    p.add_argument("--sort", type=str, default=None,
+                   help="Sort fields, prefix '-' for descending (for list)")
+    p.add_argument("--only", type=str, default=None,
+                   help="Download only files matching this glob, e.g. '*.mkv' (for files/add)")
+    p.add_argument("--exclude", type=str, default=None,
+                   help="Never download files matching this glob (for magnet add)")
+    p.add_argument("--metadata-first", action="store_true", default=False,
+                   help="Fetch magnet metadata before adding; without --only "
+                        "the torrent is added paused with no files selected (for add)")
+    p.add_argument("--skip", type=str, default=None,
+                   help="Skip files matching this glob (for files)")
+    p.add_argument("--priority", type=int, default=4,
+                   help="Priority for --only matches, 1-7 (for files)")
     p.set_defaults(func=cmd_torrent)
 
+    # ── debug ──
+    p = sub.add_parser("debug", help="Diagnostics")
+    p.add_argument("action", type=str, choices=["startup"],
+                   help="startup: import-time and startup phase report")
+    p.add_argument("--workspace", type=str, default=None,
+                   help="Workspace whose config to use (default: temp, default config)")
+    p.add_argument("--load", action="append", default=[],
+                   help="Also measure loading this service (repeatable)")
+    p.add_argument("--top", type=int, default=15,
+                   help="Rows in the slowest-modules table")
+    p.add_argument("--json", action="store_true", default=False,
+                   help="Print the raw report as JSON")
+    p.set_defaults(func=cmd_debug)
+
     args = parser.parse_args()
 
     if not args.command:
@@ -98,6 +98,23 @@ def run_daemon(port, api_key=None, workspace=None):
     else:
         log("⚠️ Flask may not be ready, continuing...")
 
+    # ── 1b) Autostart services (background, API tidak menunggu) ──
+    sm = app.config["SERVICE_MANAGER"]
+    try:
+        run = sm.autostart()
+        if run is not None:
+            log(f"🔧 Autostarting services: {', '.join(run.states)}")
+
+            def report():
+                run.wait()
+                for name, state in run.snapshot()["services"].items():
+                    extra = f" ({state['error']})" if state.get("error") else ""
+                    log(f"   {name}: {state['state']}{extra}")
+
+            threading.Thread(target=report, daemon=True).start()
+    except Exception as e:
+        log(f"❌ Service autostart failed: {e}")
+
     # ── 2) Start Cloudflared Tunnel ───────────────────────
     public_url = f"http://localhost:{port}"
 
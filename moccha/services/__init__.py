@@ -1,6 +1,16 @@
 """Moccha - Download manager for Google Colab."""
 
-from moccha.daemon import load_info, is_running
+# ✅ Import moccha.daemon di dalam fungsi: daemon meng-import requests,
+# jangan dibayar oleh setiap import moccha.services.* (ServiceManager dll.)
+
+def load_info():
+    from moccha.daemon import load_info
+    return load_info()
+
+
+def is_running():
+    from moccha.daemon import is_running
+    return is_running()
 
 
 def get_url():
@@ -0,0 +1,455 @@
+"""Config store: snapshot immutable berversi, tulis atomik, hot reload."""
+
+import os
+import json
+import atexit
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from moccha.utils import inotify
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigConflict(Exception):
+    """If-Match tidak cocok dengan versi config saat ini."""
+
+    def __init__(self, etag: str):
+        super().__init__(f"config changed (current ETag {etag})")
+        self.etag = etag
+
+
+# ─────────────────────────────────────────────
+# Frozen tree
+# ─────────────────────────────────────────────
+
+class FrozenDict(dict):
+    """
+    dict read-only untuk snapshot config. Tetap subclass dict supaya
+    jsonify/json.dump dan `.get()` di service bekerja tanpa konversi.
+    deepcopy menghasilkan dict biasa yang bisa diubah.
+    """
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("config snapshot is read-only; use ServiceManager.update_config()")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+
+def freeze(obj: Any) -> Any:
+    """dict → FrozenDict, list → tuple (rekursif). Node yang sudah frozen dipakai ulang."""
+    if isinstance(obj, FrozenDict):
+        return obj
+    if isinstance(obj, dict):
+        return FrozenDict((k, freeze(v)) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(v) for v in obj)
+    return obj
+
+
+def thaw(obj: Any) -> Any:
+    """Kebalikan freeze(): salinan mutable (dict/list)."""
+    if isinstance(obj, dict):
+        return {k: thaw(v) for k, v in obj.items()}
+    if isinstance(obj, tuple):
+        return [thaw(v) for v in obj]
+    return obj
+
+
+def config_etag(obj: Any) -> str:
+    """ETag (strong) dari isi config: sama isi → sama ETag, lintas restart."""
+    raw = json.dumps(obj, sort_keys=True, separators=(",", ":"))
+    return '"' + hashlib.sha1(raw.encode()).hexdigest()[:16] + '"'
+
+
+class ConfigSnapshot:
+    """Satu versi config. `data` tidak pernah berubah setelah dibuat."""
+
+    __slots__ = ("version", "data", "source", "_etags")
+
+    def __init__(self, version: int, data: FrozenDict, source: str):
+        self.version = version
+        self.data = data
+        self.source = source
+        self._etags: Dict[Tuple[str, ...], str] = {}
+
+    def get(self, *path: str) -> Any:
+        node: Any = self.data
+        for key in path:
+            node = node.get(key) if isinstance(node, dict) else None
+            if node is None:
+                return None
+        return node
+
+    def etag(self, *path: str) -> str:
+        """ETag subtree `path` (dihitung sekali per snapshot)."""
+        tag = self._etags.get(path)
+        if tag is None:
+            tag = self._etags[path] = config_etag(self.get(*path))
+        return tag
+
+
+# ─────────────────────────────────────────────
+# Store
+# ─────────────────────────────────────────────
+
+def _file_sig(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class ConfigStore:
+    """
+    Config JSON di disk + snapshot immutable di memori.
+
+    - Baca: `current` / `data` mengembalikan snapshot apa adanya (O(1),
+      tanpa deepcopy); pembaca lama tetap memegang versinya sendiri.
+    - Tulis: `update(fn)` membuat root baru copy-on-write (subtree yang
+      tidak berubah dipakai bersama) dan menaikkan versi. Persist
+      di-debounce lalu ditulis atomik (temp file + fsync + rename), jadi
+      file tidak pernah setengah tertulis.
+    - Edit dari luar (editor, `cat >`) dideteksi lewat inotify pada
+      direktori config, atau stat berkala sebagai fallback, lalu
+      di-reload; listener dipanggil dengan (old, new).
+
+    `normalize(raw)` mengubah isi file menjadi config lengkap (merge
+    default dsb.) dan dipakai untuk load awal maupun reload.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        normalize: Callable[[Dict[str, Any]], Dict[str, Any]],
+        debounce: float = 0.5,
+        poll_interval: float = 2.0,
+        use_inotify: bool = True,
+    ):
+        self.path = path
+        self._normalize = normalize
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+
+        self._lock = threading.Lock()          # snapshot + versi
+        self._write_lock = threading.Lock()    # satu writer ke disk
+        self._snapshot = ConfigSnapshot(0, FrozenDict(), "empty")
+        self._listeners: List[Callable[[ConfigSnapshot, ConfigSnapshot], None]] = []
+
+        self._persisted_version = 0
+        self._disk_sig: Optional[Tuple[int, int, int]] = None
+        self._written: Optional[FrozenDict] = None   # isi tulisan terakhir kita
+        self._save_timer: Optional[threading.Timer] = None
+        self.last_error: Optional[str] = None
+        self.reloads = 0
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wake_r: Optional[int] = None
+        self._wake_w: Optional[int] = None
+        self._atexit = False
+
+    # ─────────────────────────────────────────────
+    # Read
+    # ─────────────────────────────────────────────
+
+    @property
+    def current(self) -> ConfigSnapshot:
+        return self._snapshot
+
+    @property
+    def data(self) -> FrozenDict:
+        return self._snapshot.data
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    def subscribe(self, fn: Callable[[ConfigSnapshot, ConfigSnapshot], None]) -> None:
+        self._listeners.append(fn)
+
+    # ─────────────────────────────────────────────
+    # Load / reload
+    # ─────────────────────────────────────────────
+
+    def _read_file(self) -> Optional[Dict[str, Any]]:
+        """Isi file (dict), None jika tidak ada. ValueError jika JSON rusak."""
+        try:
+            with open(self.path, "r") as f:
+                raw = json.load(f)
+        except FileNotFoundError:
+            return None
+        if not isinstance(raw, dict):
+            raise ValueError("top-level JSON value must be an object")
+        return raw
+
+    def load(self) -> ConfigSnapshot:
+        """
+        Load awal. File hanya ditulis jika belum ada (atau rusak dan
+        sudah di-backup); startup biasa tidak menulis ulang config.
+        """
+        sig = _file_sig(self.path)
+        raw: Optional[Dict[str, Any]] = None
+        try:
+            raw = self._read_file()
+            if raw is not None:
+                logger.info(f"Config loaded from {self.path}")
+            else:
+                logger.info("No config file found, using defaults")
+        except ValueError as e:
+            logger.error(f"Invalid JSON in config file: {e}")
+            # Backup corrupted file
+            backup = self.path + ".bak"
+            try:
+                os.replace(self.path, backup)
+                logger.info(f"Corrupted config backed up to {backup}")
+            except OSError:
+                pass
+        except Exception as e:
+            logger.error(f"Failed to load config: {e}")
+
+        snapshot = self._install(self._normalize(raw or {}), "file" if raw is not None else "default")
+        if raw is None:
+            self.flush()
+        else:
+            self._persisted_version = snapshot.version
+            self._disk_sig = sig
+        return snapshot
+
+    def _install(self, data: Dict[str, Any], source: str) -> ConfigSnapshot:
+        with self._lock:
+            old = self._snapshot
+            new = ConfigSnapshot(old.version + 1, freeze(data), source)
+            self._snapshot = new
+        return new
+
+    def reload(self) -> bool:
+        """Baca ulang file jika berubah dari luar; True jika ada versi baru."""
+        sig = _file_sig(self.path)
+        if sig is None or sig == self._disk_sig:
+            return False
+        try:
+            raw = self._read_file()
+        except (OSError, ValueError) as e:
+            # Editor sering menulis bertahap; coba lagi di event berikutnya
+            logger.warning(f"Config reload skipped, {self.path} unreadable: {e}")
+            return False
+        if raw is None:
+            return False
+
+        data = freeze(self._normalize(raw))
+        with self._lock:
+            old = self._snapshot
+            if data == old.data or data == self._written:
+                # Tulisan kita sendiri (event rename dari flush bisa datang
+                # sebelum flush selesai) / tidak ada perubahan
+                self._disk_sig = sig
+                return False
+            if self._persisted_version < old.version:
+                # ✅ FIX: Jangan timpa update yang belum tertulis; flush
+                # berikutnya menang atas edit dari luar
+                logger.warning(
+                    f"Config file {self.path} changed while unsaved updates are pending; "
+                    "keeping in-memory version"
+                )
+                return False
+            self._disk_sig = sig
+            new = ConfigSnapshot(old.version + 1, data, "reload")
+            self._snapshot = new
+            self._persisted_version = new.version
+            self.reloads += 1
+
+        logger.info(f"Config reloaded from {self.path} (version {new.version})")
+        self._notify(old, new)
+        return True
+
+    def _notify(self, old: ConfigSnapshot, new: ConfigSnapshot) -> None:
+        for fn in list(self._listeners):
+            try:
+                fn(old, new)
+            except Exception as e:
+                logger.error(f"Config listener failed: {e}")
+
+    # ─────────────────────────────────────────────
+    # Write
+    # ─────────────────────────────────────────────
+
+    def update(
+        self,
+        fn: Callable[[FrozenDict], Dict[str, Any]],
+        precondition: Optional[Callable[[ConfigSnapshot], None]] = None,
+    ) -> ConfigSnapshot:
+        """
+        Versi baru = fn(root sekarang). `fn` tidak boleh mengubah root
+        (memang read-only); ia mengembalikan dict baru yang boleh berisi
+        subtree lama. `precondition(snapshot)` dijalankan di dalam lock
+        yang sama (mis. cek If-Match) dan boleh raise ConfigConflict.
+        """
+        with self._lock:
+            old = self._snapshot
+            if precondition is not None:
+                precondition(old)
+            new = ConfigSnapshot(old.version + 1, freeze(fn(old.data)), "update")
+            self._snapshot = new
+        self._schedule_save()
+        return new
+
+    def _schedule_save(self) -> None:
+        with self._lock:
+            if self._save_timer is not None:
+                return
+            timer = threading.Timer(self.debounce, self._timer_flush)
+            timer.daemon = True
+            self._save_timer = timer
+        timer.start()
+
+    def _timer_flush(self) -> None:
+        with self._lock:
+            self._save_timer = None
+        self.flush()
+
+    @property
+    def dirty(self) -> bool:
+        return self._persisted_version < self._snapshot.version
+
+    def flush(self) -> bool:
+        """Tulis snapshot terbaru ke disk sekarang (temp + fsync + rename)."""
+        with self._write_lock:
+            snapshot = self._snapshot
+            if snapshot.version <= self._persisted_version and os.path.exists(self.path):
+                return True
+            directory = os.path.dirname(self.path) or "."
+            tmp = f"{self.path}.tmp-{os.getpid()}"
+            try:
+                os.makedirs(directory, exist_ok=True)
+                with open(tmp, "w") as f:
+                    json.dump(snapshot.data, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                with self._lock:
+                    self._written = snapshot.data
+                os.replace(tmp, self.path)
+                try:
+                    dir_fd = os.open(directory, os.O_RDONLY)
+                    try:
+                        os.fsync(dir_fd)
+                    finally:
+                        os.close(dir_fd)
+                except OSError:
+                    pass
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Failed to save config: {e}")
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+                return False
+
+            with self._lock:
+                self._persisted_version = max(self._persisted_version, snapshot.version)
+                self._disk_sig = _file_sig(self.path)
+            self.last_error = None
+            return True
+
+    # ─────────────────────────────────────────────
+    # Watcher
+    # ─────────────────────────────────────────────
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = threading.Thread(target=self._watch, name="config-watch", daemon=True)
+        self._thread.start()
+        if not self._atexit:
+            atexit.register(self.close)
+            self._atexit = True
+
+    def close(self) -> None:
+        """Stop watcher dan flush perubahan yang belum tertulis."""
+        self._stop.set()
+        if self._wake_w is not None:
+            try:
+                os.write(self._wake_w, b"x")
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        for fd in (self._wake_r, self._wake_w):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._wake_r = self._wake_w = None
+        with self._lock:
+            timer, self._save_timer = self._save_timer, None
+        if timer is not None:
+            timer.cancel()
+        if self.dirty:
+            self.flush()
+
+    def _watch(self) -> None:
+        ino = None
+        if self.use_inotify and inotify.available():
+            try:
+                ino = inotify.Inotify()
+                # Direktori, bukan file: rename atomik mengganti inode file
+                ino.add_watch(
+                    os.path.dirname(self.path) or ".",
+                    inotify.IN_CLOSE_WRITE | inotify.IN_MOVED_TO
+                    | inotify.IN_CREATE | inotify.IN_DELETE,
+                )
+            except OSError as e:
+                logger.warning(f"Config inotify unavailable, polling: {e}")
+                if ino is not None:
+                    ino.close()
+                ino = None
+
+        name = os.path.basename(self.path)
+        try:
+            while not self._stop.is_set():
+                if ino is not None:
+                    events = ino.read(timeout=self.poll_interval, wake_fd=self._wake_r)
+                    if events and not any(e.name == name for e in events):
+                        continue
+                elif self._stop.wait(self.poll_interval):
+                    break
+                if self._stop.is_set():
+                    break
+                try:
+                    self.reload()
+                except Exception as e:
+                    logger.error(f"Config reload failed: {e}")
+        finally:
+            if ino is not None:
+                ino.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "version": self._snapshot.version,
+            "source": self._snapshot.source,
+            "etag": self._snapshot.etag(),
+            "dirty": self.dirty,
+            "reloads": self.reloads,
+            "watching": self._thread is not None,
+            "last_error": self.last_error,
+        }
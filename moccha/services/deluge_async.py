@@ -0,0 +1,336 @@
+"""Deluge RPC client berbasis asyncio dengan pipelining request."""
+
+import ssl
+import zlib
+import struct
+import asyncio
+import logging
+import itertools
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from deluge_client import rencode
+from deluge_client.client import RemoteException
+
+logger = logging.getLogger(__name__)
+
+# Deluge 2.x: header = versi protokol (1 byte) + panjang body (uint32)
+PROTOCOL_VERSION = 1
+_HEADER = struct.Struct("!BI")
+
+RPC_RESPONSE = 1
+RPC_ERROR = 2
+RPC_EVENT = 3
+
+# Request per frame; frame lain langsung dikirim tanpa menunggu balasan
+FRAME_REQUESTS = 100
+
+Call = Tuple[str, tuple, Dict[str, Any]]
+
+
+class RequestNotSent(ConnectionError):
+    """Gagal sebelum ada request yang terkirim: aman dikirim ulang lewat jalur lain."""
+
+
+def _text(value: Any) -> str:
+    return value.decode("utf-8", "replace") if isinstance(value, bytes) else str(value)
+
+
+class AsyncDelugeClient:
+    """
+    Implementasi wire protocol Deluge 2.x (TLS + zlib + rencode).
+
+    Setiap request punya ID; reader task mencocokkan balasan dengan
+    future-nya, jadi banyak request bisa in-flight di satu koneksi.
+    `call_many()` menulis semua request sekaligus (dikelompokkan per
+    frame) lalu menunggu semua balasan: N call ≈ satu round trip.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        decode_utf8: bool = True,
+        timeout: float = 20.0,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.decode_utf8 = decode_utf8
+        self.timeout = timeout
+
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._read_task: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self.connected = False
+
+    # ─────────────────────────────────────────────
+    # Koneksi
+    # ─────────────────────────────────────────────
+
+    async def connect(self) -> None:
+        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        ctx.check_hostname = False
+        ctx.verify_mode = ssl.CERT_NONE
+
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=ctx),
+            self.timeout,
+        )
+        self._read_task = asyncio.ensure_future(self._read_loop())
+        self.connected = True
+        try:
+            await self.call(
+                'daemon.login', self.username, self.password,
+                client_version='moccha',
+            )
+        except Exception:
+            await self.close()
+            raise
+
+    async def close(self) -> None:
+        self.connected = False
+        if self._read_task:
+            self._read_task.cancel()
+            self._read_task = None
+        if self._writer:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except Exception:
+                pass
+            self._writer = None
+        self._fail_all(ConnectionError("Deluge connection closed"))
+
+    def _fail_all(self, exc: Exception) -> None:
+        self.connected = False
+        pending, self._pending = self._pending, {}
+        for fut in pending.values():
+            if not fut.done():
+                fut.set_exception(exc)
+
+    # ─────────────────────────────────────────────
+    # Request
+    # ─────────────────────────────────────────────
+
+    def _submit(self, calls: Iterable[Call]) -> List[asyncio.Future]:
+        if not self.connected:
+            raise RequestNotSent("Not connected to Deluge")
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        frame = []
+
+        def flush():
+            body = zlib.compress(rencode.dumps(tuple(frame)))
+            self._writer.write(_HEADER.pack(PROTOCOL_VERSION, len(body)) + body)
+            frame.clear()
+
+        for method, args, kwargs in calls:
+            rid = next(self._ids)
+            fut = loop.create_future()
+            self._pending[rid] = fut
+            futures.append(fut)
+            frame.append((rid, method, tuple(args), dict(kwargs)))
+            if len(frame) >= FRAME_REQUESTS:
+                flush()
+        if frame:
+            flush()
+        return futures
+
+    async def _wait(self, futures: List[asyncio.Future], return_exceptions: bool):
+        try:
+            return await asyncio.wait_for(
+                asyncio.gather(*futures, return_exceptions=return_exceptions),
+                self.timeout,
+            )
+        except BaseException:
+            # Timeout/cancel: jangan tinggalkan future yatim di _pending
+            mine = {id(f) for f in futures}
+            for rid in [r for r, f in self._pending.items() if id(f) in mine]:
+                del self._pending[rid]
+            raise
+
+    async def call(self, method: str, *args, **kwargs) -> Any:
+        futures = self._submit([(method, args, kwargs)])
+        await self._writer.drain()
+        return (await self._wait(futures, False))[0]
+
+    async def call_many(self, calls: List[Call]) -> List[Any]:
+        """
+        Hasil per call, urut sesuai input; error dikembalikan sebagai
+        Exception. Timeout juga per call: balasan yang sudah datang tetap
+        dipakai, sisanya `TimeoutError` (request mungkin sudah dieksekusi
+        daemon, jadi jangan dikirim ulang).
+        """
+        if not calls:
+            return []
+        futures = self._submit(calls)
+        try:
+            await self._writer.drain()
+            await asyncio.wait(futures, timeout=self.timeout)
+        finally:
+            mine = {id(f) for f in futures if not f.done()}
+            for rid in [r for r, f in self._pending.items() if id(f) in mine]:
+                del self._pending[rid]
+
+        results: List[Any] = []
+        for fut in futures:
+            if not fut.done():
+                fut.cancel()
+                results.append(TimeoutError(
+                    f"No reply from Deluge within {self.timeout:g}s"
+                ))
+            else:
+                results.append(fut.exception() or fut.result())
+        return results
+
+    # ─────────────────────────────────────────────
+    # Reader
+    # ─────────────────────────────────────────────
+
+    async def _read_loop(self) -> None:
+        try:
+            while True:
+                header = await self._reader.readexactly(_HEADER.size)
+                version, length = _HEADER.unpack(header)
+                if version != PROTOCOL_VERSION:
+                    raise ConnectionError(
+                        f"Unsupported Deluge protocol version {version}"
+                    )
+                body = await self._reader.readexactly(length)
+                message = rencode.loads(
+                    zlib.decompress(body), decode_utf8=self.decode_utf8
+                )
+                self._dispatch(message)
+
+        except asyncio.CancelledError:
+            raise
+        except (asyncio.IncompleteReadError, ConnectionError, OSError, zlib.error) as e:
+            logger.warning(f"Async Deluge connection lost: {e}")
+            self._fail_all(ConnectionError(f"Deluge connection lost: {e}"))
+            self._drop_transport()
+        except Exception as e:
+            logger.error(f"Async Deluge reader failed: {e}")
+            self._fail_all(ConnectionError(str(e)))
+            self._drop_transport()
+
+    def _drop_transport(self) -> None:
+        """✅ FIX: Tutup socket/TLS transport saat reader berhenti karena error."""
+        self._read_task = None
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+    def _dispatch(self, message: Any) -> None:
+        kind = message[0]
+        if kind == RPC_EVENT:
+            return
+
+        fut = self._pending.pop(message[1], None)
+        if fut is None or fut.done():
+            return
+
+        if kind == RPC_RESPONSE:
+            fut.set_result(message[2])
+        elif kind == RPC_ERROR:
+            # (2, id, exc_type, exc_args, exc_kwargs, traceback)
+            exc_type = _text(message[2])
+            args = message[3] if isinstance(message[3], (list, tuple)) else [message[3]]
+            text = ", ".join(_text(a) for a in args)
+            trace = _text(message[-1]) if len(message) > 4 else ""
+            fut.set_exception(
+                type(exc_type, (RemoteException,), {})(f"{text}\n{trace}")
+            )
+
+
+class AsyncDelugeBridge:
+    """
+    Menjalankan AsyncDelugeClient di event loop thread sendiri dengan
+    API sinkron, supaya bisa dipakai dari request thread Flask.
+    Koneksi dibuat lazy dan dibuat ulang otomatis setelah putus.
+    """
+
+    def __init__(self, factory: Callable[[], AsyncDelugeClient], timeout: float = 30.0):
+        self._factory = factory
+        self.timeout = timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[AsyncDelugeClient] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="deluge-async", daemon=True
+                )
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def _run(self, coro) -> Any:
+        future = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        return future.result(self.timeout)
+
+    async def _get_client(self) -> AsyncDelugeClient:
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._client is None or not self._client.connected:
+                stale, self._client = self._client, None
+                if stale is not None:
+                    await stale.close()
+                client = self._factory()
+                await client.connect()
+                self._client = client
+            return self._client
+
+    def call(self, method: str, *args, **kwargs) -> Any:
+        async def run():
+            client = await self._get_client()
+            return await client.call(method, *args, **kwargs)
+        return self._run(run())
+
+    def call_many(self, calls: List[Call]) -> List[Any]:
+        """
+        Raise `RequestNotSent` jika gagal sebelum request terkirim
+        (connect/login); error lain berarti sebagian call mungkin sudah
+        dieksekusi daemon.
+        """
+        async def run():
+            try:
+                client = await self._get_client()
+            except Exception as e:
+                raise RequestNotSent(f"Cannot connect to Deluge: {e}") from e
+            return await client.call_many(calls)
+        return self._run(run())
+
+    def close(self) -> None:
+        with self._lock:
+            loop, self._loop = self._loop, None
+            thread, self._thread = self._thread, None
+        if loop is None:
+            return
+
+        client, self._client = self._client, None
+        if client:
+            try:
+                asyncio.run_coroutine_threadsafe(client.close(), loop).result(5)
+            except Exception:
+                pass
+        loop.call_soon_threadsafe(loop.stop)
+        if thread:
+            thread.join(timeout=5)
+        loop.close()
+        self._connect_lock = None
@@ -0,0 +1,115 @@
+"""Decode hasil RPC deluge_client (bytes → str) dengan alokasi minimal."""
+
+import inspect
+import logging
+from typing import Any, Dict, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+_CONTAINERS = (dict, list, tuple)
+
+
+def client_supports_decode_utf8(client_class: Any) -> bool:
+    """
+    True jika `DelugeRPCClient` menerima `decode_utf8=True`.
+
+    Dengan opsi itu rencode langsung menghasilkan str saat parsing
+    response, jadi decode di Python tidak perlu menyentuh apa pun.
+    """
+    try:
+        params = inspect.signature(client_class.__init__).parameters
+    except (TypeError, ValueError):
+        return False
+    return "decode_utf8" in params
+
+
+def _text(value: bytes) -> str:
+    return value.decode('utf-8', errors='replace')
+
+
+def decode(value: Any) -> Any:
+    """
+    Decode bytes → str di seluruh struktur, tanpa rekursi.
+
+    Berbeda dengan decoder lama yang membangun ulang setiap dict/list,
+    fungsi ini mengubah container *in place*:
+    - list: elemen bytes diganti di tempat
+    - tuple: dikonversi ke list (sekali), lalu sama seperti list
+    - dict: hanya dibangun ulang jika ada key bytes; value di-update
+      di tempat
+
+    Struktur yang sudah berisi str (client dengan `decode_utf8=True`)
+    hanya di-scan sekali tanpa alokasi. Input dianggap milik pemanggil
+    (hasil RPC segar) dan boleh dimutasi.
+    """
+    if isinstance(value, bytes):
+        return _text(value)
+    if not isinstance(value, _CONTAINERS):
+        return value
+
+    root = [value]
+    stack = [(root, 0)]
+    pop = stack.pop
+    push = stack.append
+
+    while stack:
+        parent, slot = pop()
+        node = parent[slot]
+
+        if isinstance(node, dict):
+            for k in node:
+                if isinstance(k, bytes):
+                    node = {
+                        (_text(k) if isinstance(k, bytes) else k): v
+                        for k, v in node.items()
+                    }
+                    parent[slot] = node
+                    break
+
+            for k, v in node.items():
+                if isinstance(v, bytes):
+                    node[k] = _text(v)
+                elif isinstance(v, _CONTAINERS):
+                    push((node, k))
+
+        else:
+            if isinstance(node, tuple):
+                node = list(node)
+                parent[slot] = node
+
+            for i, v in enumerate(node):
+                if isinstance(v, bytes):
+                    node[i] = _text(v)
+                elif isinstance(v, _CONTAINERS):
+                    push((node, i))
+
+    return root[0]
+
+
+def decode_rows(
+    raw: Dict[Any, Dict[Any, Any]], keys: Iterable[str]
+) -> List[Dict[str, Any]]:
+    """
+    Decode hasil `core.get_torrents_status` hanya untuk `keys`.
+
+    Field lain di response (mis. dari plugin) tidak disentuh sama
+    sekali. Setiap row mendapat `id`.
+    """
+    pairs = [(k, k.encode()) for k in keys]
+    rows = []
+
+    for raw_id, info in raw.items():
+        row = {}
+        for key, bkey in pairs:
+            v = info.get(key)
+            if v is None:
+                v = info.get(bkey)
+            if isinstance(v, bytes):
+                v = _text(v)
+            elif isinstance(v, _CONTAINERS):
+                v = decode(v)
+            row[key] = v
+        row['id'] = _text(raw_id) if isinstance(raw_id, bytes) else raw_id
+        rows.append(row)
+
+    return rows
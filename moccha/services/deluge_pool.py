@@ -0,0 +1,319 @@
+"""Connection pool untuk Deluge RPC - satu koneksi per request thread."""
+
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out in time."""
+
+
+# RPC tanpa efek samping: aman dikirim ulang walau request pertama
+# mungkin sudah sampai ke daemon sebelum transport-nya gagal
+_READ_PREFIXES = ("daemon.info", "daemon.get_", "core.get_")
+
+
+def is_read_method(method: str) -> bool:
+    return method.startswith(_READ_PREFIXES)
+
+
+class PooledConnection:
+    """One authenticated RPC client plus its health bookkeeping."""
+
+    def __init__(self, client: Any, generation: int):
+        self.client = client
+        self.generation = generation
+        self.created = time.monotonic()
+        self.last_used = self.created
+        self.last_ok = self.created
+        self.calls = 0
+        self.failures = 0
+        self.healthy = True
+
+    def mark_ok(self) -> None:
+        now = time.monotonic()
+        self.last_used = now
+        self.last_ok = now
+        self.calls += 1
+        self.failures = 0
+        self.healthy = True
+
+    def mark_failed(self) -> None:
+        self.last_used = time.monotonic()
+        self.failures += 1
+        self.healthy = False
+
+    def close(self) -> None:
+        try:
+            self.client.disconnect()
+        except Exception:
+            pass
+
+    def to_dict(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "healthy": self.healthy,
+            "calls": self.calls,
+            "failures": self.failures,
+            "age": round(now - self.created, 1),
+            "idle": round(now - self.last_used, 1),
+        }
+
+
+class DelugeConnectionPool:
+    """
+    Bounded pool of authenticated Deluge RPC connections.
+
+    `DelugeRPCClient` tidak thread-safe, jadi setiap thread meminjam
+    koneksinya sendiri lewat `connection()` dan mengembalikannya setelah
+    selesai. Koneksi dibuat lazy sampai `size`, lalu thread berikutnya
+    menunggu sampai ada yang dikembalikan.
+
+    Args:
+        factory:       Callable yang membuat client baru (belum connect).
+        size:          Jumlah maksimum koneksi terbuka.
+        timeout:       Detik menunggu checkout sebelum `PoolTimeout`.
+        remote_errors: Exception yang berasal dari daemon (koneksi tetap
+                       sehat). Exception lain dianggap koneksi rusak.
+        retryable:     fn(method) → True jika call boleh diulang setelah
+                       request mungkin sudah terkirim (default: read-only).
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        size: int = 4,
+        timeout: float = 10.0,
+        remote_errors: Tuple[type, ...] = (),
+        retryable: Callable[[str], bool] = is_read_method,
+    ):
+        self._factory = factory
+        self.size = max(1, int(size))
+        self.timeout = float(timeout)
+        self.remote_errors = tuple(remote_errors)
+        self.retryable = retryable
+
+        self._cond = threading.Condition()
+        self._idle: List[PooledConnection] = []
+        self._open = 0
+        self._generation = 0
+
+        # Health pool secara keseluruhan
+        self.last_ok = 0.0
+        self.last_error: Optional[str] = None
+
+        self._heartbeat_thread: Optional[threading.Thread] = None
+        self._heartbeat_stop = threading.Event()
+
+    # ─────────────────────────────────────────────
+    # Checkout / Checkin
+    # ─────────────────────────────────────────────
+
+    def _create(self, generation: int) -> PooledConnection:
+        client = self._factory()
+        client.connect()
+        return PooledConnection(client, generation)
+
+    def checkout(self, timeout: Optional[float] = None) -> PooledConnection:
+        """
+        Ambil koneksi idle, buat baru, atau tunggu yang dikembalikan.
+
+        Koneksi idle dipercaya tanpa liveness RPC: kalau ternyata mati,
+        call pertama yang gagal yang akan memicu reconnect (lihat `call`).
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        with self._cond:
+            while not self._idle and self._open >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(
+                        f"No Deluge connection available after {timeout}s "
+                        f"(pool size {self.size})"
+                    )
+                self._cond.wait(remaining)
+
+            if self._idle:
+                return self._idle.pop()
+            self._open += 1
+            generation = self._generation
+
+        try:
+            return self._create(generation)
+        except Exception as e:
+            self.last_error = str(e)
+            self._release_slot()
+            raise
+
+    def checkin(self, conn: PooledConnection, broken: bool = False) -> None:
+        """Kembalikan koneksi ke pool, atau tutup jika rusak/usang."""
+        with self._cond:
+            if not broken and conn.generation == self._generation:
+                self._idle.append(conn)
+                self._cond.notify()
+                return
+
+        conn.close()
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        with self._cond:
+            self._open = max(0, self._open - 1)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """
+        Context manager: pinjam client selama blok `with`.
+
+            with pool.connection() as client:
+                client.call('core.get_session_status', keys)
+        """
+        conn = self.checkout(timeout)
+        broken = False
+        try:
+            yield conn.client
+            self._mark_ok(conn)
+        except Exception as e:
+            if self.is_remote_error(e):
+                # Error dari daemon, transport-nya masih sehat
+                self._mark_ok(conn)
+            else:
+                conn.mark_failed()
+                self.last_error = str(e)
+                broken = True
+            raise
+        finally:
+            self.checkin(conn, broken=broken)
+
+    def call(self, method: str, *args, **kwargs) -> Any:
+        """
+        Satu RPC = satu round trip. Jika transport gagal (koneksi basi,
+        daemon restart), koneksi dibuang dan call diulang sekali dengan
+        koneksi baru - reconnect hanya terjadi saat call nyata gagal.
+
+        ✅ FIX: Call yang sudah dikirim hanya diulang jika `retryable`
+        (read-only): add/remove/shutdown yang timeout setelah sampai di
+        daemon tidak boleh dieksekusi dua kali. Gagal connect (request
+        belum terkirim) selalu boleh diulang.
+        """
+        for attempt in (1, 2):
+            sent = False
+            try:
+                with self.connection() as client:
+                    sent = True
+                    return client.call(method, *args, **kwargs)
+            except PoolTimeout:
+                raise
+            except Exception as e:
+                if (
+                    attempt == 2
+                    or self.is_remote_error(e)
+                    or (sent and not self.retryable(method))
+                ):
+                    raise
+                logger.debug(f"RPC {method} failed on pooled connection: {e}")
+
+    def is_remote_error(self, exc: BaseException) -> bool:
+        return bool(self.remote_errors) and isinstance(exc, self.remote_errors)
+
+    def _mark_ok(self, conn: PooledConnection) -> None:
+        conn.mark_ok()
+        self.last_ok = conn.last_ok
+        self.last_error = None
+
+    def is_healthy(self, max_age: float) -> bool:
+        """True jika ada call sukses dalam `max_age` detik terakhir."""
+        return (
+            self.last_ok > 0
+            and time.monotonic() - self.last_ok <= max_age
+        )
+
+    # ─────────────────────────────────────────────
+    # Heartbeat (optional)
+    # ─────────────────────────────────────────────
+
+    def start_heartbeat(self, interval: float) -> None:
+        """
+        Background ping untuk koneksi idle yang lama tidak dipakai,
+        supaya koneksi mati terdeteksi di luar hot path.
+        """
+        if interval <= 0 or self._heartbeat_thread:
+            return
+
+        self._heartbeat_stop.clear()
+        self._heartbeat_thread = threading.Thread(
+            target=self._heartbeat_loop,
+            args=(float(interval),),
+            name="deluge-heartbeat",
+            daemon=True,
+        )
+        self._heartbeat_thread.start()
+
+    def stop_heartbeat(self) -> None:
+        thread = self._heartbeat_thread
+        if not thread:
+            return
+        self._heartbeat_stop.set()
+        thread.join(timeout=5)
+        self._heartbeat_thread = None
+
+    def _heartbeat_loop(self, interval: float) -> None:
+        while not self._heartbeat_stop.wait(interval):
+            now = time.monotonic()
+            with self._cond:
+                due = [c for c in self._idle if now - c.last_ok >= interval]
+                self._idle = [c for c in self._idle if c not in due]
+
+            for conn in due:
+                try:
+                    conn.client.call('daemon.info')
+                    self._mark_ok(conn)
+                    self.checkin(conn)
+                except Exception as e:
+                    logger.debug(f"Heartbeat: dropping dead connection: {e}")
+                    conn.mark_failed()
+                    self.last_error = str(e)
+                    self.checkin(conn, broken=True)
+
+    # ─────────────────────────────────────────────
+    # Lifecycle
+    # ─────────────────────────────────────────────
+
+    def clear(self) -> None:
+        """
+        Tutup semua koneksi idle. Koneksi yang sedang dipinjam akan
+        ditutup saat dikembalikan (generation berbeda).
+        """
+        with self._cond:
+            self._generation += 1
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._cond.notify_all()
+
+        for conn in idle:
+            conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            idle = [c.to_dict() for c in self._idle]
+            open_count = self._open
+        return {
+            "size": self.size,
+            "last_ok_age": (
+                round(time.monotonic() - self.last_ok, 1)
+                if self.last_ok else None
+            ),
+            "last_error": self.last_error,
+            "heartbeat": self._heartbeat_thread is not None,
+            "open": open_count,
+            "idle": len(idle),
+            "in_use": open_count - len(idle),
+            "connections": idle,
+        }
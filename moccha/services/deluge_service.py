@@ -4,24 +4,71 @@ import os
 import sys
 import time
 import json
-import base64
+import shutil
+import socket
 import logging
 import subprocess
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 
 try:
     from deluge_client import DelugeRPCClient
+    from deluge_client.client import RemoteException
 except ImportError:
     raise ImportError("deluge-client not installed. Run: pip install deluge-client")
 
+from .deluge_async import AsyncDelugeBridge, AsyncDelugeClient, RequestNotSent
+from .deluge_codec import client_supports_decode_utf8, decode, decode_rows
+from .deluge_pool import DelugeConnectionPool
+from .ingest_queue import IngestQueue, classify
+from .magnet_metadata import MagnetPrefetcher, decode_prefetch
+from .stats_history import StatsHistory, StatsSampler
+from . import torrent_upload
+from .torrent_cache import (
+    TorrentStateCache, CACHE_FIELDS, SESSION_KEYS
+)
+from .torrent_events import TorrentEventHub
+from .torrent_files import (
+    FILE_DEFAULT_FIELDS, LIVE_FILE_FIELDS, PEER_FIELDS, PREFIX_KEYS,
+    PRIORITY_MAX, PRIORITY_NORMAL, PRIORITY_SKIP, TRACKER_FIELDS,
+    FileIndex, FileIndexCache, FileMatch, FileSelection, PageQuery,
+)
+from .torrent_query import TorrentQuery
+from .torrent_stream import TorrentFileStream, resolve_path
+from .torrent_rates import DERIVED_FIELDS, TorrentRateHistory
+from .watch_folder import WatchFolder
+
 logger = logging.getLogger(__name__)
 
+# rencode decode UTF-8 saat parsing; decode() di Python jadi hampir no-op
+_DECODE_UTF8 = client_supports_decode_utf8(DelugeRPCClient)
+
+# Hasil cek instalasi deluged (path binary), sekali per proses
+_DELUGED_PATH: Optional[str] = None
+
+
+def _backoff(start: float = 0.01, factor: float = 2.0, cap: float = 0.5):
+    """Delay exponential: 10 ms, 20 ms, 40 ms, ... maks `cap` detik."""
+    delay = start
+    while True:
+        yield delay
+        delay = min(delay * factor, cap)
+
 
 class DelugeService:
     """Service for managing Deluge daemon and torrents."""
 
+    # Key config yang bisa diubah tanpa restart deluged (apply_config);
+    # key lain (host, port, auth, pool, watch, ...) butuh instance baru
+    LIVE_CONFIG_KEYS = frozenset({
+        "max_download_speed", "max_upload_speed",
+        "download_path", "move_existing_on_path_change",
+        "stream_wait_timeout", "stream_poll_interval",
+        "upload_batch_size", "upload_batch_bytes", "cache_wait",
+    })
+
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.host = config.get("host", "127.0.0.1")
@@ -45,7 +92,104 @@ class DelugeService:
         if self.auto_add_folder:
             os.makedirs(self.auto_add_folder, exist_ok=True)
 
-        self._client = None
+        # Pool koneksi RPC: tiap request thread pinjam koneksinya sendiri
+        self._pool = DelugeConnectionPool(
+            self._new_client,
+            size=config.get("pool_size", 4),
+            timeout=config.get("pool_timeout", 10),
+            remote_errors=(RemoteException,),
+        )
+        # Detik; 0 = tanpa heartbeat, koneksi mati dideteksi saat dipakai
+        self.heartbeat_interval = config.get("heartbeat_interval", 0)
+        self._version: Optional[str] = None
+
+        # Opsional: client asyncio untuk fan-out (banyak RPC in-flight
+        # di satu koneksi); tanpa ini fan-out jalan paralel di pool
+        self._async: Optional[AsyncDelugeBridge] = None
+        if config.get("async_rpc", False):
+            self._async = AsyncDelugeBridge(
+                self._new_async_client,
+                timeout=config.get("async_rpc_timeout", 60),
+            )
+
+        # Cache state torrent, di-refresh satu thread untuk semua client
+        self.cache_enabled = config.get("cache_enabled", True)
+        self.cache_wait = config.get("cache_wait", 5)
+        self._cache = TorrentStateCache(
+            self._new_client,
+            self._decode,
+            fast_interval=config.get("cache_fast_interval", 1),
+            idle_interval=config.get("cache_idle_interval", 10),
+            remote_errors=(RemoteException,),
+        )
+        # SSE: semua viewer di-feed dari refresh cache yang sama
+        self._events = TorrentEventHub(self._cache)
+
+        # Rate history per torrent → rate_avg_5m / eta_smoothed
+        self._rates = TorrentRateHistory(self._cache)
+        self._cache.add_listener(self._rates.on_refresh)
+
+        # Index file per torrent (path tidak berubah setelah metadata ada)
+        self._files = FileIndexCache(config.get("file_index_size", 32))
+        self._cache.add_listener(self._files.on_refresh)
+
+        # Riwayat session stats (ring buffer, memori tetap)
+        self._history = StatsHistory()
+        self._sampler: Optional[StatsSampler] = None
+        if config.get("stats_history", True):
+            self._sampler = StatsSampler(
+                self._history,
+                self._sample_stats,
+                interval=config.get("stats_sample_interval", 1),
+            )
+
+        # Bulk add queue (journal di workspace, resume setelah restart)
+        self._ingest = IngestQueue(
+            config.get("ingest_journal")
+            or os.path.join(self.config_dir, "ingest.jsonl"),
+            submit=self._ingest_submit,
+            known=lambda infohash: self._cache.get(infohash) is not None,
+            pending_metadata=self._pending_metadata_count,
+            workers=config.get("ingest_workers", 4),
+            rate=config.get("ingest_rate", 5),
+            max_attempts=config.get("ingest_max_attempts", 3),
+            max_pending_metadata=config.get("ingest_max_pending_metadata", 20),
+            keep_finished=config.get("ingest_keep_finished", 1000),
+            finished_ttl=config.get("ingest_finished_ttl", 24 * 3600),
+        )
+
+        # Magnet metadata-first: prefetch metadata, add hanya file terpilih
+        self._magnets = MagnetPrefetcher(
+            self._prefetch_magnet,
+            self._add_prefetched,
+            known=lambda tid: self._cache.get(tid) is not None,
+            timeout=config.get("magnet_metadata_timeout", 60),
+            workers=config.get("magnet_prefetch_workers", 4),
+        )
+
+        # Range serving file yang masih di-download (tunggu piece)
+        self.stream_wait_timeout = config.get("stream_wait_timeout", 300)
+        self.stream_poll_interval = config.get("stream_poll_interval", 0.5)
+
+        # Upload .torrent: spool ke disk, add dalam batch berukuran terbatas
+        self.spool_dir = config.get("spool_dir") or os.path.join(
+            self.config_dir, "spool"
+        )
+        self.upload_batch_size = config.get("upload_batch_size", 50)
+        self.upload_batch_bytes = config.get("upload_batch_bytes", 8 << 20)
+        self._batch_add_supported: Optional[bool] = None
+
+        # Watch folder: .torrent/.magnet di auto_add_folder → add batch
+        self._watch: Optional[WatchFolder] = None
+        if self.auto_add_folder and config.get("watch_enabled", True):
+            self._watch = WatchFolder(
+                self.auto_add_folder,
+                self._watch_ingest,
+                debounce=config.get("watch_debounce", 1.0),
+                batch_size=config.get("watch_batch_size", 200),
+                poll_interval=config.get("watch_poll_interval", 5),
+            )
+
         self.daemon_process = None
         self._is_running = False
 
@@ -102,104 +246,173 @@ class DelugeService:
     # Connection Management
     # ─────────────────────────────────────────────
 
-    def _connect(self) -> bool:
-        """✅ FIX: Connect dengan proper error handling dan reconnect."""
-        # Cek apakah connection masih hidup
-        if self._client:
+    def _new_client(self, **kwargs) -> DelugeRPCClient:
+        """
+        Factory untuk pool: client baru, belum connect. Reconnect/retry
+        bawaan deluge_client dimatikan; keputusan retry ada di pool.
+        """
+        kwargs.setdefault("automatic_reconnect", False)
+        if _DECODE_UTF8:
+            kwargs.setdefault("decode_utf8", True)
+        return DelugeRPCClient(
+            self.host,
+            self.daemon_port,
+            self.username,
+            self.password,
+            **kwargs
+        )
+
+    def _new_async_client(self) -> AsyncDelugeClient:
+        return AsyncDelugeClient(
+            self.host,
+            self.daemon_port,
+            self.username,
+            self.password,
+            decode_utf8=True,
+        )
+
+    def _call_many(self, calls: List[tuple]) -> List[Any]:
+        """
+        Banyak RPC `(method, args, kwargs)` sekaligus; hasil urut sesuai
+        input, error per call dikembalikan sebagai Exception.
+
+        Dengan `async_rpc` semua request dipipeline di satu koneksi
+        (≈ satu round trip); tanpa `async_rpc`, atau jika koneksi async
+        gagal sebelum ada request terkirim, call dibagi ke koneksi pool
+        secara paralel.
+        """
+        if not calls:
+            return []
+
+        if self._async:
             try:
-                # Test connection
-                self._client.call('daemon.info')
-                return True
-            except Exception:
-                # Connection stale, reconnect
-                logger.debug("Stale connection, reconnecting...")
-                try:
-                    self._client.disconnect()
-                except:
-                    pass
-                self._client = None
+                return self._async.call_many(calls)
+            except RequestNotSent as e:
+                logger.warning(f"Async RPC unavailable, using pool: {e}")
+            except Exception as e:
+                # ✅ FIX: Request mungkin sudah sampai ke daemon (mis. timeout
+                # setelah add_torrent_file diterima) → jangan kirim ulang
+                logger.warning(f"Async RPC failed: {e}")
+                return [e] * len(calls)
 
-        # Buat koneksi baru
-        max_retries = 3
-        for attempt in range(1, max_retries + 1):
+        def run(call):
+            method, args, kwargs = call
             try:
-                self._client = DelugeRPCClient(
-                    self.host,
-                    self.daemon_port,
-                    self.username,
-                    self.password
-                )
-                self._client.connect()
+                return self._call(method, *args, **kwargs)
+            except Exception as e:
+                return e
+
+        workers = min(self._pool.size, len(calls))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(run, calls))
 
-                # Verify connection
-                version = self._client.call('daemon.info')
-                v = version.decode() if isinstance(version, bytes) else version
-                logger.info(f"Connected to Deluge {v}")
+    def _call(self, method: str, *args, **kwargs) -> Any:
+        """
+        Satu RPC lewat pool. Tidak ada liveness check sebelumnya:
+        pool reconnect sendiri kalau call ini gagal di transport.
+        """
+        return self._pool.call(method, *args, **kwargs)
+
+    def _connect(self, attempts: int = 3) -> bool:
+        """
+        ✅ FIX: Verifikasi daemon bisa dihubungi (dipakai saat start).
+        Versi daemon disimpan supaya get_status() tidak perlu
+        `daemon.info` lagi. Retry dengan backoff pendek, bukan sleep 2 s.
+        """
+        delays = _backoff(start=0.05)
+        for attempt in range(1, attempts + 1):
+            try:
+                version = self._call('daemon.info')
+                self._version = self._decode(version)
+                logger.info(f"Connected to Deluge {self._version}")
                 return True
 
             except Exception as e:
                 logger.warning(
-                    f"Connection attempt {attempt}/{max_retries} failed: {e}"
+                    f"Connection attempt {attempt}/{attempts} failed: {e}"
                 )
-                self._client = None
-                if attempt < max_retries:
-                    time.sleep(2)
+                if attempt < attempts:
+                    time.sleep(next(delays))
 
         return False
 
-    def _disconnect(self) -> None:
-        """Disconnect from Deluge daemon."""
+    def _port_open(self, timeout: float = 0.2) -> bool:
+        """TCP connect ke port daemon (tanpa TLS/login)."""
         try:
-            if self._client:
-                self._client.disconnect()
-        except:
-            pass
-        finally:
-            self._client = None
+            with socket.create_connection((self.host, self.daemon_port), timeout=timeout):
+                return True
+        except OSError:
+            return False
+
+    def _wait_port(self, open_: bool, timeout: float) -> bool:
+        """Probe port dengan backoff sampai statusnya `open_`."""
+        deadline = time.monotonic() + timeout
+        delays = _backoff()
+        while True:
+            if self._port_open() == open_:
+                return True
+            if open_ and self.daemon_process and self.daemon_process.poll() is not None:
+                return False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(next(delays), remaining))
+
+    def _disconnect(self) -> None:
+        """Disconnect from Deluge daemon (tutup semua koneksi pool)."""
+        if self._watch:
+            self._watch.stop()
+        if self._sampler:
+            self._sampler.stop()
+        self._ingest.stop()
+        self._magnets.stop()
+        self._cache.stop()
+        self._rates.reset()
+        self._files.invalidate()
+        self._pool.stop_heartbeat()
+        if self._async:
+            self._async.close()
+        self._pool.clear()
 
     def _ensure_connected(self) -> bool:
-        """Helper: pastikan terhubung, return False jika gagal."""
-        if not self._is_running:
+        """Helper: pastikan daemon jalan, return False jika tidak."""
+        return self._is_running
+
+    def _cache_ready(self) -> bool:
+        """True jika request boleh dilayani dari TorrentStateCache."""
+        if not self.cache_enabled:
             return False
-        return self._connect()
+        if not self._cache.running:
+            self._cache.start()
+        if self._cache.last_error:
+            # Refresher sedang gagal: jangan tahan request, fallback ke RPC
+            return self._cache.wait_ready(0)
+        return self._cache.wait_ready(self.cache_wait)
 
     # ─────────────────────────────────────────────
     # Helper: Decode bytes dari deluge_client
     # ─────────────────────────────────────────────
 
-    @staticmethod
-    def _decode(value):
-        """
-        ✅ FIX: deluge_client mengembalikan bytes untuk keys dan values.
-        Fungsi ini decode secara recursive.
-        """
-        if isinstance(value, bytes):
-            return value.decode('utf-8', errors='replace')
-        elif isinstance(value, dict):
-            return {
-                DelugeService._decode(k): DelugeService._decode(v)
-                for k, v in value.items()
-            }
-        elif isinstance(value, (list, tuple)):
-            return [DelugeService._decode(item) for item in value]
-        return value
+    # ✅ FIX: deluge_client mengembalikan bytes untuk keys dan values
+    # (kecuali client mendukung decode_utf8). Lihat deluge_codec.decode.
+    _decode = staticmethod(decode)
 
     # ─────────────────────────────────────────────
     # Daemon Start / Stop
     # ─────────────────────────────────────────────
 
     def _install_deluge(self) -> bool:
-        """Install Deluge jika belum ada."""
-        try:
-            result = subprocess.run(
-                ["deluged", "--version"],
-                capture_output=True, text=True
-            )
-            if result.returncode == 0:
-                logger.info(f"Deluge already installed: {result.stdout.strip()}")
-                return True
-        except FileNotFoundError:
-            pass
+        """Install Deluge jika belum ada (hasil cek di-cache per proses)."""
+        global _DELUGED_PATH
+        if _DELUGED_PATH and os.path.exists(_DELUGED_PATH):
+            return True
+
+        # ✅ which() cukup; `deluged --version` butuh ~1 s start Python
+        path = shutil.which("deluged")
+        if path:
+            _DELUGED_PATH = path
+            logger.info(f"Deluge already installed: {path}")
+            return True
 
         logger.info("Installing Deluge...")
         try:
@@ -212,12 +425,57 @@ class DelugeService:
                  "deluged", "deluge-console", "python3-libtorrent"],
                 capture_output=True, check=True
             )
+            _DELUGED_PATH = shutil.which("deluged")
             logger.info("Deluge installed successfully")
-            return True
+            return bool(_DELUGED_PATH)
         except Exception as e:
             logger.error(f"Failed to install Deluge: {e}")
             return False
 
+    def _shutdown_daemon(self, timeout: float = 10.0) -> str:
+        """
+        Hentikan daemon yang sedang jalan: `daemon.shutdown` via RPC
+        dulu, signal hanya jika daemon tidak turun dalam `timeout`.
+        Return cara yang berhasil: none/rpc/terminate/kill.
+        """
+        proc = self.daemon_process
+        if not self._port_open() and not (proc and proc.poll() is None):
+            return "none"
+
+        try:
+            self._call('daemon.shutdown')
+        except Exception as e:
+            # RPC gagal (auth beda, daemon hang): jangan tunggu lama
+            logger.debug(f"daemon.shutdown: {e}")
+            timeout = min(timeout, 1.0)
+
+        if proc:
+            try:
+                proc.wait(timeout=timeout)
+                method = "rpc"
+            except subprocess.TimeoutExpired:
+                proc.terminate()
+                try:
+                    proc.wait(timeout=5)
+                    method = "terminate"
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+                    proc.wait(timeout=5)
+                    method = "kill"
+            # Port kadang masih ditahan sebentar setelah proses keluar
+            self._wait_port(False, 5)
+            return method
+
+        # Daemon yatim (bukan child kita): tunggu port tutup, lalu signal
+        if self._wait_port(False, timeout):
+            return "rpc"
+        subprocess.run(["killall", "deluged"], capture_output=True)
+        if self._wait_port(False, 5):
+            return "terminate"
+        subprocess.run(["killall", "-9", "deluged"], capture_output=True)
+        self._wait_port(False, 5)
+        return "kill"
+
     def start(self) -> Dict[str, Any]:
         """Start Deluge daemon."""
         if self._is_running and self._connect():
@@ -226,6 +484,15 @@ class DelugeService:
                 "message": "Deluge daemon already running"
             }
 
+        timing: Dict[str, float] = {}
+        mark = time.perf_counter()
+
+        def phase(name: str) -> None:
+            nonlocal mark
+            now = time.perf_counter()
+            timing[name] = round((now - mark) * 1000, 1)
+            mark = now
+
         try:
             # 1. Install jika perlu
             if not self._install_deluge():
@@ -233,15 +500,19 @@ class DelugeService:
                     "success": False,
                     "error": "Failed to install Deluge"
                 }
+            phase("install_check")
 
             # 2. Setup auth & config
             self._setup_auth()
             self._setup_config()
+            phase("setup")
 
-            # 3. Kill proses lama yang mungkin masih nyangkut
-            subprocess.run(["killall", "deluged"],
-                           capture_output=True)
-            time.sleep(2)
+            # 3. Hentikan daemon lama yang mungkin masih nyangkut
+            #    (graceful dulu; tanpa sleep tetap)
+            self._pool.clear()
+            self._shutdown_daemon()
+            self._pool.clear()
+            phase("cleanup")
 
             # ✅ FIX: Command yang benar untuk deluged
             # -d = do not daemonize (kita manage sendiri)
@@ -249,7 +520,7 @@ class DelugeService:
             # -p = pidfile, BUKAN port (port dari config)
             # -l = log file
             cmd = [
-                "deluged",
+                _DELUGED_PATH or "deluged",
                 "-d",                          # foreground mode
                 "-c", self.config_dir,         # config directory
                 "-l", "/tmp/deluged.log",      # log file
@@ -260,56 +531,66 @@ class DelugeService:
 
             self.daemon_process = subprocess.Popen(
                 cmd,
-                stdout=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
                 stderr=subprocess.PIPE
             )
+            phase("spawn")
 
-            # 4. Tunggu daemon ready
+            # 4. Tunggu daemon ready: probe TCP dengan backoff (ms),
+            #    baru RPC login setelah port terbuka
             logger.info("Waiting for daemon to start...")
-            connected = False
-            for i in range(10):
-                time.sleep(2)
-
-                # Cek proses masih hidup
-                if self.daemon_process.poll() is not None:
-                    _, stderr = self.daemon_process.communicate()
-                    err = stderr.decode() if stderr else "unknown error"
-                    logger.error(f"Daemon exited: {err}")
-
-                    # Cek log
-                    log_content = ""
-                    try:
-                        with open("/tmp/deluged.log") as f:
-                            log_content = f.read()[-500:]
-                    except:
-                        pass
-
-                    return {
-                        "success": False,
-                        "error": f"Daemon exited unexpectedly: {err}",
-                        "log": log_content
-                    }
-
-                # Coba connect
-                if self._connect():
-                    connected = True
-                    break
-
-                logger.debug(f"  Waiting... ({i+1}/10)")
-
-            if not connected:
+            port_ready = self._wait_port(True, timeout=30)
+            phase("port_ready")
+
+            if self.daemon_process.poll() is not None:
+                _, stderr = self.daemon_process.communicate()
+                err = stderr.decode() if stderr else "unknown error"
+                logger.error(f"Daemon exited: {err}")
+
+                # Cek log
+                log_content = ""
+                try:
+                    with open("/tmp/deluged.log") as f:
+                        log_content = f.read()[-500:]
+                except:
+                    pass
+
+                self.daemon_process = None
+                return {
+                    "success": False,
+                    "error": f"Daemon exited unexpectedly: {err}",
+                    "log": log_content,
+                    "timing_ms": timing,
+                }
+
+            if not port_ready or not self._connect(attempts=5):
                 # Kill dan report error
                 self.daemon_process.terminate()
                 self.daemon_process = None
                 return {
                     "success": False,
-                    "error": "Timeout: could not connect to daemon after 20s"
+                    "error": "Timeout: could not connect to daemon after 30s",
+                    "timing_ms": timing,
                 }
+            phase("rpc_ready")
 
             self._is_running = True
+            self._pool.start_heartbeat(self.heartbeat_interval)
+            if self.cache_enabled:
+                self._cache.start()
+            self._ingest.start()
+            if self._watch:
+                self._watch.start()
+            if self._sampler:
+                self._sampler.start()
+            phase("services")
 
             # 5. Configure settings via RPC
             self._apply_settings()
+            phase("settings")
+
+            timing["total"] = round(sum(timing.values()), 1)
+            logger.info(f"Deluge started in {timing['total']} ms: {timing}")
 
             return {
                 "success": True,
@@ -317,48 +598,51 @@ class DelugeService:
                 "pid": self.daemon_process.pid,
                 "host": self.host,
                 "port": self.daemon_port,
-                "download_path": self.download_path
+                "download_path": self.download_path,
+                "version": self._version,
+                "timing_ms": timing,
             }
 
         except Exception as e:
             logger.error(f"Failed to start Deluge: {e}")
-            return {"success": False, "error": str(e)}
+            return {"success": False, "error": str(e), "timing_ms": timing}
 
     def stop(self) -> Dict[str, Any]:
-        """Stop Deluge daemon."""
+        """Stop Deluge daemon (graceful `daemon.shutdown`, signal jika perlu)."""
+        started = time.perf_counter()
         try:
             self._disconnect()
-
-            if self.daemon_process:
-                self.daemon_process.terminate()
-                try:
-                    self.daemon_process.wait(timeout=10)
-                except subprocess.TimeoutExpired:
-                    self.daemon_process.kill()
-                self.daemon_process = None
-
-            # Juga kill semua proses deluged yang tersisa
-            subprocess.run(["killall", "deluged"], capture_output=True)
+            method = self._shutdown_daemon()
+            self.daemon_process = None
+            self._pool.clear()
 
             self._is_running = False
-            return {"success": True, "message": "Deluge daemon stopped"}
+            return {
+                "success": True,
+                "message": "Deluge daemon stopped",
+                "method": method,
+                "timing_ms": {"stop": round((time.perf_counter() - started) * 1000, 1)},
+            }
 
         except Exception as e:
             logger.error(f"Failed to stop Deluge: {e}")
             return {"success": False, "error": str(e)}
 
     def restart(self) -> Dict[str, Any]:
-        """Restart Deluge daemon."""
-        self.stop()
-        time.sleep(3)
-        return self.start()
+        """Restart Deluge daemon (stop sudah menunggu port tertutup)."""
+        stopped = self.stop()
+        result = self.start()
+        timing = dict(stopped.get("timing_ms") or {})
+        timing.update(result.get("timing_ms") or {})
+        if "total" in timing:
+            timing["total"] = round(timing["total"] + timing.get("stop", 0), 1)
+        result["timing_ms"] = timing
+        result["stop_method"] = stopped.get("method")
+        return result
 
     def _apply_settings(self) -> None:
         """✅ FIX: Apply settings via client.call(), bukan client.core."""
         try:
-            if not self._connect():
-                return
-
             config = {
                 b"download_location": self.download_path,
                 b"move_completed_path": self.download_path,
@@ -370,12 +654,76 @@ class DelugeService:
             if self.max_upload_speed != -1:
                 config[b"max_upload_speed"] = float(self.max_upload_speed)
 
-            self._client.call('core.set_config', config)
+            self._call('core.set_config', config)
             logger.info("Settings applied successfully")
 
         except Exception as e:
             logger.error(f"Failed to apply settings: {e}")
 
+    def apply_config(self, config: Dict[str, Any], changed: List[str]) -> Dict[str, Any]:
+        """
+        Terapkan perubahan LIVE_CONFIG_KEYS tanpa menyentuh deluged:
+        limit speed & download_location lewat satu `core.set_config`
+        (berlaku untuk torrent baru), dan jika
+        `move_existing_on_path_change` aktif, torrent di path lama
+        dipindah dengan `core.move_storage`. Jika daemon belum jalan,
+        nilai baru dipakai oleh _apply_settings() saat start.
+        """
+        self.config = config
+        result: Dict[str, Any] = {"success": True, "keys": list(changed), "rpc": []}
+        core: Dict[bytes, Any] = {}
+        old_path = self.download_path
+
+        if "max_download_speed" in changed:
+            self.max_download_speed = config.get("max_download_speed", -1)
+            core[b"max_download_speed"] = float(self.max_download_speed)
+        if "max_upload_speed" in changed:
+            self.max_upload_speed = config.get("max_upload_speed", -1)
+            core[b"max_upload_speed"] = float(self.max_upload_speed)
+        if "download_path" in changed:
+            self.download_path = config.get("download_path") or old_path
+            os.makedirs(self.download_path, exist_ok=True)
+            core[b"download_location"] = self.download_path
+            core[b"move_completed_path"] = self.download_path
+
+        self.stream_wait_timeout = config.get("stream_wait_timeout", 300)
+        self.stream_poll_interval = config.get("stream_poll_interval", 0.5)
+        self.upload_batch_size = config.get("upload_batch_size", 50)
+        self.upload_batch_bytes = config.get("upload_batch_bytes", 8 << 20)
+        self.cache_wait = config.get("cache_wait", 5)
+
+        if not core:
+            return result
+        if not self._is_running:
+            result["deferred"] = True       # _apply_settings() saat start
+            return result
+
+        try:
+            self._call('core.set_config', core)
+            result["rpc"].append("core.set_config")
+
+            if (
+                self.download_path != old_path
+                and config.get("move_existing_on_path_change", False)
+            ):
+                statuses = self._decode(
+                    self._call('core.get_torrents_status', {}, ['save_path'])
+                )
+                ids = [
+                    tid for tid, st in statuses.items()
+                    if os.path.normpath(st.get("save_path") or "") == os.path.normpath(old_path)
+                ]
+                if ids:
+                    self._call('core.move_storage', ids, self.download_path)
+                    result["rpc"].append("core.move_storage")
+                result["moved"] = len(ids)
+        except Exception as e:
+            logger.error(f"Failed to apply config live: {e}")
+            result["success"] = False
+            result["error"] = str(e)
+
+        return result
+
     # ─────────────────────────────────────────────
     # Status
     # ─────────────────────────────────────────────
@@ -388,23 +736,22 @@ class DelugeService:
             "port": self.daemon_port,
             "download_path": self.download_path,
             "connected": False,
+            "pool": self._pool.stats(),
+            "watch": self._watch.stats() if self._watch else None,
         }
 
         if self._ensure_connected():
             try:
                 # ✅ FIX: Pakai client.call()
-                version = self._client.call('daemon.info')
-                status["version"] = self._decode(version)
-                status["connected"] = True
-
+                # ✅ FIX: Satu RPC saja; versi sudah di-cache saat connect
                 session_keys = [
                     b'upload_rate', b'download_rate',
                     b'dht_nodes', b'has_incoming_connections'
                 ]
-                stats = self._client.call(
-                    'core.get_session_status', session_keys
-                )
+                stats = self._call('core.get_session_status', session_keys)
                 status["stats"] = self._decode(stats)
+                status["version"] = self._version
+                status["connected"] = True
 
             except Exception as e:
                 logger.error(f"Failed to get status: {e}")
@@ -412,19 +759,52 @@ class DelugeService:
 
         return status
 
+    def torrent_events(self):
+        """
+        Generator SSE (snapshot lalu delta) atau dict error jika cache
+        tidak tersedia. Streaming butuh cache karena delta berasal dari
+        refresher-nya.
+        """
+        if not self._ensure_connected():
+            return {"success": False, "error": "Not connected"}
+        if not self._cache_ready():
+            return {
+                "success": False,
+                "error": self._cache.last_error or "Torrent cache unavailable",
+            }
+        return self._events.stream()
+
+    def _sample_stats(self) -> Optional[Dict[str, Any]]:
+        """Sampel untuk history: pakai stats cache jika masih segar."""
+        if not self._is_running:
+            return None
+        age = self._cache.age()
+        if age is not None and age < self._sampler.interval:
+            return self._cache.stats()
+        return self._decode(self._call('core.get_session_status', SESSION_KEYS))
+
+    def get_stats_history(
+        self, span: float = 3600, step: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Series session stats `span` detik terakhir, per `step` detik."""
+        if not self._sampler:
+            return {"success": False, "error": "Stats history disabled"}
+        return self._history.query(span, step)
+
     def get_stats(self) -> Dict[str, Any]:
         """Get session statistics."""
         if not self._ensure_connected():
             return {"success": False, "error": "Not connected"}
 
+        if self._cache_ready():
+            return {
+                "success": True,
+                "stats": self._cache.stats(),
+                "age": self._cache.age(),
+            }
+
         try:
-            keys = [
-                b'upload_rate', b'download_rate',
-                b'dht_nodes', b'num_peers',
-                b'payload_upload_rate', b'payload_download_rate',
-                b'total_upload', b'total_download',
-            ]
-            stats = self._client.call('core.get_session_status', keys)
+            stats = self._call('core.get_session_status', SESSION_KEYS)
             return {
                 "success": True,
                 "stats": self._decode(stats)
@@ -436,33 +816,88 @@ class DelugeService:
     # Torrent Operations
     # ─────────────────────────────────────────────
 
+    def _add_options(self) -> Dict[str, Any]:
+        return {
+            "download_location": self.download_path,
+            "max_download_speed": self.max_download_speed,
+            "max_upload_speed": self.max_upload_speed,
+        }
+
+    def _prefetch_magnet(self, magnet: str, timeout: float):
+        """
+        core.prefetch_magnet_metadata (Deluge 2.x) → (id, metadata).
+
+        ✅ FIX: Pakai client sendiri, bukan pool: call ini memblok sampai
+        `timeout` detik, lebih lama dari socket timeout default client
+        (20 s). Lewat pool, socket timeout dianggap error transport dan
+        prefetch dikirim ulang di koneksi baru. Di sini tidak ada retry.
+        """
+        client = self._new_client(timeout=timeout + 15)
+        try:
+            client.connect()
+            result = client.call('core.prefetch_magnet_metadata', magnet, timeout)
+        except RemoteException as e:
+            if 'prefetch_magnet_metadata' in str(e):
+                raise RuntimeError(
+                    "Daemon does not support metadata prefetch (Deluge 2.x required)"
+                )
+            raise
+        finally:
+            try:
+                client.disconnect()
+            except Exception:
+                pass
+        return decode_prefetch(result)
+
+    def _add_prefetched(
+        self, filename: str, data: bytes, priorities: List[int], paused: bool
+    ) -> Optional[str]:
+        """Add .torrent hasil prefetch dengan file_priorities sejak awal."""
+        options = self._add_options()
+        options['file_priorities'] = priorities
+        options['add_paused'] = paused
+        torrent_id = self._call(
+            'core.add_torrent_file',
+            filename,
+            torrent_upload.b64encode_bytes(data),
+            options,
+        )
+        self._cache.invalidate()
+        return self._decode(torrent_id) if torrent_id is not None else None
+
     def add_torrent(
         self,
         magnet: Optional[str] = None,
         torrent_url: Optional[str] = None,
-        torrent_file: Optional[str] = None
+        torrent_file: Optional[str] = None,
+        metadata_first: bool = False,
+        selection: Optional[FileSelection] = None,
     ) -> Dict[str, Any]:
         """
         Add torrent. Supports:
         - magnet link
         - .torrent URL
         - .torrent file path
+
+        Magnet dengan `metadata_first` (atau `selection`) tidak langsung
+        di-add: metadata di-prefetch dulu, lalu torrent ditambahkan
+        dengan hanya file yang cocok `selection` aktif. Return langsung
+        dengan `pending: True`; progress lewat `get_magnet_status()`.
         """
         if not self._ensure_connected():
             return {"success": False, "error": "Not connected to Deluge"}
 
-        options = {
-            "download_location": self.download_path,
-            "max_download_speed": self.max_download_speed,
-            "max_upload_speed": self.max_upload_speed,
-        }
+        if magnet and (metadata_first or selection):
+            return self._magnets.submit(magnet, selection or FileSelection())
+
+        options = self._add_options()
 
         try:
             torrent_id = None
 
             # ✅ FIX: Magnet link
             if magnet:
-                torrent_id = self._client.call(
+                torrent_id = self._call(
                     'core.add_torrent_magnet',
                     magnet,
                     options
@@ -470,18 +905,18 @@ class DelugeService:
 
             # ✅ FIX: URL (.torrent download URL)
             elif torrent_url:
-                torrent_id = self._client.call(
+                torrent_id = self._call(
                     'core.add_torrent_url',
                     torrent_url,
                     options
                 )
 
-            # ✅ FIX: File - harus base64 encode
+            # ✅ FIX: File - harus base64 encode (per chunk)
             elif torrent_file and os.path.exists(torrent_file):
                 with open(torrent_file, 'rb') as f:
-                    file_data = base64.b64encode(f.read())
+                    file_data = torrent_upload.b64encode_stream(f)
 
-                torrent_id = self._client.call(
+                torrent_id = self._call(
                     'core.add_torrent_file',
                     os.path.basename(torrent_file),
                     file_data,
@@ -501,6 +936,7 @@ class DelugeService:
 
             tid = self._decode(torrent_id)
             logger.info(f"Torrent added: {tid}")
+            self._cache.invalidate()
 
             return {
                 "success": True,
@@ -512,75 +948,378 @@ class DelugeService:
             logger.error(f"Failed to add torrent: {e}")
             return {"success": False, "error": str(e)}
 
-    def list_torrents(self) -> Dict[str, Any]:
-        """List all torrents with status."""
+    def get_magnet_status(
+        self, torrent_id: Optional[str] = None, wait: float = 0
+    ) -> Dict[str, Any]:
+        """Status magnet metadata-first; `wait` = long-poll (detik)."""
+        if torrent_id is None:
+            return {"success": True, "magnets": self._magnets.list()}
+
+        record = self._magnets.get(torrent_id.lower(), wait)
+        if record is None:
+            return {"success": False, "error": "Unknown magnet"}
+        return {"success": True, "magnet": record}
+
+    def list_torrents(self, query: Optional[TorrentQuery] = None) -> Dict[str, Any]:
+        """
+        List torrents with status.
+
+        `query` mengatur filter, projection, sort dan pagination. Dilayani
+        dari cache bila semua field yang diminta ada di cache; selain itu
+        filter state/id di-pushdown ke `core.get_torrents_status`.
+        """
+        if not self._ensure_connected():
+            return {"success": False, "error": "Not connected to Deluge"}
+
+        query = query or TorrentQuery()
+        fields = query.required_fields()
+        derived = [f for f in fields if f in DERIVED_FIELDS]
+        if derived:
+            # Field turunan dihitung dari total_done/total_wanted
+            fields = [f for f in fields if f not in DERIVED_FIELDS]
+            fields += [f for f in ('total_done', 'total_wanted') if f not in fields]
+
+        try:
+            if (
+                set(fields).issubset(CACHE_FIELDS)
+                and self._cache_ready()
+            ):
+                if derived:
+                    result = query.apply(self._rates.augment(self._cache.torrents()))
+                else:
+                    result = query.apply((), index=self._cache.index())
+                result["age"] = self._cache.age()
+            else:
+                # ✅ FIX: Pakai client.call() dengan filter + field list
+                raw = self._call(
+                    'core.get_torrents_status', query.deluge_filter(), fields
+                )
+                rows = decode_rows(raw, fields)
+                if derived:
+                    rows = self._rates.augment(rows)
+                # ✅ FIX: State sudah difilter Deluge; `state` tidak ada di rows
+                result = query.apply(rows, prefiltered=True)
+
+            result["success"] = True
+            return result
+
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+        except Exception as e:
+            logger.error(f"Failed to list torrents: {e}")
+            return {"success": False, "error": str(e)}
+
+    def get_torrent_details(self, torrent_id: str) -> Dict[str, Any]:
+        """Get detailed information about a specific torrent."""
         if not self._ensure_connected():
             return {"success": False, "error": "Not connected to Deluge"}
 
+        cached = self._cache.get(torrent_id) if self._cache_ready() else None
+        live = ['num_files', 'trackers']
         try:
-            # ✅ FIX: Pakai client.call() dengan field list
-            fields = [
-                'name', 'state', 'progress',
-                'download_payload_rate', 'upload_payload_rate',
-                'num_seeds', 'num_peers',
-                'total_wanted', 'total_done',
-                'eta', 'ratio', 'save_path'
+            if cached:
+                # Field skalar dari cache; files/peers/trackers punya
+                # endpoint sendiri, di sini hanya jumlahnya
+                raw = self._call('core.get_torrent_status', torrent_id, live)
+                result = dict(cached)
+            else:
+                fields = [
+                    'name', 'state', 'progress',
+                    'download_payload_rate', 'upload_payload_rate',
+                    'num_seeds', 'num_peers',
+                    'total_wanted', 'total_done',
+                    'eta', 'ratio', 'save_path',
+                    'total_size', 'hash', 'message',
+                    'tracker_host', 'time_added',
+                ] + live
+
+                # ✅ FIX: client.call()
+                raw = self._call(
+                    'core.get_torrent_status', torrent_id, fields
+                )
+                if not raw:
+                    return {"success": False, "error": "Torrent not found"}
+                result = {'id': torrent_id}
+
+            extra = self._decode(raw) if raw else {}
+            trackers = extra.pop('trackers', None) or []
+            num_files = extra.pop('num_files', None)
+            result.update(extra)
+
+            index = self._files.get(torrent_id)
+            result['file_count'] = len(index) if index else (num_files or 0)
+            result['peer_count'] = (
+                (result.get('num_peers') or 0) + (result.get('num_seeds') or 0)
+            )
+            result['tracker_count'] = len(trackers)
+
+            if cached:
+                result.update(
+                    self._rates.estimates().get(torrent_id)
+                    or dict.fromkeys(DERIVED_FIELDS)
+                )
+                return {
+                    "success": True,
+                    "torrent": result,
+                    "age": self._cache.age(),
+                }
+            return {"success": True, "torrent": result}
+
+        except Exception as e:
+            logger.error(f"Failed to get torrent details: {e}")
+            return {"success": False, "error": str(e)}
+
+    # ─────────────────────────────────────────────
+    # Sub-resource: files / peers / trackers
+    # ─────────────────────────────────────────────
+
+    def _file_index(self, torrent_id: str) -> Optional[FileIndex]:
+        """FileIndex torrent, dibangun sekali dari `files` lalu di-cache."""
+        index = self._files.get(torrent_id)
+        if index is not None:
+            return index
+
+        raw = self._call('core.get_torrent_status', torrent_id, ['files'])
+        if not raw:
+            return None
+        files = self._decode(raw).get('files') or []
+        index = FileIndex(files)
+        if files:
+            # Magnet tanpa metadata: list kosong, jangan di-cache
+            self._files.put(torrent_id, index)
+        return index
+
+    def get_torrent_files(
+        self,
+        torrent_id: str,
+        query: Optional[PageQuery] = None,
+        match: Optional[FileMatch] = None,
+    ) -> Dict[str, Any]:
+        """Satu halaman file torrent (urut path), dengan filter prefix/glob/regex/ext."""
+        if not self._ensure_connected():
+            return {"success": False, "error": "Not connected"}
+
+        query = query or PageQuery(FILE_DEFAULT_FIELDS)
+        try:
+            index = self._file_index(torrent_id)
+            if index is None:
+                return {"success": False, "error": "Torrent not found"}
+
+            # Progress/priority berubah terus → ambil live, hanya jika diminta
+            keys = [
+                LIVE_FILE_FIELDS[f] for f in query.fields if f in LIVE_FILE_FIELDS
             ]
+            live = {}
+            if keys and len(index):
+                raw = self._call('core.get_torrent_status', torrent_id, keys)
+                live = self._decode(raw) if raw else {}
+
+            page = index.page(query, live, match or None)
+            return {"success": True, "files": page.pop("items"), **page}
+
+        except Exception as e:
+            logger.error(f"Failed to get torrent files: {e}")
+            return {"success": False, "error": str(e)}
 
-            raw = self._client.call(
-                'core.get_torrents_status', {}, fields
+    def set_file_priorities(
+        self,
+        torrent_id: str,
+        priority: int,
+        match: Optional[FileMatch] = None,
+        others: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Set priority semua file yang cocok `match` dalam satu
+        core.set_torrent_options. `others` (mis. 0) diterapkan ke file
+        yang tidak cocok; None = biarkan priority-nya.
+        """
+        if not self._ensure_connected():
+            return {"success": False, "error": "Not connected"}
+
+        for value in (priority, others):
+            if value is not None and not (
+                isinstance(value, int) and PRIORITY_SKIP <= value <= PRIORITY_MAX
+            ):
+                return {
+                    "success": False,
+                    "error": f"Priority must be {PRIORITY_SKIP}-{PRIORITY_MAX}",
+                }
+
+        try:
+            index = self._file_index(torrent_id)
+            if index is None:
+                return {"success": False, "error": "Torrent not found"}
+            if not len(index):
+                return {"success": False, "error": "Metadata not available yet"}
+
+            selected = index.file_indexes(match)
+            raw = self._call(
+                'core.get_torrent_status', torrent_id, ['file_priorities']
             )
+            current = list((self._decode(raw) if raw else {}).get('file_priorities') or [])
+            if len(current) != len(index):
+                current = [PRIORITY_NORMAL] * len(index)
 
-            torrents = []
-            for torrent_id, info in raw.items():
-                decoded = self._decode(info)
-                decoded['id'] = self._decode(torrent_id)
-                torrents.append(decoded)
+            priorities = current if others is None else [others] * len(current)
+            for i in selected:
+                priorities[i] = priority
 
+            self._call(
+                'core.set_torrent_options', [torrent_id],
+                {'file_priorities': priorities}
+            )
+            self._cache.invalidate()
             return {
                 "success": True,
-                "torrents": torrents,
-                "count": len(torrents)
+                "matched": len(selected),
+                "total": len(priorities),
+                "skipped": priorities.count(PRIORITY_SKIP),
+                "wanted_bytes": sum(
+                    int(index.files[i].get('size') or 0)
+                    for i, p in enumerate(priorities)
+                    if p != PRIORITY_SKIP and i in index.files
+                ),
             }
 
         except Exception as e:
-            logger.error(f"Failed to list torrents: {e}")
+            logger.error(f"Failed to set file priorities: {e}")
             return {"success": False, "error": str(e)}
 
-    def get_torrent_details(self, torrent_id: str) -> Dict[str, Any]:
-        """Get detailed information about a specific torrent."""
+    def set_stream_mode(
+        self,
+        torrent_id: str,
+        enabled: bool = True,
+        file_index: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Stream mode: sequential download + piece awal/akhir file duluan.
+        Dengan `file_index`, file itu juga diberi priority tertinggi
+        (dikembalikan ke normal saat stream mode dimatikan).
+        """
         if not self._ensure_connected():
-            return {"success": False, "error": "Not connected to Deluge"}
+            return {"success": False, "error": "Not connected"}
 
         try:
-            fields = [
-                'name', 'state', 'progress',
-                'download_payload_rate', 'upload_payload_rate',
-                'num_seeds', 'num_peers',
-                'total_wanted', 'total_done',
-                'eta', 'ratio', 'save_path',
-                'files', 'trackers', 'peers',
-                'total_size', 'hash', 'message',
-                'tracker_host', 'time_added'
-            ]
-
-            # ✅ FIX: client.call()
-            raw = self._client.call(
-                'core.get_torrent_status', torrent_id, fields
+            self._call(
+                'core.set_torrent_options', [torrent_id],
+                {
+                    'sequential_download': bool(enabled),
+                    'prioritize_first_last_pieces': bool(enabled),
+                }
             )
+            result = {"success": True, "stream": bool(enabled)}
+            if file_index is not None:
+                files = self.set_file_priorities(
+                    torrent_id,
+                    PRIORITY_MAX if enabled else PRIORITY_NORMAL,
+                    FileMatch(indexes=[file_index]),
+                )
+                if not files.get("success"):
+                    return files
+                if not files.get("matched"):
+                    return {"success": False, "error": "File index out of range"}
+                result["file_index"] = file_index
+            self._cache.invalidate()
+            return result
 
-            if not raw:
+        except Exception as e:
+            logger.error(f"Failed to set stream mode: {e}")
+            return {"success": False, "error": str(e)}
+
+    def open_file_stream(self, torrent_id: str, file_index: int) -> Dict[str, Any]:
+        """
+        Buka satu file torrent untuk dibaca per range selagi di-download.
+        Return {"success", "stream": TorrentFileStream, "name", "size"}.
+        """
+        if not self._ensure_connected():
+            return {"success": False, "error": "Not connected"}
+
+        try:
+            index = self._file_index(torrent_id)
+            if index is None:
                 return {"success": False, "error": "Torrent not found"}
+            if not len(index):
+                return {"success": False, "error": "Metadata not available yet"}
+            f = index.files.get(file_index)
+            if f is None:
+                return {"success": False, "error": "File index out of range"}
+
+            raw = self._call(
+                'core.get_torrent_status', torrent_id,
+                ['save_path', 'piece_length', 'pieces', 'state']
+            )
+            status = self._decode(raw) if raw else {}
+            path = resolve_path(status.get('save_path') or "", f['path'])
+            if path is None:
+                return {"success": False, "error": "Invalid file path"}
+
+            def fetch_pieces():
+                raw = self._call('core.get_torrent_status', torrent_id, ['pieces'])
+                return (self._decode(raw) if raw else {}).get('pieces')
+
+            def boost():
+                # Deluge tidak mengekspos priority/deadline per piece:
+                # sequential + priority file tertinggi + resume jika paused
+                self.set_stream_mode(torrent_id, True, file_index)
+                if status.get('state') == 'Paused':
+                    self._call('core.resume_torrent', [torrent_id])
+
+            stream = TorrentFileStream(
+                fetch_pieces,
+                boost,
+                path,
+                size=int(f.get('size') or 0),
+                offset=int(f.get('offset') or 0),
+                piece_length=int(status.get('piece_length') or 1),
+                pieces=status.get('pieces'),
+                poll_interval=self.stream_poll_interval,
+                timeout=self.stream_wait_timeout,
+            )
+            return {
+                "success": True,
+                "stream": stream,
+                "name": f['path'].rsplit("/", 1)[-1],
+                "size": stream.size,
+            }
 
-            result = self._decode(raw)
-            result['id'] = torrent_id
+        except Exception as e:
+            logger.error(f"Failed to open file stream: {e}")
+            return {"success": False, "error": str(e)}
 
-            return {"success": True, "torrent": result}
+    def _torrent_list_field(
+        self, torrent_id: str, key: str, query: PageQuery
+    ) -> Dict[str, Any]:
+        if not self._ensure_connected():
+            return {"success": False, "error": "Not connected"}
+
+        try:
+            raw = self._call('core.get_torrent_status', torrent_id, [key])
+            if not raw:
+                return {"success": False, "error": "Torrent not found"}
+            items = self._decode(raw).get(key) or []
+            page = query.page(items, PREFIX_KEYS[key])
+            return {"success": True, key: page.pop("items"), **page}
 
         except Exception as e:
-            logger.error(f"Failed to get torrent details: {e}")
+            logger.error(f"Failed to get torrent {key}: {e}")
             return {"success": False, "error": str(e)}
 
+    def get_torrent_peers(
+        self, torrent_id: str, query: Optional[PageQuery] = None
+    ) -> Dict[str, Any]:
+        """Peer torrent (live), filter prefix IP."""
+        return self._torrent_list_field(
+            torrent_id, 'peers', query or PageQuery(PEER_FIELDS)
+        )
+
+    def get_torrent_trackers(
+        self, torrent_id: str, query: Optional[PageQuery] = None
+    ) -> Dict[str, Any]:
+        """Tracker torrent (live), filter prefix URL."""
+        return self._torrent_list_field(
+            torrent_id, 'trackers', query or PageQuery(TRACKER_FIELDS)
+        )
+
     def pause_torrent(self, torrent_id: str) -> Dict[str, Any]:
         """Pause a torrent."""
         if not self._ensure_connected():
@@ -588,7 +1327,8 @@ class DelugeService:
 
         try:
             # ✅ FIX: client.call()
-            self._client.call('core.pause_torrent', [torrent_id])
+            self._call('core.pause_torrent', [torrent_id])
+            self._cache.invalidate()
             return {
                 "success": True,
                 "message": f"Torrent {torrent_id} paused"
@@ -602,7 +1342,8 @@ class DelugeService:
             return {"success": False, "error": "Not connected"}
 
         try:
-            self._client.call('core.resume_torrent', [torrent_id])
+            self._call('core.resume_torrent', [torrent_id])
+            self._cache.invalidate()
             return {
                 "success": True,
                 "message": f"Torrent {torrent_id} resumed"
@@ -618,9 +1359,11 @@ class DelugeService:
             return {"success": False, "error": "Not connected"}
 
         try:
-            self._client.call(
+            self._call(
                 'core.remove_torrent', torrent_id, remove_data
             )
+            self._files.invalidate(torrent_id)
+            self._cache.invalidate()
             return {
                 "success": True,
                 "message": f"Torrent {torrent_id} removed"
@@ -634,7 +1377,8 @@ class DelugeService:
             return {"success": False, "error": "Not connected"}
 
         try:
-            self._client.call('core.pause_all_torrents')
+            self._call('core.pause_all_torrents')
+            self._cache.invalidate()
             return {"success": True, "message": "All torrents paused"}
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -645,7 +1389,370 @@ class DelugeService:
             return {"success": False, "error": "Not connected"}
 
         try:
-            self._client.call('core.resume_all_torrents')
+            self._call('core.resume_all_torrents')
+            self._cache.invalidate()
             return {"success": True, "message": "All torrents resumed"}
         except Exception as e:
-            return {"success": False, "error": str(e)}
\ No newline at end of file
+            return {"success": False, "error": str(e)}
+
+    # ─────────────────────────────────────────────
+    # Batch Operations
+    # ─────────────────────────────────────────────
+
+    BATCH_ACTIONS = ("pause", "resume", "remove")
+
+    def _select_ids(self, query: TorrentQuery) -> List[str]:
+        """Resolve filter expression → list torrent ID."""
+        self._cache.sync()
+        query.fields = ['state']
+        query.offset, query.limit, query.cursor = 0, None, None
+        result = self.list_torrents(query)
+        if not result.get("success"):
+            raise ValueError(result.get("error", "Failed to resolve filter"))
+        return [t['id'] for t in result["torrents"]]
+
+    def _batch_single_rpc(
+        self, action: str, ids: List[str], remove_data: bool
+    ) -> Dict[str, Optional[str]]:
+        """
+        Satu RPC untuk semua ID. Return {id: error_or_None}.
+        Raise RemoteException jika daemon tidak punya method batch.
+        """
+        if action == "remove":
+            # Deluge 2.x: list of (torrent_id, error) untuk yang gagal
+            errors = self._call('core.remove_torrents', ids, remove_data)
+            failed = {
+                self._decode(tid): str(self._decode(err))
+                for tid, err in (errors or [])
+            }
+            return {tid: failed.get(tid) for tid in ids}
+
+        # core.pause_torrent / resume_torrent menerima list di 1.3 dan 2.x
+        self._call(f'core.{action}_torrent', ids)
+        return {tid: None for tid in ids}
+
+    def _batch_parallel(
+        self, action: str, ids: List[str], remove_data: bool
+    ) -> Dict[str, Optional[str]]:
+        """Fallback: satu RPC per ID, dijalankan lewat `_call_many`."""
+        if action == "remove":
+            calls = [('core.remove_torrent', (tid, remove_data), {}) for tid in ids]
+        else:
+            calls = [(f'core.{action}_torrent', ([tid],), {}) for tid in ids]
+
+        results: Dict[str, Optional[str]] = {}
+        for tid, out in zip(ids, self._call_many(calls)):
+            results[tid] = str(out) if isinstance(out, Exception) else None
+        return results
+
+    def batch_torrents(
+        self,
+        action: str,
+        ids: Optional[List[str]] = None,
+        query: Optional[TorrentQuery] = None,
+        remove_data: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Pause/resume/remove banyak torrent sekaligus.
+
+        Target dari `ids` atau filter `query`. Dicoba dengan satu RPC
+        batch; jika daemon menolak (versi lama, atau satu ID membuat
+        seluruh batch gagal), fallback ke per-ID RPC paralel supaya
+        hasil per-ID tetap akurat.
+        """
+        if action not in self.BATCH_ACTIONS:
+            return {
+                "success": False,
+                "error": f"Unknown action '{action}'. "
+                         f"Valid: {', '.join(self.BATCH_ACTIONS)}"
+            }
+
+        if not self._ensure_connected():
+            return {"success": False, "error": "Not connected"}
+
+        try:
+            if query is not None:
+                ids = self._select_ids(query)
+            ids = list(dict.fromkeys(ids or []))
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+
+        if not ids:
+            return {
+                "success": True, "action": action, "mode": "none",
+                "results": {}, "succeeded": 0, "failed": 0,
+            }
+
+        # ID yang jelas tidak ada tidak ikut dikirim (cegah batch abort)
+        unknown: List[str] = []
+        if self._cache_ready():
+            unknown = [tid for tid in ids if self._cache.get(tid) is None]
+            if unknown and self._cache.sync():
+                # Mungkin baru ditambahkan sejak refresh terakhir
+                unknown = [tid for tid in unknown if self._cache.get(tid) is None]
+            missing = set(unknown)
+            ids = [tid for tid in ids if tid not in missing]
+
+        try:
+            mode = "batch"
+            errors = self._batch_single_rpc(action, ids, remove_data) if ids else {}
+        except Exception as e:
+            if not self._pool.is_remote_error(e):
+                return {"success": False, "error": str(e)}
+            logger.info(f"Batch {action} rejected ({e}), falling back to per-ID")
+            mode = "parallel"
+            errors = self._batch_parallel(action, ids, remove_data)
+
+        errors.update({tid: "Torrent not found" for tid in unknown})
+        self._cache.invalidate()
+
+        results = {
+            tid: {"success": True} if err is None
+            else {"success": False, "error": err}
+            for tid, err in errors.items()
+        }
+        failed = sum(1 for r in results.values() if not r["success"])
+
+        return {
+            "success": failed == 0,
+            "action": action,
+            "mode": mode,
+            "results": results,
+            "succeeded": len(results) - failed,
+            "failed": failed,
+        }
+
+    # ─────────────────────────────────────────────
+    # Bulk Ingest
+    # ─────────────────────────────────────────────
+
+    def _ingest_submit(self, kind: str, source: str) -> Optional[str]:
+        """Dipanggil worker IngestQueue: satu add RPC per item."""
+        if not self._is_running:
+            raise RuntimeError("Deluge not running")
+
+        method = (
+            'core.add_torrent_magnet' if kind == "magnet"
+            else 'core.add_torrent_url'
+        )
+        torrent_id = self._call(method, source, self._add_options())
+        self._cache.invalidate()
+        return self._decode(torrent_id) if torrent_id is not None else None
+
+    def _pending_metadata_count(self) -> int:
+        """Jumlah magnet di session yang metadata-nya belum resolve."""
+        if not self._cache.running:
+            return self._magnets.pending_count()
+        return self._magnets.pending_count() + sum(
+            1 for row in self._cache.torrents()
+            if not row.get('total_size')
+            and row.get('state') not in ("Paused", "Error")
+        )
+
+    def add_bulk(self, lines: List[str]) -> Dict[str, Any]:
+        """
+        Masukkan banyak magnet/URL (satu per baris) ke ingest queue.
+        Item diproses di background; status lewat `bulk_status()`.
+        """
+        result = self._ingest.enqueue(lines)
+        if self._is_running:
+            self._ingest.start()
+        return result
+
+    def bulk_status(
+        self,
+        batch_id: Optional[str] = None,
+        status: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 100,
+    ) -> Dict[str, Any]:
+        if batch_id:
+            return self._ingest.batch(batch_id, status, offset, limit)
+        return self._ingest.summary()
+
+    # ─────────────────────────────────────────────
+    # Upload .torrent / Arsip
+    # ─────────────────────────────────────────────
+
+    def _add_torrent_files(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Add satu batch .torrent (sudah base64). Deluge 2.x: satu RPC
+        `core.add_torrent_files`; daemon lama: per-file `add_torrent_file`.
+        """
+        options = self._add_options()
+        results = []
+
+        if self._batch_add_supported is not False:
+            try:
+                self._call('core.add_torrent_files', [
+                    (os.path.basename(e["name"]), e["filedump"], options)
+                    for e in batch
+                ])
+                self._batch_add_supported = True
+                for e in batch:
+                    del e["filedump"]
+
+                # Batch RPC tidak mengembalikan ID → cek yang benar masuk
+                ids = [e["torrent_id"] for e in batch]
+                present = self._call(
+                    'core.get_torrents_status', {"id": ids}, ['name']
+                )
+                present = {self._decode(k) for k in present}
+                for e in batch:
+                    ok = e["torrent_id"] in present
+                    results.append(dict(
+                        e, success=ok,
+                        **({} if ok else {"error": "Rejected by daemon"})
+                    ))
+                self._cache.invalidate()
+                return results
+
+            except Exception as e:
+                if not self._pool.is_remote_error(e) or self._batch_add_supported:
+                    for entry in batch:
+                        entry.pop("filedump", None)
+                    return [
+                        dict(entry, success=False, error=str(e))
+                        for entry in batch
+                    ]
+                logger.info(f"add_torrent_files unavailable ({e}), adding one by one")
+                self._batch_add_supported = False
+
+        calls = [
+            ('core.add_torrent_file',
+             (os.path.basename(e["name"]), e.pop("filedump", None), options), {})
+            for e in batch
+        ]
+        for entry, tid in zip(batch, self._call_many(calls)):
+            if isinstance(tid, Exception):
+                results.append(dict(entry, success=False, error=str(tid)))
+            elif tid is None:
+                results.append(dict(entry, success=False,
+                                    error="Torrent already exists or invalid"))
+            else:
+                results.append(dict(entry, success=True))
+
+        self._cache.invalidate()
+        return results
+
+    def _add_torrent_blobs(self, items) -> List[Dict[str, Any]]:
+        """
+        Add .torrent dari iterable (name, raw_bytes atau Exception).
+
+        Hanya satu batch (≤ upload_batch_size file / upload_batch_bytes
+        data base64) yang ada di memori pada satu waktu. Torrent yang
+        sudah ada di session ditandai `duplicate`.
+        """
+        results: List[Dict[str, Any]] = []
+        batch: List[Dict[str, Any]] = []
+        batch_bytes = 0
+
+        for name, raw in items:
+            if isinstance(raw, Exception):
+                results.append({"name": name, "success": False, "error": str(raw)})
+                continue
+
+            try:
+                entry = torrent_upload.prepare(name, raw)
+            except ValueError as e:
+                results.append({"name": name, "success": False, "error": str(e)})
+                continue
+
+            if self._cache.get(entry["torrent_id"]) is not None:
+                results.append(dict(entry, success=False, duplicate=True,
+                                    error="Torrent already in session"))
+                continue
+
+            entry["filedump"] = torrent_upload.b64encode_bytes(raw)
+            del raw
+            batch.append(entry)
+            batch_bytes += len(entry["filedump"])
+
+            if (
+                len(batch) >= self.upload_batch_size
+                or batch_bytes >= self.upload_batch_bytes
+            ):
+                results.extend(self._add_torrent_files(batch))
+                batch, batch_bytes = [], 0
+
+        if batch:
+            results.extend(self._add_torrent_files(batch))
+
+        return results
+
+    def add_torrent_archive(self, path: str, filename: str) -> Dict[str, Any]:
+        """Add semua .torrent dari file spool (satu .torrent, zip, atau tar)."""
+        if not self._ensure_connected():
+            return {"success": False, "error": "Not connected to Deluge"}
+
+        results = self._add_torrent_blobs(
+            torrent_upload.iter_torrents(path, filename)
+        )
+        added = sum(1 for r in results if r["success"])
+        return {
+            "success": added > 0 or not results,
+            "added": added,
+            "failed": len(results) - added,
+            "results": results,
+        }
+
+    def upload_torrents(self, stream, filename: str) -> Dict[str, Any]:
+        """Spool stream upload ke disk lalu add isinya; spool selalu dihapus."""
+        spool = torrent_upload.make_spool_dir(self.spool_dir)
+        try:
+            path = os.path.join(spool, "upload")
+            torrent_upload.spool_stream(stream, path)
+            return self.add_torrent_archive(path, filename)
+        except Exception as e:
+            logger.error(f"Failed to process upload {filename}: {e}")
+            return {"success": False, "error": str(e)}
+        finally:
+            torrent_upload.remove_spool_dir(spool)
+
+    # ─────────────────────────────────────────────
+    # Watch Folder
+    # ─────────────────────────────────────────────
+
+    def _watch_ingest(self, paths: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Handler WatchFolder: .torrent di-add langsung (batch RPC),
+        .magnet (magnet/URL per baris) masuk ingest queue sekaligus.
+        Raise jika daemon belum connect supaya file dicoba lagi nanti.
+        """
+        if not self._ensure_connected():
+            raise RuntimeError("Not connected to Deluge")
+
+        outcome: Dict[str, Optional[str]] = {}
+        torrents = [p for p in paths if p.lower().endswith(".torrent")]
+        magnets = [p for p in paths if p.lower().endswith(".magnet")]
+
+        def read_all():
+            for path in torrents:
+                try:
+                    yield path, torrent_upload.read_torrent_file(path)
+                except Exception as e:
+                    yield path, e
+
+        for r in self._add_torrent_blobs(read_all()):
+            ok = r["success"] or r.get("duplicate")
+            outcome[r["name"]] = None if ok else r.get("error", "unknown")
+
+        lines: List[str] = []
+        for path in magnets:
+            try:
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    items = [l.strip() for l in f.read(1 << 20).splitlines()]
+            except OSError as e:
+                outcome[path] = str(e)
+                continue
+            valid = [l for l in items if classify(l)]
+            if valid:
+                lines.extend(valid)
+                outcome[path] = None
+            else:
+                outcome[path] = "No valid magnet link or URL"
+
+        if lines:
+            self.add_bulk(lines)
+
+        return outcome
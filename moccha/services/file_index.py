@@ -0,0 +1,471 @@
+"""Index file workspace di memori: os.scandir + update incremental via inotify."""
+
+import os
+import stat
+import time
+import heapq
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from moccha.utils import inotify
+
+logger = logging.getLogger(__name__)
+
+_MASK = (
+    inotify.IN_CREATE | inotify.IN_MODIFY | inotify.IN_CLOSE_WRITE
+    | inotify.IN_ATTRIB | inotify.IN_MOVED_TO | inotify.IN_MOVED_FROM
+    | inotify.IN_DELETE | inotify.IN_DELETE_SELF | inotify.IN_ONLYDIR
+)
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts).isoformat(timespec="seconds")
+
+
+class _Dir:
+    """Satu direktori: file langsung + agregat rekursif (size, count)."""
+
+    __slots__ = ("files", "dirs", "mtime", "size", "count")
+
+    def __init__(self, mtime: float = 0.0):
+        self.files: Dict[str, Tuple[int, float]] = {}   # name → (size, mtime)
+        self.dirs: Set[str] = set()
+        self.mtime = mtime
+        self.size = 0
+        self.count = 0
+
+
+class WorkspaceIndex:
+    """
+    Pohon file beberapa root (workspace + download_path tiap service),
+    di-scan sekali dengan os.scandir lalu di-update incremental.
+
+    Tiap direktori menyimpan file langsungnya dan agregat rekursif
+    (total byte, jumlah file), jadi list, cari nama dan "N file
+    terbesar" dijawab dari memori. Perubahan ukuran satu file cukup
+    dirambatkan ke ancestor-nya.
+
+    Mode inotify: satu watch per direktori. Event IN_MODIFY dari
+    deluged yang sedang menulis di-coalesce: path yang berubah dicatat
+    lalu di-stat ulang paling sering tiap `settle` detik. Queue overflow
+    → full rescan segera; tanpa inotify atau watch limit habis → full
+    rescan tiap `poll_interval` detik (selain itu tiap `rescan_interval`
+    sebagai jaring pengaman). Rescan dibangun terpisah lalu di-swap.
+    Entry tersembunyi (nama diawali '.') tidak di-index.
+    """
+
+    def __init__(
+        self,
+        roots: List[str],
+        use_inotify: bool = True,
+        settle: float = 1.0,
+        rescan_interval: float = 300.0,
+        poll_interval: float = 30.0,
+    ):
+        self.roots = self._dedupe(roots)
+        self.use_inotify = use_inotify
+        self.settle = settle
+        self.rescan_interval = rescan_interval
+        self.poll_interval = poll_interval
+        self.mode: Optional[str] = None
+
+        self._dirs: Dict[str, _Dir] = {}
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._dirty: Set[Tuple[str, str]] = set()
+        self._rescan = False
+        self._degraded = False
+        self._scanned_at = 0.0
+        self._ino: Optional["inotify.Inotify"] = None
+        self._wds: Dict[str, int] = {}
+
+        self._stop = threading.Event()
+        self._wake: Optional[tuple] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _dedupe(roots: List[str]) -> List[str]:
+        """Realpath unik; root yang berada di dalam root lain dibuang."""
+        real = sorted({os.path.realpath(r) for r in roots if r}, key=len)
+        out = []
+        for r in real:
+            if not any(r == o or r.startswith(o.rstrip(os.sep) + os.sep) for o in out):
+                out.append(r)
+        return out
+
+    # ─────────────────────────────────────────────
+    # Lifecycle
+    # ─────────────────────────────────────────────
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self) -> None:
+        if self.running:
+            return
+        if self._wake:
+            self.stop()              # pipe worker lama yang sudah mati
+        self._stop.clear()
+        # Pipe dibuat/ditutup oleh start/stop (bukan worker), jadi stop()
+        # tidak pernah menulis ke fd yang sudah ditutup atau dipakai ulang
+        self._wake = os.pipe()
+        self._thread = threading.Thread(
+            target=self._run, name="workspace-index", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        wake = self._wake
+        if wake:
+            # Bangunkan select() inotify supaya stop tidak menunggu timeout
+            try:
+                os.write(wake[1], b"x")
+            except OSError:
+                pass
+        thread, self._thread = self._thread, None
+        if thread:
+            thread.join(timeout=5)
+        # Worker yang masih jalan (join timeout) tetap memegang pipe-nya
+        if wake and not (thread and thread.is_alive()):
+            self._wake = None
+            for fd in wake:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            roots = [self._dirs.get(r) for r in self.roots]
+            return {
+                "mode": self.mode,
+                "ready": self._ready.is_set(),
+                "roots": self.roots,
+                "dirs": len(self._dirs),
+                "files": sum(d.count for d in roots if d),
+                "bytes": sum(d.size for d in roots if d),
+                "watches": len(self._wds),
+                "scanned_at": self._scanned_at,
+            }
+
+    # ─────────────────────────────────────────────
+    # Scan
+    # ─────────────────────────────────────────────
+
+    def _scan_tree(self, top: str) -> Dict[str, _Dir]:
+        """Scan subtree `top` ke dict baru (tanpa lock), agregat terisi."""
+        dirs: Dict[str, _Dir] = {}
+        order = []
+        stack = [top]
+        while stack:
+            path = stack.pop()
+            try:
+                st = os.stat(path)
+                node = _Dir(st.st_mtime)
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if entry.name.startswith("."):
+                            continue
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                node.dirs.add(entry.name)
+                                stack.append(entry.path)
+                            elif entry.is_file(follow_symlinks=False):
+                                est = entry.stat(follow_symlinks=False)
+                                node.files[entry.name] = (est.st_size, est.st_mtime)
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+            dirs[path] = node
+            order.append(path)
+
+        # Agregat bottom-up: child selalu muncul setelah parent di `order`
+        for path in reversed(order):
+            node = dirs[path]
+            node.size = sum(s for s, _ in node.files.values())
+            node.count = len(node.files)
+            kept = set()
+            for name in node.dirs:
+                child = dirs.get(os.path.join(path, name))
+                if child is not None:
+                    node.size += child.size
+                    node.count += child.count
+                    kept.add(name)
+            node.dirs = kept
+        return dirs
+
+    def _full_scan(self) -> None:
+        t = time.monotonic()
+        fresh: Dict[str, _Dir] = {}
+        for root in self.roots:
+            fresh.update(self._scan_tree(root))
+        with self._lock:
+            self._dirs = fresh
+            self._scanned_at = time.time()
+            if self._ino:
+                self._sync_watches()
+        self._ready.set()
+        logger.info(
+            f"Workspace index: {len(fresh)} dirs scanned in "
+            f"{time.monotonic() - t:.2f}s ({self.mode})"
+        )
+
+    # ─────────────────────────────────────────────
+    # Incremental update (dipanggil dengan lock)
+    # ─────────────────────────────────────────────
+
+    def _propagate(self, path: str, size: int, count: int) -> None:
+        while True:
+            node = self._dirs.get(path)
+            if node is None:
+                return
+            node.size += size
+            node.count += count
+            if path in self.roots:
+                return
+            path = os.path.dirname(path)
+
+    def _add_tree(self, path: str) -> None:
+        parent = self._dirs.get(os.path.dirname(path))
+        if parent is None:
+            return
+        self._remove_tree(path)
+        sub = self._scan_tree(path)
+        node = sub.get(path)
+        if node is None:
+            return
+        self._dirs.update(sub)
+        parent.dirs.add(os.path.basename(path))
+        self._propagate(os.path.dirname(path), node.size, node.count)
+        if self._ino:
+            for d in sub:
+                self._watch(d)
+
+    def _remove_tree(self, path: str) -> None:
+        node = self._dirs.get(path)
+        if node is None:
+            return
+        self._propagate(os.path.dirname(path), -node.size, -node.count)
+        parent = self._dirs.get(os.path.dirname(path))
+        if parent is not None:
+            parent.dirs.discard(os.path.basename(path))
+        prefix = path + os.sep
+        for d in [d for d in self._dirs if d == path or d.startswith(prefix)]:
+            del self._dirs[d]
+            wd = self._wds.pop(d, None)
+            if wd is not None and self._ino:
+                self._ino.rm_watch(wd)
+
+    def _update_entry(self, dirpath: str, name: str) -> None:
+        node = self._dirs.get(dirpath)
+        if node is None or name.startswith("."):
+            return
+        path = os.path.join(dirpath, name)
+        try:
+            st = os.lstat(path)
+        except OSError:
+            st = None
+
+        old = node.files.pop(name, None)
+        if old is not None:
+            self._propagate(dirpath, -old[0], -1)
+
+        if st is None:
+            if name in node.dirs:
+                self._remove_tree(path)
+        elif stat.S_ISDIR(st.st_mode):
+            if path not in self._dirs:
+                self._add_tree(path)
+        elif stat.S_ISREG(st.st_mode):
+            if name in node.dirs:
+                self._remove_tree(path)
+            node.files[name] = (st.st_size, st.st_mtime)
+            self._propagate(dirpath, st.st_size, 1)
+
+    # ─────────────────────────────────────────────
+    # inotify
+    # ─────────────────────────────────────────────
+
+    def _watch(self, path: str) -> None:
+        if path in self._wds:
+            return
+        try:
+            self._wds[path] = self._ino.add_watch(path, _MASK)
+        except OSError as e:
+            # Biasanya ENOSPC (max_user_watches): lanjut dengan rescan periodik
+            if not self._degraded:
+                logger.warning(f"inotify watch failed for {path} ({e}), periodic rescan")
+            self._degraded = True
+
+    def _sync_watches(self) -> None:
+        for path in list(self._wds):
+            if path not in self._dirs:
+                self._ino.rm_watch(self._wds.pop(path))
+        for path in self._dirs:
+            self._watch(path)
+
+    def _on_events(self, events: List["inotify.Event"]) -> None:
+        with self._lock:
+            for ev in events:
+                if ev.mask & inotify.IN_Q_OVERFLOW:
+                    self._rescan = True
+                    continue
+                dirpath = self._ino.watches.get(ev.wd)
+                if dirpath is None:
+                    continue
+                if ev.mask & inotify.IN_DELETE_SELF:
+                    self._remove_tree(dirpath)
+                    continue
+                if not ev.name:
+                    continue
+                if ev.mask & inotify.IN_ISDIR:
+                    # Direktori baru/hilang langsung di-apply (perlu watch)
+                    self._update_entry(dirpath, ev.name)
+                else:
+                    self._dirty.add((dirpath, ev.name))
+
+    def _flush_dirty(self) -> None:
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            for dirpath, name in dirty:
+                self._update_entry(dirpath, name)
+
+    def _open_inotify(self) -> Optional["inotify.Inotify"]:
+        if not (self.use_inotify and inotify.available()):
+            return None
+        try:
+            return inotify.Inotify()
+        except OSError as e:
+            logger.warning(f"inotify unavailable ({e}), workspace index polls")
+            return None
+
+    def _interval(self) -> float:
+        if self._ino and not self._degraded:
+            return self.rescan_interval
+        return self.poll_interval
+
+    def _run(self) -> None:
+        self._ino = self._open_inotify()
+        self.mode = "inotify" if self._ino else "poll"
+
+        try:
+            self._full_scan()
+            next_scan = time.monotonic() + self._interval()
+            next_flush = 0.0
+            while not self._stop.is_set():
+                now = time.monotonic()
+                deadline = min(next_scan, next_flush) if self._dirty else next_scan
+                timeout = max(0.0, deadline - now)
+                if self._ino:
+                    self._on_events(self._ino.read(timeout, self._wake[0]))
+                else:
+                    self._stop.wait(timeout)
+
+                now = time.monotonic()
+                if self._dirty and now >= next_flush:
+                    self._flush_dirty()
+                    next_flush = now + self.settle
+                if self._rescan or now >= next_scan:
+                    self._rescan = False
+                    self._full_scan()
+                    next_scan = time.monotonic() + self._interval()
+        except Exception as e:
+            logger.error(f"Workspace index stopped: {e}")
+        finally:
+            if self._ino:
+                self._ino.close()
+                self._ino = None
+            self._wds.clear()
+
+    # ─────────────────────────────────────────────
+    # Query
+    # ─────────────────────────────────────────────
+
+    def covers(self, path: str) -> bool:
+        return any(
+            path == r or path.startswith(r.rstrip(os.sep) + os.sep) for r in self.roots
+        )
+
+    def listing(self, path: str) -> Optional[List[Dict[str, Any]]]:
+        """Isi satu direktori; size direktori = total rekursif."""
+        with self._lock:
+            node = self._dirs.get(path)
+            if node is None:
+                return None
+            items = []
+            for name in node.dirs:
+                child = self._dirs.get(os.path.join(path, name))
+                if child is None:
+                    continue
+                items.append({
+                    "name": name, "type": "dir", "size": child.size,
+                    "files": child.count, "modified": _iso(child.mtime),
+                })
+            for name, (size, mtime) in node.files.items():
+                items.append({
+                    "name": name, "type": "file", "size": size,
+                    "modified": _iso(mtime),
+                })
+        items.sort(key=lambda i: (i["type"] != "dir", i["name"]))
+        return items
+
+    def summary(self, path: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            node = self._dirs.get(path)
+            if node is None:
+                return None
+            return {"size": node.size, "files": node.count, "dirs": len(node.dirs)}
+
+    def _subtree(self, path: str):
+        prefix = path.rstrip(os.sep) + os.sep
+        for dirpath, node in self._dirs.items():
+            if dirpath == path or dirpath.startswith(prefix):
+                yield dirpath, node
+
+    def search(self, text: str, path: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """File/direktori yang namanya mengandung `text` (case-insensitive)."""
+        needle = text.lower()
+        out = []
+        with self._lock:
+            for dirpath, node in self._subtree(path):
+                for name in node.dirs:
+                    if needle in name.lower():
+                        child = self._dirs.get(os.path.join(dirpath, name))
+                        out.append({
+                            "path": os.path.join(dirpath, name), "type": "dir",
+                            "size": child.size if child else 0,
+                        })
+                for name, (size, _) in node.files.items():
+                    if needle in name.lower():
+                        out.append({
+                            "path": os.path.join(dirpath, name), "type": "file",
+                            "size": size,
+                        })
+                if len(out) >= limit:
+                    break
+        out.sort(key=lambda i: i["path"])
+        return out[:limit]
+
+    def largest(self, path: str, n: int = 20) -> List[Dict[str, Any]]:
+        """N file terbesar di bawah `path`."""
+        with self._lock:
+            top = heapq.nlargest(
+                n,
+                (
+                    (size, dirpath, name)
+                    for dirpath, node in self._subtree(path)
+                    for name, (size, _) in node.files.items()
+                ),
+            )
+        return [
+            {"path": os.path.join(d, name), "type": "file", "size": size}
+            for size, d, name in top
+        ]
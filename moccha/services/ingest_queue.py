@@ -0,0 +1,529 @@
+"""Bulk ingest queue - magnet/URL ditambahkan bertahap, tercatat di journal."""
+
+import os
+import json
+import time
+import heapq
+import base64
+import logging
+import binascii
+import threading
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+logger = logging.getLogger(__name__)
+
+# Status item
+QUEUED = "queued"
+RUNNING = "running"
+RETRY = "retry"
+DONE = "done"
+DUPLICATE = "duplicate"
+FAILED = "failed"
+
+FINISHED = (DONE, DUPLICATE, FAILED)
+
+
+def magnet_infohash(magnet: str) -> Optional[str]:
+    """Info hash (hex lowercase) dari magnet `xt=urn:btih:`, atau None."""
+    try:
+        params = parse_qs(urlparse(magnet).query)
+    except ValueError:
+        return None
+
+    for xt in params.get("xt", []):
+        if not xt.lower().startswith("urn:btih:"):
+            continue
+        value = xt[9:]
+        if len(value) == 40:
+            try:
+                int(value, 16)
+                return value.lower()
+            except ValueError:
+                return None
+        if len(value) == 32:
+            try:
+                return binascii.hexlify(base64.b32decode(value.upper())).decode()
+            except (binascii.Error, ValueError):
+                return None
+    return None
+
+
+def is_duplicate_error(error: Any) -> bool:
+    """
+    Error dari daemon karena torrent sudah ada. Deluge 2 raise
+    AddTorrentError ("Torrent already in session (<id>)." / "...already
+    being added") alih-alih mengembalikan None seperti Deluge 1.
+    """
+    text = str(error).lower()
+    return "already in session" in text or "already being added" in text
+
+
+def classify(line: str) -> Optional[Dict[str, str]]:
+    """Baris input → {"kind", "source", "key"} atau None jika bukan item."""
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+
+    if line.startswith("magnet:"):
+        infohash = magnet_infohash(line)
+        if not infohash:
+            return None
+        return {"kind": "magnet", "source": line, "key": infohash}
+
+    if line.startswith(("http://", "https://")):
+        return {"kind": "url", "source": line, "key": line}
+
+    return None
+
+
+class IngestQueue:
+    """
+    Queue persistent untuk add torrent dalam jumlah besar.
+
+    Semua perubahan ditulis ke journal JSON-lines (append-only), jadi
+    setelah daemon restart queue di-replay dan item yang belum selesai
+    dilanjutkan. Worker pool mengirim item ke deluged dengan batas
+    konkurensi, rate limit (token bucket), backpressure jumlah magnet
+    yang masih resolve metadata, deteksi duplikat, dan retry dengan
+    backoff.
+
+    Args:
+        journal_path:         File journal (.jsonl).
+        submit:               fn(kind, source) → torrent_id, atau None
+                              jika daemon menolak karena sudah ada.
+        known:                fn(infohash) → True jika torrent sudah ada.
+        pending_metadata:     fn() → jumlah magnet yang masih resolve.
+        workers:              Jumlah worker thread.
+        rate:                 Maksimum item per detik (0 = tanpa limit).
+        max_attempts:         Percobaan sebelum item dianggap gagal.
+        retry_delay:          Delay awal retry (detik), dobel tiap gagal.
+        max_pending_metadata: Worker menunggu selama jumlah magnet yang
+                              resolve metadata ≥ nilai ini (0 = off).
+        keep_finished:        Jumlah item selesai yang disimpan (status
+                              dan deteksi duplikat); yang lebih tua dibuang.
+        finished_ttl:         Item selesai dibuang setelah sekian detik.
+    """
+
+    COMPACT_MIN_LINES = 1000
+
+    def __init__(
+        self,
+        journal_path: str,
+        submit: Callable[[str, str], Optional[str]],
+        known: Optional[Callable[[str], bool]] = None,
+        pending_metadata: Optional[Callable[[], int]] = None,
+        workers: int = 4,
+        rate: float = 5.0,
+        max_attempts: int = 3,
+        retry_delay: float = 5.0,
+        max_pending_metadata: int = 20,
+        keep_finished: int = 1000,
+        finished_ttl: float = 24 * 3600,
+    ):
+        self.journal_path = journal_path
+        self._submit = submit
+        self._known = known
+        self._pending_metadata = pending_metadata
+        self.workers = max(1, int(workers))
+        self.rate = float(rate)
+        self.max_attempts = max(1, int(max_attempts))
+        self.retry_delay = float(retry_delay)
+        self.max_pending_metadata = int(max_pending_metadata)
+        self.keep_finished = max(0, int(keep_finished))
+        self.finished_ttl = float(finished_ttl)
+
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._batches: Dict[str, List[str]] = {}
+        self._by_key: Dict[str, str] = {}
+        self._heap: List[tuple] = []
+        self._seq = 0
+
+        self._cond = threading.Condition()
+        self._journal_lock = threading.Lock()
+        self._journal = None
+        self._journal_lines = 0
+
+        self._tokens = self.rate
+        self._token_time = time.monotonic()
+
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+        self._load()
+
+    # ─────────────────────────────────────────────
+    # Journal
+    # ─────────────────────────────────────────────
+
+    def _load(self) -> None:
+        """Replay journal; item yang belum selesai masuk queue lagi."""
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path) as f:
+                for line in f:
+                    self._journal_lines += 1
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        # Baris terakhir terpotong saat crash
+                        continue
+                    self._replay(rec)
+
+        requeued = 0
+        for item in self._items.values():
+            if item["status"] not in FINISHED:
+                item["status"] = QUEUED
+                self._push(item, 0)
+                requeued += 1
+
+        if requeued:
+            logger.info(f"Ingest queue: resuming {requeued} pending items")
+
+        self._prune()
+        os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+        self._compact_if_needed(force=bool(self._items))
+
+    def _replay(self, rec: Dict[str, Any]) -> None:
+        op = rec.pop("op", None)
+        if op == "item":
+            item = rec
+            self._items[item["id"]] = item
+            self._batches.setdefault(item["batch"], []).append(item["id"])
+            if item["status"] != FAILED:
+                self._by_key[item["key"]] = item["id"]
+        elif op == "update":
+            item = self._items.get(rec.get("id"))
+            if item:
+                item.update(rec)
+                if item["status"] == FAILED and self._by_key.get(item["key"]) == item["id"]:
+                    del self._by_key[item["key"]]
+
+    def _write(self, records: List[Dict[str, Any]], sync: bool = False) -> None:
+        with self._journal_lock:
+            if self._journal is None:
+                self._journal = open(self.journal_path, "a")
+            for rec in records:
+                self._journal.write(json.dumps(rec, separators=(",", ":")) + "\n")
+            self._journal.flush()
+            if sync:
+                os.fsync(self._journal.fileno())
+            self._journal_lines += len(records)
+
+        self._compact_if_needed()
+
+    def _compact_if_needed(self, force: bool = False) -> None:
+        """Tulis ulang journal: satu record per item (temp file + rename)."""
+        if not force and self._journal_lines < max(
+            self.COMPACT_MIN_LINES, 3 * len(self._items)
+        ):
+            return
+
+        # Snapshot diambil di dalam journal lock: tidak ada update yang
+        # bisa ditulis ke journal lama di antara snapshot dan rename.
+        with self._journal_lock:
+            with self._cond:
+                snapshot = [
+                    dict(item, op="item") for item in self._items.values()
+                ]
+            tmp = self.journal_path + ".tmp"
+            with open(tmp, "w") as f:
+                for rec in snapshot:
+                    f.write(json.dumps(rec, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            if self._journal:
+                self._journal.close()
+                self._journal = None
+            os.replace(tmp, self.journal_path)
+            self._journal_lines = len(snapshot)
+
+    def _prune(self) -> None:
+        """
+        Buang item selesai yang lebih tua dari `finished_ttl` atau di luar
+        `keep_finished` terbaru (dipanggil dengan lock). Compaction
+        berikutnya hanya menulis item yang tersisa, jadi journal ikut
+        terbatas.
+        """
+        done = sorted(
+            (item.get("finished") or item["created"], item_id)
+            for item_id, item in self._items.items()
+            if item["status"] in FINISHED
+        )
+        cutoff = time.time() - self.finished_ttl
+        excess = len(done) - self.keep_finished
+        removed = {
+            item_id for i, (finished, item_id) in enumerate(done)
+            if i < excess or finished < cutoff
+        }
+        if not removed:
+            return
+
+        batches = set()
+        for item_id in removed:
+            item = self._items.pop(item_id)
+            batches.add(item["batch"])
+            if self._by_key.get(item["key"]) == item_id:
+                del self._by_key[item["key"]]
+        for batch_id in batches:
+            ids = [i for i in self._batches.get(batch_id, []) if i not in removed]
+            if ids:
+                self._batches[batch_id] = ids
+            else:
+                self._batches.pop(batch_id, None)
+
+    def _update(self, item: Dict[str, Any], **changes) -> None:
+        with self._cond:
+            item.update(changes)
+        self._write([dict(changes, op="update", id=item["id"])])
+
+    # ─────────────────────────────────────────────
+    # Enqueue
+    # ─────────────────────────────────────────────
+
+    def _push(self, item: Dict[str, Any], not_before: float) -> None:
+        self._seq += 1
+        heapq.heappush(self._heap, (not_before, self._seq, item["id"]))
+
+    def enqueue(self, lines: List[str]) -> Dict[str, Any]:
+        """Tambah item (magnet/URL per baris) sebagai satu batch."""
+        batch_id = uuid.uuid4().hex[:12]
+        accepted, duplicates, invalid = [], [], []
+        records = []
+        now = time.time()
+
+        with self._cond:
+            self._prune()
+            for line in lines:
+                parsed = classify(line)
+                if not parsed:
+                    if line.strip() and not line.strip().startswith("#"):
+                        invalid.append(line.strip())
+                    continue
+
+                known = (
+                    parsed["kind"] == "magnet"
+                    and self._known is not None
+                    and self._known(parsed["key"])
+                )
+                existing = self._items.get(self._by_key.get(parsed["key"]))
+                if existing and (
+                    existing["status"] not in FINISHED
+                    or parsed["kind"] != "magnet"
+                    or self._known is None
+                ):
+                    duplicates.append(parsed["source"])
+                    continue
+                # ✅ FIX: Magnet yang sudah selesai tapi torrent-nya sudah
+                # dihapus dari Deluge boleh di-add lagi
+                if known:
+                    duplicates.append(parsed["source"])
+                    continue
+
+                item = {
+                    "id": uuid.uuid4().hex[:16],
+                    "batch": batch_id,
+                    "kind": parsed["kind"],
+                    "source": parsed["source"],
+                    "key": parsed["key"],
+                    "status": QUEUED,
+                    "attempts": 0,
+                    "torrent_id": None,
+                    "error": None,
+                    "created": now,
+                }
+                self._items[item["id"]] = item
+                self._by_key[item["key"]] = item["id"]
+                self._batches.setdefault(batch_id, []).append(item["id"])
+                self._push(item, 0)
+                records.append(dict(item, op="item"))
+                accepted.append(item["id"])
+
+            self._cond.notify_all()
+
+        if records:
+            self._write(records, sync=True)
+
+        return {
+            "success": True,
+            "batch_id": batch_id if accepted else None,
+            "accepted": len(accepted),
+            "duplicates": len(duplicates),
+            "invalid": invalid,
+        }
+
+    # ─────────────────────────────────────────────
+    # Workers
+    # ─────────────────────────────────────────────
+
+    def start(self) -> None:
+        if any(t.is_alive() for t in self._threads):
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(
+                target=self._worker, name=f"ingest-{i}", daemon=True
+            )
+            for i in range(self.workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(timeout=5)
+        self._threads = []
+
+    def _take(self) -> Optional[Dict[str, Any]]:
+        """Ambil item berikutnya yang sudah waktunya; blok sampai ada."""
+        with self._cond:
+            while not self._stop.is_set():
+                if self._heap:
+                    not_before, _, item_id = self._heap[0]
+                    wait = not_before - time.monotonic()
+                    if wait <= 0:
+                        heapq.heappop(self._heap)
+                        item = self._items.get(item_id)
+                        if item and item["status"] in (QUEUED, RETRY):
+                            item["status"] = RUNNING
+                            return item
+                        continue
+                    self._cond.wait(min(wait, 1.0))
+                else:
+                    self._cond.wait(1.0)
+        return None
+
+    def _acquire_token(self) -> bool:
+        """Token bucket; False jika queue dihentikan selama menunggu."""
+        if self.rate <= 0:
+            return True
+        while not self._stop.is_set():
+            with self._cond:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.rate, self._tokens + (now - self._token_time) * self.rate
+                )
+                self._token_time = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            self._stop.wait(wait)
+        return False
+
+    def _wait_metadata_capacity(self) -> bool:
+        if not self._pending_metadata or self.max_pending_metadata <= 0:
+            return True
+        while not self._stop.is_set():
+            try:
+                if self._pending_metadata() < self.max_pending_metadata:
+                    return True
+            except Exception:
+                return True
+            self._stop.wait(1.0)
+        return False
+
+    def _worker(self) -> None:
+        while not self._stop.is_set():
+            item = self._take()
+            if item is None:
+                return
+
+            if not (self._wait_metadata_capacity() and self._acquire_token()):
+                # Dihentikan; item dilanjutkan saat start berikutnya
+                with self._cond:
+                    item["status"] = QUEUED
+                    self._push(item, 0)
+                return
+
+            self._process(item)
+
+    def _process(self, item: Dict[str, Any]) -> None:
+        attempts = item["attempts"] + 1
+        if item["kind"] == "magnet" and self._known and self._known(item["key"]):
+            self._update(item, status=DUPLICATE, attempts=attempts,
+                         error="Torrent already in session", finished=time.time())
+            return
+
+        try:
+            torrent_id = self._submit(item["kind"], item["source"])
+        except Exception as e:
+            if is_duplicate_error(e):
+                # ✅ FIX: Deluge 2 raise AddTorrentError; retry tidak berguna
+                self._update(item, status=DUPLICATE, attempts=attempts,
+                             error="Torrent already in session", finished=time.time())
+                return
+            if attempts >= self.max_attempts:
+                self._update(item, status=FAILED, attempts=attempts,
+                             error=str(e), finished=time.time())
+                with self._cond:
+                    if self._by_key.get(item["key"]) == item["id"]:
+                        del self._by_key[item["key"]]
+                return
+
+            delay = self.retry_delay * (2 ** (attempts - 1))
+            self._update(item, status=RETRY, attempts=attempts, error=str(e))
+            with self._cond:
+                self._push(item, time.monotonic() + delay)
+                self._cond.notify()
+            return
+
+        if torrent_id is None:
+            self._update(item, status=DUPLICATE, attempts=attempts,
+                         error="Torrent already in session", finished=time.time())
+        else:
+            self._update(item, status=DONE, attempts=attempts,
+                         torrent_id=torrent_id, error=None, finished=time.time())
+
+    # ─────────────────────────────────────────────
+    # Query
+    # ─────────────────────────────────────────────
+
+    @staticmethod
+    def _counts(items: List[Dict[str, Any]]) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for item in items:
+            counts[item["status"]] = counts.get(item["status"], 0) + 1
+        return counts
+
+    def summary(self) -> Dict[str, Any]:
+        with self._cond:
+            batches = {
+                batch_id: self._counts([self._items[i] for i in ids])
+                for batch_id, ids in self._batches.items()
+            }
+            totals = self._counts(list(self._items.values()))
+        return {
+            "success": True,
+            "running": any(t.is_alive() for t in self._threads),
+            "totals": totals,
+            "batches": batches,
+        }
+
+    def batch(
+        self,
+        batch_id: str,
+        status: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 100,
+    ) -> Dict[str, Any]:
+        with self._cond:
+            ids = self._batches.get(batch_id)
+            if ids is None:
+                return {"success": False, "error": f"Unknown batch: {batch_id}"}
+            items = [dict(self._items[i]) for i in ids]
+
+        counts = self._counts(items)
+        if status:
+            items = [i for i in items if i["status"] == status]
+
+        return {
+            "success": True,
+            "batch_id": batch_id,
+            "counts": counts,
+            "total": len(items),
+            "items": items[offset:offset + limit],
+        }
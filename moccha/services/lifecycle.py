@@ -0,0 +1,304 @@
+"""Scheduler start/stop service: paralel di thread pool, urut dependency."""
+
+import json
+import time
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# State per service
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+TIMEOUT = "timeout"
+SKIPPED = "skipped"
+
+FINAL_STATES = (DONE, FAILED, TIMEOUT, SKIPPED)
+
+# Komentar SSE agar tunnel/proxy tidak menutup koneksi idle
+PING_INTERVAL = 15.0
+
+
+def _message(event: str, data: Any, seq: Optional[int] = None) -> bytes:
+    lines = []
+    if seq is not None:
+        lines.append(f"id: {seq}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, separators=(",", ":")))
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+class LifecycleRun:
+    """
+    Satu putaran start_all / stop_all.
+
+    `tasks` memetakan nama service → callable yang mengembalikan result
+    dict ({"success": ...}). `deps` berisi dependency yang dideklarasikan
+    (start: service menunggu dependency-nya selesai; stop: urutan dibalik,
+    dependency baru di-stop setelah semua dependent-nya). Service yang
+    siap langsung dijalankan di pool, tanpa menunggu "level" lain selesai.
+
+    Timeout per service tidak bisa membunuh thread-nya; service ditandai
+    `timeout`, dependent-nya di-skip, dan thread dibiarkan selesai sendiri.
+    Untuk start, dependency yang gagal/timeout membuat dependent di-skip;
+    untuk stop, service tetap di-stop walau dependent-nya gagal.
+
+    Progress dicatat sebagai event berurutan (`events()` / `sse()`),
+    jadi client bisa mengikuti per service sejak awal atau menyusul.
+    """
+
+    def __init__(
+        self,
+        action: str,
+        tasks: Dict[str, Callable[[], Dict[str, Any]]],
+        deps: Dict[str, List[str]],
+        timeouts: Dict[str, float],
+        workers: int = 4,
+        after: Optional["LifecycleRun"] = None,
+    ):
+        self.action = action
+        self._tasks = tasks
+        self._timeouts = timeouts
+        self._workers = max(1, workers)
+        self._after = after
+        self._stop_mode = action == "stop"
+
+        # Dependency ke service yang tidak ada di run ini diabaikan untuk
+        # stop, tapi untuk start berarti service tidak bisa jalan.
+        self._missing: Dict[str, List[str]] = {}
+        self._waits: Dict[str, Set[str]] = {name: set() for name in tasks}
+        for name in tasks:
+            for dep in deps.get(name) or []:
+                if dep == name:
+                    continue
+                if dep not in tasks:
+                    if not self._stop_mode:
+                        self._missing.setdefault(name, []).append(dep)
+                    continue
+                if self._stop_mode:
+                    self._waits[dep].add(name)
+                else:
+                    self._waits[name].add(dep)
+
+        self.states: Dict[str, Dict[str, Any]] = {
+            name: {"service": name, "state": PENDING} for name in tasks
+        }
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+        self._events: List[Dict[str, Any]] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    # ─────────────────────────────────────────────
+    # Control
+    # ─────────────────────────────────────────────
+
+    def start(self) -> "LifecycleRun":
+        self._thread = threading.Thread(
+            target=self._run, name=f"lifecycle-{self.action}", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    def wait(self, timeout: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """Tunggu run selesai → {service: result} (format start_all lama)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.done, timeout)
+            return dict(self.results)
+
+    # ─────────────────────────────────────────────
+    # Progress
+    # ─────────────────────────────────────────────
+
+    def _emit(self, name: Optional[str], state: str, **extra) -> None:
+        with self._cond:
+            elapsed = round((time.time() - (self.started_at or time.time())) * 1000, 1)
+            event = {"seq": len(self._events), "action": self.action, "state": state,
+                     "elapsed_ms": elapsed}
+            if name is not None:
+                event["service"] = name
+                self.states[name].update(state=state, elapsed_ms=elapsed, **extra)
+            event.update(extra)
+            self._events.append(event)
+            self._cond.notify_all()
+
+    def _finish(self, name: str, state: str, result: Dict[str, Any]) -> None:
+        self.results[name] = result
+        extra = {}
+        if state != DONE:
+            extra["error"] = result.get("error", "unknown error")
+        if "duration_ms" in result:
+            extra["duration_ms"] = result["duration_ms"]
+        self._emit(name, state, **extra)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            counts: Dict[str, int] = {}
+            for s in self.states.values():
+                counts[s["state"]] = counts.get(s["state"], 0) + 1
+            return {
+                "action": self.action,
+                "done": self.done,
+                "success": self.done and all(
+                    s["state"] == DONE for s in self.states.values()
+                ),
+                "counts": counts,
+                "services": {n: dict(s) for n, s in self.states.items()},
+                "elapsed_ms": round(
+                    ((self.finished_at or time.time()) - self.started_at) * 1000, 1
+                ) if self.started_at else 0,
+            }
+
+    def events(self, since: int = 0, timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Event mulai dari `since` sampai run selesai. Jika `timeout` diisi,
+        yield None setiap kali tidak ada event baru selama `timeout` detik.
+        """
+        pos = since
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: pos < len(self._events) or self.done, timeout
+                )
+                batch = self._events[pos:]
+                finished = self.done
+            if not batch and not finished:
+                yield None
+                continue
+            for event in batch:
+                yield event
+            pos += len(batch)
+            if finished and pos >= len(self._events):
+                return
+
+    def sse(self, since: int = 0) -> Iterator[bytes]:
+        """Stream SSE: satu event `progress` per perubahan, lalu `complete`."""
+        yield b"retry: 3000\n\n"
+        for event in self.events(since, timeout=PING_INTERVAL):
+            if event is None:
+                yield b": ping\n\n"
+            else:
+                yield _message("progress", event, event["seq"])
+        yield _message("complete", self.snapshot())
+
+    # ─────────────────────────────────────────────
+    # Scheduler
+    # ─────────────────────────────────────────────
+
+    def _call(self, name: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            result = self._tasks[name]()
+        except Exception as e:
+            logger.error(f"{self.action} {name} failed: {e}")
+            result = {"success": False, "error": str(e)}
+        if not isinstance(result, dict):
+            result = {"success": bool(result)}
+        result.setdefault("duration_ms", round((time.perf_counter() - started) * 1000, 1))
+        return result
+
+    def _skip_dependents(self, failed: str, waits: Dict[str, Set[str]]) -> None:
+        """Start: dependent (transitif) dari service gagal tidak dijalankan."""
+        stack = [failed]
+        while stack:
+            current = stack.pop()
+            for name, pending in list(waits.items()):
+                if current in pending:
+                    del waits[name]
+                    self._finish(name, SKIPPED, {
+                        "success": False,
+                        "error": f"dependency '{current}' did not {self.action}",
+                    })
+                    stack.append(name)
+
+    def _release(self, name: str, ok: bool, waits: Dict[str, Set[str]]) -> None:
+        if ok or self._stop_mode:
+            for pending in waits.values():
+                pending.discard(name)
+        else:
+            self._skip_dependents(name, waits)
+
+    def _run(self) -> None:
+        if self._after is not None:
+            self._after.wait()
+
+        self.started_at = time.time()
+        self._emit(None, "begin", services=list(self._tasks))
+
+        waits = {name: set(deps) for name, deps in self._waits.items()}
+        for name, missing in self._missing.items():
+            del waits[name]
+            self._finish(name, SKIPPED, {
+                "success": False,
+                "error": f"dependency not available: {', '.join(missing)}",
+            })
+            self._release(name, False, waits)
+
+        pool = ThreadPoolExecutor(
+            max_workers=self._workers, thread_name_prefix=f"lifecycle-{self.action}"
+        )
+        running: Dict[Future, str] = {}
+        deadlines: Dict[str, float] = {}
+        try:
+            while waits or running:
+                for name in [n for n, pending in waits.items() if not pending]:
+                    del waits[name]
+                    timeout = self._timeouts.get(name)
+                    if timeout:
+                        deadlines[name] = time.monotonic() + timeout
+                    self._emit(name, RUNNING)
+                    running[pool.submit(self._call, name)] = name
+
+                if not running:
+                    # Sisa yang masih menunggu = siklus dependency
+                    for name in list(waits):
+                        del waits[name]
+                        self._finish(name, SKIPPED, {
+                            "success": False, "error": "dependency cycle",
+                        })
+                    break
+
+                pending_deadlines = [deadlines[n] for n in running.values() if n in deadlines]
+                wait_for = None
+                if pending_deadlines:
+                    wait_for = max(0.0, min(pending_deadlines) - time.monotonic())
+                finished, _ = wait(list(running), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+                for future in finished:
+                    name = running.pop(future)
+                    result = future.result()
+                    ok = bool(result.get("success"))
+                    self._finish(name, DONE if ok else FAILED, result)
+                    self._release(name, ok, waits)
+
+                now = time.monotonic()
+                for future, name in list(running.items()):
+                    if name in deadlines and now >= deadlines[name]:
+                        del running[future]
+                        timeout = self._timeouts[name]
+                        logger.warning(f"{self.action} {name} timed out after {timeout:g}s")
+                        self._finish(name, TIMEOUT, {
+                            "success": False,
+                            "error": f"{self.action} timed out after {timeout:g}s",
+                        })
+                        self._release(name, False, waits)
+        finally:
+            # Thread yang timeout dibiarkan selesai sendiri
+            pool.shutdown(wait=False)
+            with self._cond:
+                self.finished_at = time.time()
+                snap = self.snapshot()
+                self._emit(None, "end", success=snap["success"], counts=snap["counts"])
+            logger.info(
+                f"{self.action}_all finished in {snap['elapsed_ms']:.0f} ms: {snap['counts']}"
+            )
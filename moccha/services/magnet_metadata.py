@@ -0,0 +1,273 @@
+"""Magnet metadata-first: ambil metadata dulu, add hanya file yang dipilih."""
+
+import time
+import base64
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+from moccha.utils.bencode import BencodeError, bdecode, bencode, info_bytes
+from .ingest_queue import is_duplicate_error, magnet_infohash
+from .torrent_files import PRIORITY_SKIP, FileSelection
+
+logger = logging.getLogger(__name__)
+
+# State magnet
+METADATA = "metadata"    # menunggu metadata dari swarm
+ADDED = "added"          # ditambahkan dengan priority sesuai aturan
+HOLD = "hold"            # ditambahkan paused, semua file skip → pilih manual
+DUPLICATE = "duplicate"
+FAILED = "failed"
+
+FINISHED = (ADDED, HOLD, DUPLICATE, FAILED)
+
+
+def magnet_trackers(magnet: str) -> List[str]:
+    """URL tracker (`tr=`) dari magnet, urut sesuai magnet."""
+    try:
+        return parse_qs(urlparse(magnet).query).get("tr", [])
+    except ValueError:
+        return []
+
+
+def _text(value: Any) -> str:
+    return value.decode("utf-8", "replace") if isinstance(value, bytes) else str(value)
+
+
+def metadata_info(metadata: bytes) -> bytes:
+    """Raw dict `info` dari hasil prefetch (info dict, atau torrent utuh)."""
+    decoded = bdecode(metadata)
+    if not isinstance(decoded, dict):
+        raise BencodeError("Metadata must be a bencoded dict")
+    return info_bytes(metadata) if b"info" in decoded else metadata
+
+
+def metadata_files(info: bytes) -> List[Dict[str, Any]]:
+    """Daftar file (index, path, size) dari raw info dict, format Deluge."""
+    decoded = bdecode(info)
+    if not isinstance(decoded, dict) or b"name" not in decoded:
+        raise BencodeError("Info dict has no name")
+
+    name = _text(decoded[b"name"])
+    if b"files" not in decoded:
+        if b"length" not in decoded:
+            raise BencodeError("Unsupported torrent layout (v2-only?)")
+        return [{'index': 0, 'path': name, 'size': int(decoded[b"length"])}]
+
+    return [
+        {
+            'index': i,
+            'path': "/".join([name] + [_text(p) for p in f.get(b"path", [])]),
+            'size': int(f.get(b"length", 0)),
+        }
+        for i, f in enumerate(decoded[b"files"])
+    ]
+
+
+def torrent_bytes(info: bytes, trackers: List[str]) -> bytes:
+    """
+    File .torrent dari raw info dict + tracker magnet. Info dict disisip
+    apa adanya supaya info hash tidak berubah.
+    """
+    parts = [b"d"]
+    if trackers:
+        parts += [b"8:announce", bencode(trackers[0])]
+        parts += [b"13:announce-list", bencode([[t] for t in trackers])]
+    parts += [b"4:info", info, b"e"]
+    return b"".join(parts)
+
+
+class MagnetPrefetcher:
+    """
+    Magnet ditambahkan setelah metadata-nya ada, dengan priority file
+    sudah terpasang sejak add. Byte file yang tidak dipilih tidak pernah
+    di-request dari peer maupun dialokasikan di disk.
+
+    Alur per magnet (di worker thread):
+      1. prefetch(magnet, timeout) → (torrent_id, metadata) tanpa
+         menambah torrent ke session
+      2. file list dari metadata dicocokkan dengan FileSelection
+      3. add(name, torrent, priorities, paused) sebagai .torrent
+
+    Tanpa aturan include/exclude (atau tidak ada file yang cocok),
+    torrent ditambahkan paused dengan semua file skip (state `hold`):
+    pilih file lewat /files/priority lalu resume.
+
+    Args:
+        prefetch: fn(magnet, timeout) → (torrent_id, metadata bytes);
+                  metadata kosong = timeout.
+        add:      fn(filename, torrent bytes, priorities, paused) →
+                  torrent_id, atau None jika sudah ada.
+        known:    fn(torrent_id) → True jika torrent sudah di session;
+                  magnet seperti itu tidak di-prefetch.
+        timeout:  Batas tunggu metadata (detik).
+        workers:  Jumlah prefetch paralel.
+        keep:     Jumlah record selesai yang disimpan untuk status.
+    """
+
+    def __init__(
+        self,
+        prefetch: Callable[[str, float], Tuple[str, bytes]],
+        add: Callable[[str, bytes, List[int], bool], Optional[str]],
+        known: Optional[Callable[[str], bool]] = None,
+        timeout: float = 60.0,
+        workers: int = 4,
+        keep: int = 200,
+    ):
+        self._prefetch = prefetch
+        self._add = add
+        self._known = known
+        self.timeout = float(timeout)
+        self.workers = max(1, int(workers))
+        self.keep = keep
+
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._cond = threading.Condition()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    # ─────────────────────────────────────────────
+    # API
+    # ─────────────────────────────────────────────
+
+    def submit(self, magnet: str, selection: FileSelection) -> Dict[str, Any]:
+        """Mulai prefetch di background; return record awal."""
+        tid = magnet_infohash(magnet)
+        if not tid:
+            return {"success": False, "error": "Magnet has no valid btih info hash"}
+
+        with self._cond:
+            current = self._items.get(tid)
+            if current and current["state"] == METADATA:
+                return {"success": True, "pending": True, **self._public(current)}
+
+            record = {
+                "torrent_id": tid,
+                "state": METADATA,
+                "started": time.time(),
+                "include": [m.glob for m in selection.include],
+                "exclude": [m.glob for m in selection.exclude],
+            }
+            self._items[tid] = record
+            self._prune()
+
+            # ✅ FIX: Sudah di session → jangan fetch metadata sama sekali
+            if self._known and self._known(tid):
+                record.update(state=DUPLICATE, finished=time.time(),
+                              error="Torrent already in session")
+                return {"success": False, "duplicate": True, **self._public(record)}
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="magnet-meta"
+                )
+            pool = self._pool
+
+        pool.submit(self._run, magnet, selection, record)
+        return {"success": True, "pending": True, **self._public(record)}
+
+    def get(self, torrent_id: str, wait: float = 0) -> Optional[Dict[str, Any]]:
+        """Record magnet; `wait` > 0 = long-poll sampai state selesai."""
+        deadline = time.monotonic() + wait
+        with self._cond:
+            while True:
+                record = self._items.get(torrent_id)
+                if record is None:
+                    return None
+                remaining = deadline - time.monotonic()
+                if record["state"] in FINISHED or remaining <= 0:
+                    return self._public(record)
+                self._cond.wait(remaining)
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._cond:
+            return [self._public(r) for r in self._items.values()]
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return sum(1 for r in self._items.values() if r["state"] == METADATA)
+
+    def stop(self) -> None:
+        with self._cond:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown(wait=False)
+
+    # ─────────────────────────────────────────────
+    # Worker
+    # ─────────────────────────────────────────────
+
+    @staticmethod
+    def _public(record: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: v for k, v in record.items() if not k.startswith("_")}
+
+    def _prune(self) -> None:
+        done = [t for t, r in self._items.items() if r["state"] in FINISHED]
+        for tid in done[:max(0, len(done) - self.keep)]:
+            del self._items[tid]
+
+    def _finish(self, record: Dict[str, Any], state: str, **fields) -> None:
+        with self._cond:
+            record.update(fields, state=state, finished=time.time())
+            self._cond.notify_all()
+
+    def _run(self, magnet: str, selection: FileSelection, record: Dict[str, Any]) -> None:
+        tid = record["torrent_id"]
+        try:
+            _, metadata = self._prefetch(magnet, self.timeout)
+            if not metadata:
+                self._finish(
+                    record, FAILED,
+                    error=f"Metadata not received within {self.timeout:.0f}s",
+                )
+                return
+
+            info = metadata_info(metadata)
+            files = metadata_files(info)
+            priorities = selection.priorities(files) if selection else (
+                [PRIORITY_SKIP] * len(files)
+            )
+            selected = [p != PRIORITY_SKIP for p in priorities]
+            hold = not any(selected)
+
+            name = files[0]["path"].split("/", 1)[0] if files else tid
+            added = self._add(
+                f"{name}.torrent",
+                torrent_bytes(info, magnet_trackers(magnet)),
+                priorities,
+                hold,
+            )
+            summary = {
+                "name": name,
+                "file_count": len(files),
+                "selected_count": sum(selected),
+                "selected_bytes": sum(
+                    f["size"] for f, s in zip(files, selected) if s
+                ),
+                "total_bytes": sum(f["size"] for f in files),
+            }
+            if added is None:
+                self._finish(record, DUPLICATE, **summary)
+            else:
+                self._finish(record, HOLD if hold else ADDED, **summary)
+            logger.info(
+                f"Magnet {tid}: {summary['selected_count']}/{len(files)} files "
+                f"selected ({record['state']})"
+            )
+
+        except Exception as e:
+            if is_duplicate_error(e):
+                self._finish(record, DUPLICATE, error="Torrent already in session")
+                return
+            logger.error(f"Magnet metadata-first add failed for {tid}: {e}")
+            self._finish(record, FAILED, error=str(e))
+
+
+def decode_prefetch(result: Any) -> Tuple[str, bytes]:
+    """Hasil core.prefetch_magnet_metadata → (torrent_id, metadata bytes)."""
+    tid, metadata = result
+    if isinstance(tid, bytes):
+        tid = tid.decode()
+    if isinstance(metadata, str):
+        metadata = metadata.encode()
+    return tid, base64.b64decode(metadata) if metadata else b""
@@ -0,0 +1,132 @@
+"""Registry service: nama → kelas, di-import hanya saat pertama dipakai."""
+
+import time
+import logging
+import importlib
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Plugin service pihak ketiga:
+#   entry_points={"moccha.services": ["mega = moccha_mega:MegaService"]}
+ENTRY_POINT_GROUP = "moccha.services"
+
+
+def _entry_points(group: str) -> List[Any]:
+    """Entry point `group` tanpa meng-import target-nya."""
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:                       # Python 3.7
+        try:
+            from importlib_metadata import entry_points
+        except ImportError:
+            return []
+    try:
+        eps = entry_points()
+        if hasattr(eps, "select"):
+            return list(eps.select(group=group))
+        return list(eps.get(group, []))
+    except Exception as e:
+        logger.warning(f"Failed to read '{group}' entry points: {e}")
+        return []
+
+
+class ServiceSpec:
+    """Satu service terdaftar: target "module:Class", di-load sekali."""
+
+    def __init__(self, name: str, target: str, source: str = "builtin"):
+        self.name = name
+        self.target = target
+        self.source = source
+        self.import_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self._cls: Optional[type] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._cls is not None
+
+    def load(self) -> type:
+        """Import module service (sekali); ImportError diteruskan ke caller."""
+        if self._cls is not None:
+            return self._cls
+        with self._lock:
+            if self._cls is None:
+                module_name, _, attr = self.target.partition(":")
+                started = time.perf_counter()
+                try:
+                    module = importlib.import_module(module_name)
+                    cls = getattr(module, attr) if attr else module
+                except Exception as e:
+                    self.error = str(e)
+                    raise
+                self.import_ms = round((time.perf_counter() - started) * 1000, 1)
+                self.error = None
+                self._cls = cls
+                logger.debug(f"Service '{self.name}' loaded in {self.import_ms} ms")
+        return self._cls
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "target": self.target,
+            "source": self.source,
+            "loaded": self.loaded,
+            "import_ms": self.import_ms,
+            "error": self.error,
+        }
+
+
+class ServiceRegistry:
+    """
+    Mapping nama service → ServiceSpec.
+
+    Sumber: `builtin` ({name: "module:Class"}) lalu entry point group
+    `moccha.services` dari package yang ter-install (nama yang sama
+    menimpa builtin). Metadata entry point baru dibaca saat registry
+    pertama di-enumerate, dan modul service baru di-import oleh
+    `load()` — service yang disabled atau tidak dipakai tidak menambah
+    waktu import maupun init.
+    """
+
+    def __init__(self, builtin: Dict[str, str], group: Optional[str] = ENTRY_POINT_GROUP):
+        self._specs: Dict[str, ServiceSpec] = {
+            name: ServiceSpec(name, target) for name, target in builtin.items()
+        }
+        self._group = group
+        self._discovered = group is None
+        self._lock = threading.Lock()
+
+    def _discover(self) -> None:
+        if self._discovered:
+            return
+        with self._lock:
+            if self._discovered:
+                return
+            for ep in _entry_points(self._group):
+                current = self._specs.get(ep.name)
+                if current is not None and current.target == ep.value:
+                    continue
+                self._specs[ep.name] = ServiceSpec(ep.name, ep.value, source="entry_point")
+            self._discovered = True
+
+    def names(self) -> List[str]:
+        self._discover()
+        return list(self._specs)
+
+    def get(self, name: str) -> Optional[ServiceSpec]:
+        spec = self._specs.get(name)
+        if spec is None:
+            self._discover()
+            spec = self._specs.get(name)
+        return spec
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names())
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        return {name: self._specs[name].to_dict() for name in self.names()}
@@ -2,12 +2,16 @@
 
 import os
 import copy
-import json
 import logging
+import threading
 from typing import Dict, Any, Optional, List
 from pathlib import Path
 
-from .deluge_service import DelugeService
+from .config_store import ConfigConflict, ConfigSnapshot, ConfigStore, FrozenDict
+from .file_index import WorkspaceIndex
+from .lifecycle import LifecycleRun
+from .registry import ServiceRegistry
+from .status_cache import StatusCache
 
 logger = logging.getLogger(__name__)
 
@@ -47,27 +51,60 @@ class ServiceManager:
                 "max_upload_speed": -1,
                 "auto_add_folder": "",         # ✅ kosong = disable
                 "config_dir": "",              # ✅ di-set saat init
+                "pool_size": 4,                # koneksi RPC paralel
+                "pool_timeout": 10,            # detik tunggu checkout
+                "heartbeat_interval": 0,       # 0 = tanpa heartbeat
+                "async_rpc": False,            # pipelined asyncio client
+                "cache_enabled": True,         # torrent state cache
+                "cache_fast_interval": 1,      # detik, saat ada yang aktif
+                "cache_idle_interval": 10,     # detik, saat semua idle
+                "ingest_journal": "",          # ✅ di-set dari workspace
+                "ingest_workers": 4,           # add paralel ke deluged
+                "ingest_rate": 5,              # item per detik
+                "ingest_max_pending_metadata": 20,
+                "spool_dir": "",               # ✅ di-set dari workspace
+                "upload_batch_size": 50,       # .torrent per RPC
+                "watch_enabled": True,         # auto_add_folder watcher
+                "watch_debounce": 1.0,
+                "watch_poll_interval": 5,      # fallback tanpa inotify
+                "stats_history": True,         # sampler 1 Hz + rollup
+                "magnet_metadata_timeout": 60, # metadata-first add
+                "move_existing_on_path_change": False,  # move_storage ke download_path baru
+                "depends_on": [],              # service lain yang harus jalan dulu
+                "start_timeout": 300,          # detik (termasuk install)
+                "stop_timeout": 60,
             },
             "jdownloader": {
                 "enabled": False,              # ✅ disabled by default
                 "host": "127.0.0.1",
                 "port": 3129,
                 "download_path": "",
+                "depends_on": [],
+                "start_timeout": 120,
+                "stop_timeout": 30,
             },
             "mega": {
                 "enabled": False,              # ✅ disabled by default
                 "email": "",
                 "password": "",
                 "download_path": "",
+                "depends_on": [],
+                "start_timeout": 120,
+                "stop_timeout": 30,
             },
         }
     }
 
-    # Map service name → class
+    # Key config yang dibaca manager sendiri (lifecycle), bukan service:
+    # selalu bisa diubah tanpa menyentuh service
+    MANAGER_CONFIG_KEYS = frozenset({"depends_on", "start_timeout", "stop_timeout"})
+
+    # Map service name → "module:Class" (di-import saat pertama dipakai).
+    # Service lain bisa didaftarkan lewat entry point "moccha.services".
     SERVICE_CLASSES = {
-        "deluge": DelugeService,
-        # "jdownloader": JDownloaderService,  # tambah nanti
-        # "mega": MegaService,                # tambah nanti
+        "deluge": "moccha.services.deluge_service:DelugeService",
+        # "jdownloader": "moccha.services.jdownloader_service:JDownloaderService",
+        # "mega": "moccha.services.mega_service:MegaService",
     }
 
     def __init__(
@@ -85,14 +122,34 @@ class ServiceManager:
         """
         self.workspace = workspace or os.path.expanduser("~/moccha_workspace")
         self.config_path = config_path or self._get_default_config_path()
-        self.config = self._load_config()
 
-        # ✅ FIX: Set default paths yang belum di-set berdasarkan workspace
-        self._apply_workspace_defaults()
+        # Snapshot config immutable + persist atomik + hot reload
+        self._store = ConfigStore(self.config_path, self._normalize_config)
+        self._store.load()
 
-        # Initialize services
+        # ✅ Service dibuat saat pertama dipakai (get_service), bukan di
+        # sini: /ping bisa dilayani sebelum deluge_client di-import
+        self.registry = ServiceRegistry(self.SERVICE_CLASSES)
         self.services: Dict[str, Any] = {}
-        self._init_services()
+        self._init_errors: Dict[str, str] = {}
+        self._services_lock = threading.RLock()
+
+        # Index file workspace + download_path (dibuat saat pertama dipakai)
+        self._file_index: Optional[WorkspaceIndex] = None
+        self._file_index_lock = threading.Lock()
+
+        # Lifecycle: satu lock per service supaya start/stop dari API dan
+        # autostart tidak balapan; run start_all/stop_all terakhir
+        self._service_locks: Dict[str, threading.Lock] = {}
+        self._lifecycle: Optional[LifecycleRun] = None
+        self._lifecycle_lock = threading.Lock()
+
+        # Status untuk /, /api/services, /api/services/status (TTL + budget)
+        self._status_cache = StatusCache()
+
+        # Edit manual services_config.json → reload + reinit service terkait
+        self._store.subscribe(self._on_config_reload)
+        self._store.start()
 
     def _get_default_config_path(self) -> str:
         """Get default config file path."""
@@ -100,12 +157,12 @@ class ServiceManager:
         os.makedirs(config_dir, exist_ok=True)
         return os.path.join(config_dir, "services_config.json")
 
-    def _apply_workspace_defaults(self):
+    def _apply_workspace_defaults(self, config: Dict[str, Any]) -> None:
         """
         ✅ FIX: Set download paths berdasarkan workspace
         jika belum di-set oleh user.
         """
-        services = self.config.get("services", {})
+        services = config.get("services", {})
 
         # Deluge
         deluge = services.get("deluge", {})
@@ -117,6 +174,14 @@ class ServiceManager:
             deluge["config_dir"] = os.path.join(
                 self.workspace, ".config", "deluge"
             )
+        if not deluge.get("ingest_journal"):
+            deluge["ingest_journal"] = os.path.join(
+                self.workspace, ".state", "deluge_ingest.jsonl"
+            )
+        if not deluge.get("spool_dir"):
+            deluge["spool_dir"] = os.path.join(
+                self.workspace, ".state", "spool"
+            )
         if not deluge.get("auto_add_folder"):
             deluge["auto_add_folder"] = os.path.join(
                 self.workspace, "watch"
@@ -140,138 +205,282 @@ class ServiceManager:
     # Config Management
     # ─────────────────────────────────────────────
 
-    def _load_config(self) -> Dict[str, Any]:
-        """✅ FIX: Load config dengan proper deep merge."""
-        # Mulai dari default
-        config = copy.deepcopy(self.DEFAULT_CONFIG)
-
-        if os.path.exists(self.config_path):
-            try:
-                with open(self.config_path, 'r') as f:
-                    loaded = json.load(f)
-
-                # ✅ FIX: Deep merge, bukan shallow update
-                config = _deep_merge(config, loaded)
-                logger.info(f"Config loaded from {self.config_path}")
+    @property
+    def config(self) -> FrozenDict:
+        """Snapshot config terbaru (read-only, tanpa copy)."""
+        return self._store.data
 
-            except json.JSONDecodeError as e:
-                logger.error(f"Invalid JSON in config file: {e}")
-                # Backup corrupted file
-                backup = self.config_path + ".bak"
-                try:
-                    os.rename(self.config_path, backup)
-                    logger.info(f"Corrupted config backed up to {backup}")
-                except:
-                    pass
-
-            except Exception as e:
-                logger.error(f"Failed to load config: {e}")
-        else:
-            logger.info("No config file found, using defaults")
-
-        # Save merged config
-        self._save_config(config)
+    def _normalize_config(self, loaded: Dict[str, Any]) -> Dict[str, Any]:
+        """✅ FIX: Isi file → config lengkap: deep merge ke default + path workspace."""
+        config = _deep_merge(self.DEFAULT_CONFIG, loaded)
+        # ✅ FIX: Set default paths yang belum di-set berdasarkan workspace
+        self._apply_workspace_defaults(config)
         return config
 
-    def _save_config(self, config: Optional[Dict] = None) -> bool:
-        """Save configuration to file."""
-        config = config or self.config
-        try:
-            os.makedirs(os.path.dirname(self.config_path), exist_ok=True)
-            with open(self.config_path, 'w') as f:
-                json.dump(config, f, indent=2)
-            return True
-        except Exception as e:
-            logger.error(f"Failed to save config: {e}")
-            return False
+    def config_snapshot(self) -> ConfigSnapshot:
+        """Versi config saat ini (version, data, etag per subtree)."""
+        return self._store.current
+
+    def config_status(self) -> Dict[str, Any]:
+        return self._store.stats()
 
     def get_config(self, service_name: Optional[str] = None) -> Dict[str, Any]:
-        """Get configuration for a specific service or all services."""
-        services = self.config.get("services", {})
+        """
+        Get configuration for a specific service or all services.
+        Hasilnya bagian dari snapshot (read-only); thaw()/deepcopy dulu
+        jika perlu diubah.
+        """
+        services = self.config.get("services", FrozenDict())
         if service_name:
-            return copy.deepcopy(services.get(service_name, {}))
-        return copy.deepcopy(services)
+            return services.get(service_name, FrozenDict())
+        return services
+
+    def config_etag(self, service_name: Optional[str] = None) -> str:
+        """ETag config satu service (atau semua) untuk If-Match / If-None-Match."""
+        path = ("services", service_name) if service_name else ("services",)
+        return self._store.current.etag(*path)
+
+    def download_roots(self) -> List[str]:
+        """
+        download_path tiap service: root untuk /files & /download.
+        Workspace sendiri bukan root (.config berisi password dan auth).
+        """
+        roots: List[str] = []
+        for svc_config in self.config.get("services", {}).values():
+            path = svc_config.get("download_path")
+            if path and path not in roots:
+                roots.append(path)
+        return roots
+
+    def file_index(self) -> WorkspaceIndex:
+        """
+        WorkspaceIndex untuk download_roots(); dibuat ulang jika root
+        berubah (mis. download_path di-update lewat config).
+        """
+        with self._file_index_lock:
+            roots = self.download_roots()
+            index = self._file_index
+            if index is None or index.roots != WorkspaceIndex._dedupe(roots):
+                if index:
+                    index.stop()
+                opts = self.config.get("file_index", {})
+                index = WorkspaceIndex(
+                    roots,
+                    use_inotify=opts.get("inotify", True),
+                    settle=opts.get("settle", 1.0),
+                    rescan_interval=opts.get("rescan_interval", 300),
+                    poll_interval=opts.get("poll_interval", 30),
+                )
+                index.start()
+                self._file_index = index
+            return index
 
     def update_config(
-        self, service_name: str, new_config: Dict[str, Any]
+        self,
+        service_name: str,
+        new_config: Dict[str, Any],
+        if_match: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         ✅ FIX: Update config dengan deep merge dan proper restart.
-        """
-        if "services" not in self.config:
-            self.config["services"] = {}
 
-        if service_name not in self.config["services"]:
-            self.config["services"][service_name] = {}
-
-        # Deep merge new config
-        self.config["services"][service_name] = _deep_merge(
-            self.config["services"][service_name],
-            new_config
-        )
-
-        # Save
-        if not self._save_config():
-            return {"success": False, "error": "Failed to save config"}
+        Copy-on-write: hanya subtree service ini yang dibuat ulang.
+        `if_match` (ETag dari get) → gagal dengan `conflict` jika config
+        service sudah diubah orang lain. Disimpan ke disk secara
+        debounced (atomic rename).
+        """
+        def change(root):
+            services = dict(root.get("services", {}))
+            # ✅ FIX: Deep merge new config
+            services[service_name] = _deep_merge(
+                services.get(service_name, {}), new_config
+            )
+            return {**root, "services": services}
 
-        # ✅ FIX: Reinitialize service jika sudah ada
-        if service_name in self.services:
-            try:
-                # Stop dulu
-                old_service = self.services[service_name]
-                try:
-                    old_service.stop()
-                except:
-                    pass
+        before: Dict[str, Any] = {}
 
-                # Buat instance baru
-                svc_class = self.SERVICE_CLASSES.get(service_name)
-                if svc_class:
-                    svc_config = self.config["services"][service_name]
-                    self.services[service_name] = svc_class(svc_config)
-                    logger.info(f"Service '{service_name}' reinitialized")
+        def check(snapshot):
+            if if_match and if_match != "*" and \
+                    snapshot.etag("services", service_name) != if_match:
+                raise ConfigConflict(snapshot.etag("services", service_name))
+            before["config"] = snapshot.get("services", service_name)
 
-            except Exception as e:
-                logger.error(f"Failed to reinitialize {service_name}: {e}")
-                return {
-                    "success": False,
-                    "error": f"Config saved but reinit failed: {e}"
-                }
+        try:
+            snapshot = self._store.update(change, precondition=check)
+        except ConfigConflict as e:
+            return {
+                "success": False,
+                "conflict": True,
+                "error": f"Config for '{service_name}' was modified; "
+                         f"re-read it and retry (current ETag {e.etag})",
+                "etag": e.etag,
+            }
 
-        return {
-            "success": True,
+        # ✅ FIX: Terapkan live jika bisa, restart hanya jika perlu
+        applied = self._apply_service_config(
+            service_name, before.get("config"), snapshot.get("services", service_name)
+        )
+        if applied["mode"] != "none":
+            self._status_cache.invalidate(service_name)
+        result = {
+            "success": "error" not in applied,
             "message": f"Configuration updated for {service_name}",
-            "config": self.get_config(service_name)
+            "config": snapshot.get("services", service_name),
+            "version": snapshot.version,
+            "etag": snapshot.etag("services", service_name),
+            "applied": applied,
         }
+        if "error" in applied:
+            result["error"] = f"Config saved but {applied['mode']} apply failed: {applied['error']}"
+        return result
+
+    def _apply_service_config(
+        self,
+        service_name: str,
+        old: Optional[Dict[str, Any]],
+        new: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """
+        Diff config lama vs baru → cara menerapkannya (`mode`):
+
+        - `none`:    tidak ada key yang berubah
+        - `stored`:  service belum di-load; dipakai saat pertama di-load
+        - `live`:    semua key ada di LIVE_CONFIG_KEYS service (atau key
+                     milik manager) → service.apply_config(), tanpa stop
+        - `restart`: ada key lain → stop, buat instance baru, start lagi
+                     jika tadinya jalan (`restart_keys` = penyebabnya)
+        - `stopped`: service di-disable
+        """
+        old = old or {}
+        new = new or {}
+        changed = sorted(k for k in set(old) | set(new) if old.get(k) != new.get(k))
+        applied: Dict[str, Any] = {"mode": "none", "changed": changed}
+        if not changed:
+            return applied
+
+        service = self.peek_service(service_name)
+        if service is None:
+            self._init_errors.pop(service_name, None)
+            applied["mode"] = "stored"
+            return applied
+
+        with self._service_lock(service_name):
+            if not new.get("enabled", False):
+                applied["mode"] = "stopped"
+                with self._services_lock:
+                    self.services.pop(service_name, None)
+                self._stop_instance(service_name, service)
+                return applied
+
+            live = set(getattr(service, "LIVE_CONFIG_KEYS", ())) | self.MANAGER_CONFIG_KEYS
+            restart_keys = [k for k in changed if k not in live]
+            if not restart_keys:
+                applied["mode"] = "live"
+                keys = [k for k in changed if k not in self.MANAGER_CONFIG_KEYS]
+                if keys:
+                    try:
+                        outcome = service.apply_config(new, keys)
+                    except Exception as e:
+                        outcome = {"success": False, "error": str(e)}
+                    applied["result"] = outcome
+                    if not outcome.get("success", True):
+                        applied["error"] = outcome.get("error", "unknown error")
+                logger.info(f"Config for '{service_name}' applied live: {', '.join(changed)}")
+                return applied
+
+            # Perlu restart penuh
+            applied["mode"] = "restart"
+            applied["restart_keys"] = restart_keys
+            try:
+                status = service.get_status()
+                was_running = bool(status.get("running") or status.get("connected"))
+            except Exception:
+                was_running = False
+            with self._services_lock:
+                self.services.pop(service_name, None)
+            self._stop_instance(service_name, service)
+
+            fresh = self.get_service(service_name)
+            if fresh is None:
+                applied["error"] = self._init_errors.get(service_name) or "init failed"
+                return applied
+            logger.info(f"Service '{service_name}' reinitialized ({', '.join(restart_keys)})")
+            if was_running:
+                outcome = fresh.start()
+                applied["result"] = outcome
+                if not outcome.get("success"):
+                    applied["error"] = outcome.get("error", "start failed")
+        return applied
+
+    @staticmethod
+    def _stop_instance(service_name: str, service: Any) -> None:
+        try:
+            service.stop()
+        except Exception as e:
+            logger.error(f"Failed to stop {service_name}: {e}")
+
+    def _on_config_reload(self, old: ConfigSnapshot, new: ConfigSnapshot) -> None:
+        """File config diedit dari luar: terapkan perubahan per service."""
+        for name in list(self.services):
+            applied = self._apply_service_config(
+                name, old.get("services", name), new.get("services", name)
+            )
+            if applied["mode"] != "none":
+                self._status_cache.invalidate(name)
+                logger.info(f"Config for '{name}' changed on disk → {applied['mode']}")
+            if "error" in applied:
+                logger.error(f"Failed to apply config for {name}: {applied['error']}")
 
     # ─────────────────────────────────────────────
     # Service Initialization
     # ─────────────────────────────────────────────
 
-    def _init_services(self) -> None:
-        """✅ FIX: Initialize services dengan proper error handling."""
-        services_config = self.config.get("services", {})
+    def _init_service(self, name: str) -> Optional[Any]:
+        """✅ FIX: Import + initialize satu service dengan proper error handling."""
+        svc_config = self.config.get("services", {}).get(name, {})
+        spec = self.registry.get(name)
+        if spec is None or not svc_config.get("enabled", False):
+            logger.debug(f"Service '{name}' is disabled or unknown, skipping")
+            return None
 
-        for name, svc_class in self.SERVICE_CLASSES.items():
-            svc_config = services_config.get(name, {})
+        try:
+            service = spec.load()(svc_config)
+            logger.info(f"✅ Service '{name}' initialized")
+        except Exception as e:
+            # Jangan crash seluruh manager karena satu service gagal
+            logger.error(f"❌ Failed to initialize '{name}': {e}")
+            self._init_errors[name] = str(e)
+            return None
 
-            if not svc_config.get("enabled", False):
-                logger.debug(f"Service '{name}' is disabled, skipping")
-                continue
+        self._init_errors.pop(name, None)
+        self.services[name] = service
+        return service
 
-            try:
-                self.services[name] = svc_class(svc_config)
-                logger.info(f"✅ Service '{name}' initialized")
-            except Exception as e:
-                logger.error(f"❌ Failed to initialize '{name}': {e}")
-                # Jangan crash seluruh manager karena satu service gagal
+    def enabled_services(self) -> List[str]:
+        """Nama service terdaftar yang enabled di config (belum tentu di-load)."""
+        services_config = self.config.get("services", {})
+        return [
+            name for name in self.registry
+            if services_config.get(name, {}).get("enabled", False)
+        ]
 
     # ─────────────────────────────────────────────
     # Service Access
     # ─────────────────────────────────────────────
 
     def get_service(self, service_name: str) -> Optional[Any]:
-        """Get service instance by name."""
+        """Get service instance by name (dibuat saat pertama dipakai)."""
+        service = self.services.get(service_name)
+        if service is not None:
+            return service
+        with self._services_lock:
+            service = self.services.get(service_name)
+            if service is None:
+                service = self._init_service(service_name)
+            return service
+
+    def peek_service(self, service_name: str) -> Optional[Any]:
+        """Instance service jika sudah dibuat; tidak memicu import/init."""
         return self.services.get(service_name)
 
     def list_services(self) -> List[Dict[str, Any]]:
@@ -281,7 +490,7 @@ class ServiceManager:
         result = []
         services_config = self.config.get("services", {})
 
-        for name in self.SERVICE_CLASSES:
+        for name in self.registry:
             svc_config = services_config.get(name, {})
             info = {
                 "name": name,
@@ -289,13 +498,18 @@ class ServiceManager:
                 "initialized": name in self.services,
                 "running": False,
             }
+            if name in self._init_errors:
+                info["error"] = self._init_errors[name]
 
-            # Cek running status
-            if name in self.services:
+            # Cek running status (cache, tidak memblok lebih dari budget)
+            service = self.peek_service(name)
+            if service is not None:
                 try:
-                    status = self.services[name].get_status()
+                    status = self.cached_status(name, service)
                     info["running"] = status.get("running", False) or \
                                       status.get("connected", False)
+                    if status.get("stale") or status.get("pending"):
+                        info["status_stale"] = True
                 except:
                     pass
 
@@ -303,21 +517,41 @@ class ServiceManager:
 
         return result
 
+    def cached_status(self, service_name: str, service: Any) -> Dict[str, Any]:
+        """
+        get_status() lewat StatusCache: hasil dibagi semua request selama
+        `ttl`, refresh single-flight, dan caller tidak pernah menunggu
+        lebih dari `budget` detik walau deluged mati/hang. Diatur lewat
+        config {"status_cache": {"ttl": 2, "budget": 0.5, "max_stale": 30}}.
+        """
+        opts = self.config.get("status_cache", {})
+        self._status_cache.configure(
+            opts.get("ttl", 2.0), opts.get("budget", 0.5), opts.get("max_stale", 30.0)
+        )
+        return self._status_cache.get(service_name, service.get_status)
+
+    def status_cache_stats(self) -> Dict[str, Any]:
+        return self._status_cache.stats()
+
     # ─────────────────────────────────────────────
     # Service Control
     # ─────────────────────────────────────────────
 
+    def _service_lock(self, service_name: str) -> threading.Lock:
+        with self._lifecycle_lock:
+            return self._service_locks.setdefault(service_name, threading.Lock())
+
     def start_service(self, service_name: str) -> Dict[str, Any]:
         """Start a specific service."""
         service = self.get_service(service_name)
         if not service:
             # ✅ FIX: Cek apakah disabled vs not found
             svc_config = self.config.get("services", {}).get(service_name)
-            if svc_config is None:
+            if svc_config is None or service_name not in self.registry:
                 return {
                     "success": False,
                     "error": f"Unknown service: {service_name}. "
-                             f"Available: {list(self.SERVICE_CLASSES.keys())}"
+                             f"Available: {self.registry.names()}"
                 }
             elif not svc_config.get("enabled", False):
                 return {
@@ -328,12 +562,15 @@ class ServiceManager:
             else:
                 return {
                     "success": False,
-                    "error": f"Service '{service_name}' failed to initialize"
+                    "error": f"Service '{service_name}' failed to initialize: "
+                             f"{self._init_errors.get(service_name)}"
                 }
 
         try:
             # ✅ FIX: Langsung return result dari service, tanpa wrapping
-            result = service.start()
+            with self._service_lock(service_name):
+                result = service.start()
+            self._status_cache.invalidate(service_name)
             return result
 
         except Exception as e:
@@ -350,7 +587,10 @@ class ServiceManager:
             }
 
         try:
-            return service.stop()
+            with self._service_lock(service_name):
+                result = service.stop()
+            self._status_cache.invalidate(service_name)
+            return result
         except Exception as e:
             logger.error(f"Failed to stop {service_name}: {e}")
             return {"success": False, "error": str(e)}
@@ -365,7 +605,10 @@ class ServiceManager:
             }
 
         try:
-            return service.restart()
+            with self._service_lock(service_name):
+                result = service.restart()
+            self._status_cache.invalidate(service_name)
+            return result
         except Exception as e:
             logger.error(f"Failed to restart {service_name}: {e}")
             return {"success": False, "error": str(e)}
@@ -374,19 +617,77 @@ class ServiceManager:
     # Bulk Operations
     # ─────────────────────────────────────────────
 
+    def _lifecycle_run(self, action: str) -> LifecycleRun:
+        """
+        Jadwalkan start/stop semua service yang ter-initialize secara
+        paralel (lihat LifecycleRun). Jika run dengan action yang sama
+        masih berjalan, run itu yang dikembalikan; action berbeda
+        dijalankan setelah run sebelumnya selesai.
+        """
+        services_config = self.config.get("services", {})
+        opts = self.config.get("lifecycle", {})
+        call = self.start_service if action == "start" else self.stop_service
+
+        with self._lifecycle_lock:
+            current = self._lifecycle
+            if current is not None and not current.done and current.action == action:
+                return current
+
+            # start: semua yang enabled (di-load di thread pool);
+            # stop: hanya yang sudah di-load di proses ini
+            names = self.enabled_services() if action == "start" else list(self.services)
+            run = LifecycleRun(
+                action,
+                tasks={name: (lambda n=name: call(n)) for name in names},
+                deps={
+                    name: list(services_config.get(name, {}).get("depends_on") or [])
+                    for name in names
+                },
+                timeouts={
+                    name: services_config.get(name, {}).get(f"{action}_timeout") or 0
+                    for name in names
+                },
+                workers=opts.get("workers", 4),
+                after=current if current is not None and not current.done else None,
+            )
+            self._lifecycle = run
+        return run.start()
+
+    def start_all_async(self) -> LifecycleRun:
+        """Start semua service di background; progress via run.events()."""
+        return self._lifecycle_run("start")
+
+    def stop_all_async(self) -> LifecycleRun:
+        """Stop semua service di background (dependent di-stop lebih dulu)."""
+        return self._lifecycle_run("stop")
+
     def start_all(self) -> Dict[str, Any]:
-        """Start all enabled services."""
-        results = {}
-        for name in self.services:
-            results[name] = self.start_service(name)
-        return results
+        """Start all enabled services (paralel, urut depends_on)."""
+        return self.start_all_async().wait()
 
     def stop_all(self) -> Dict[str, Any]:
-        """Stop all running services."""
-        results = {}
-        for name in self.services:
-            results[name] = self.stop_service(name)
-        return results
+        """Stop all running services (paralel, urut depends_on terbalik)."""
+        return self.stop_all_async().wait()
+
+    def lifecycle(self) -> Optional[LifecycleRun]:
+        """Run start_all/stop_all terakhir (None jika belum pernah)."""
+        return self._lifecycle
+
+    def autostart(self) -> Optional[LifecycleRun]:
+        """
+        Dipanggil daemon saat boot: start semua service enabled di
+        background supaya API langsung bisa melayani request.
+        Opt-in (default off, seperti sebelumnya: tidak ada service yang
+        start saat boot); aktifkan dengan {"lifecycle": {"autostart": true}}.
+        """
+        if not self.config.get("lifecycle", {}).get("autostart", False):
+            logger.debug("Service autostart disabled")
+            return None
+        names = self.enabled_services()
+        if not names:
+            return None
+        logger.info(f"Autostarting services: {', '.join(names)}")
+        return self.start_all_async()
 
     def get_service_status(self, service_name: str) -> Dict[str, Any]:
         """Get status of a specific service."""
@@ -410,20 +711,23 @@ class ServiceManager:
         status = {}
         services_config = self.config.get("services", {})
 
-        for name in self.SERVICE_CLASSES:
-            if name in self.services:
+        for name in self.registry:
+            enabled = services_config.get(name, {}).get("enabled", False)
+            service = self.get_service(name) if enabled else None
+            if service is not None:
                 try:
-                    status[name] = self.services[name].get_status()
+                    status[name] = self.cached_status(name, service)
                 except Exception as e:
                     status[name] = {"error": str(e)}
             else:
-                enabled = services_config.get(name, {}).get("enabled", False)
                 status[name] = {
                     "running": False,
                     "connected": False,
                     "enabled": enabled,
                     "message": "disabled" if not enabled else "init failed",
                 }
+                if name in self._init_errors:
+                    status[name]["error"] = self._init_errors[name]
 
         return status
 
@@ -438,9 +742,9 @@ class ServiceManager:
             return {"success": False, "error": "Deluge service not available"}
         return deluge.add_torrent(**kwargs)
 
-    def list_torrents(self) -> Dict[str, Any]:
-        """Shortcut: list torrents via Deluge."""
+    def list_torrents(self, query=None) -> Dict[str, Any]:
+        """Shortcut: list torrents via Deluge (query: TorrentQuery)."""
         deluge = self.get_service("deluge")
         if not deluge:
             return {"success": False, "error": "Deluge service not available"}
-        return deluge.list_torrents()
\ No newline at end of file
+        return deluge.list_torrents(query)
\ No newline at end of file
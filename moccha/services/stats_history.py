@@ -0,0 +1,237 @@
+"""Riwayat session stats: ring buffer bertipe dengan rollup 1 s / 1 min / 1 h."""
+
+import re
+import time
+import logging
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Gauge → rata-rata per bucket; counter (total_*) → nilai terakhir
+GAUGE_KEYS = [
+    'download_rate', 'upload_rate',
+    'payload_download_rate', 'payload_upload_rate',
+    'num_peers', 'dht_nodes',
+]
+COUNTER_KEYS = ['total_download', 'total_upload']
+HISTORY_KEYS = GAUGE_KEYS + COUNTER_KEYS
+
+# (step detik, kapasitas) → 1 jam @1 s, 24 jam @1 min, 30 hari @1 h
+LEVELS = [(1, 3600), (60, 1440), (3600, 720)]
+
+MAX_POINTS = 1000
+
+_DURATION = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*$", re.IGNORECASE)
+_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(value: Optional[str], name: str) -> Optional[float]:
+    """'90', '15m', '6h', '7d' → detik. Raise ValueError jika invalid."""
+    if value in (None, ""):
+        return None
+    m = _DURATION.match(str(value))
+    if not m:
+        raise ValueError(f"'{name}' must be a duration like 300, 15m, 6h or 7d")
+    seconds = float(m.group(1)) * _UNITS[m.group(2).lower()]
+    if seconds <= 0:
+        raise ValueError(f"'{name}' must be > 0")
+    return seconds
+
+
+class _Ring:
+    """Ring buffer kolom `array('d')` berkapasitas tetap."""
+
+    def __init__(self, step: int, capacity: int):
+        self.step = step
+        self.capacity = capacity
+        self.ts = array('d', bytes(8 * capacity))
+        self.cols = [array('d', bytes(8 * capacity)) for _ in HISTORY_KEYS]
+        self.head = 0
+        self.count = 0
+
+    def append(self, ts: float, values: List[float]) -> None:
+        i = self.head
+        self.ts[i] = ts
+        for col, v in zip(self.cols, values):
+            col[i] = v
+        self.head = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def _order(self) -> range:
+        start = (self.head - self.count) % self.capacity
+        return range(start, start + self.count)
+
+    def since(self, t0: float) -> Tuple[List[float], List[List[float]]]:
+        """Sampel dengan ts >= t0, urut waktu."""
+        cap = self.capacity
+        idx = [i % cap for i in self._order()]
+        times = [self.ts[i] for i in idx]
+        first = bisect_left(times, t0)
+        idx = idx[first:]
+        return times[first:], [[col[i] for i in idx] for col in self.cols]
+
+    @property
+    def oldest(self) -> Optional[float]:
+        if not self.count:
+            return None
+        return self.ts[(self.head - self.count) % self.capacity]
+
+
+class _Bucket:
+    """Akumulator bucket rollup yang sedang berjalan."""
+
+    __slots__ = ("start", "n", "sums", "last")
+
+    def __init__(self, start: float):
+        self.start = start
+        self.n = 0
+        self.sums = [0.0] * len(GAUGE_KEYS)
+        self.last = [0.0] * len(COUNTER_KEYS)
+
+    def add(self, values: List[float]) -> None:
+        self.n += 1
+        for j in range(len(GAUGE_KEYS)):
+            self.sums[j] += values[j]
+        self.last = values[len(GAUGE_KEYS):]
+
+    def values(self) -> List[float]:
+        return [s / self.n for s in self.sums] + list(self.last)
+
+
+class StatsHistory:
+    """
+    Riwayat session stats multi-resolusi dengan memori tetap.
+
+    Setiap sampel masuk ke ring 1 s; bucket 1 min dan 1 h diakumulasi
+    on-the-fly dan ditulis ke ring masing-masing saat bucket selesai.
+    Total memori ≈ (3600 + 1440 + 720) × 9 × 8 byte, berapa pun uptime.
+    """
+
+    def __init__(self, levels: List[Tuple[int, int]] = LEVELS):
+        self._rings = [_Ring(step, cap) for step, cap in levels]
+        self._buckets: List[Optional[_Bucket]] = [None] * len(self._rings)
+        self._lock = threading.Lock()
+
+    def record(self, stats: Dict[str, Any], ts: Optional[float] = None) -> None:
+        ts = time.time() if ts is None else ts
+        values = [float(stats.get(k) or 0) for k in HISTORY_KEYS]
+
+        with self._lock:
+            self._rings[0].append(ts, values)
+            for n, ring in enumerate(self._rings[1:], 1):
+                start = ts - ts % ring.step
+                bucket = self._buckets[n]
+                if bucket is not None and bucket.start != start:
+                    ring.append(bucket.start, bucket.values())
+                    bucket = None
+                if bucket is None:
+                    bucket = self._buckets[n] = _Bucket(start)
+                bucket.add(values)
+
+    def _level_for(self, span: float) -> int:
+        """Resolusi paling halus yang kapasitasnya mencakup `span`."""
+        for n, ring in enumerate(self._rings):
+            if ring.step * ring.capacity >= span:
+                return n
+        return len(self._rings) - 1
+
+    def query(self, span: float = 3600, step: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Series `span` detik terakhir di-downsample ke `step` detik
+        (rata-rata untuk gauge, nilai terakhir untuk total).
+        """
+        if step is None:
+            step = max(1.0, span / 300)
+        step = max(step, span / MAX_POINTS)
+
+        with self._lock:
+            n = self._level_for(span)
+            ring = self._rings[n]
+            step = max(step, ring.step)
+            times, cols = ring.since(time.time() - span)
+
+            # Bucket rollup yang sedang berjalan ikut (data terbaru)
+            bucket = self._buckets[n]
+            if bucket is not None and bucket.n:
+                times.append(bucket.start)
+                for col, v in zip(cols, bucket.values()):
+                    col.append(v)
+
+        out_t: List[float] = []
+        out = [[] for _ in HISTORY_KEYS]
+        n_gauge = len(GAUGE_KEYS)
+
+        i = 0
+        total = len(times)
+        while i < total:
+            start = times[i] - times[i] % step
+            j = i
+            while j < total and times[j] < start + step:
+                j += 1
+            out_t.append(start)
+            for k, col in enumerate(cols):
+                if k < n_gauge:
+                    out[k].append(round(sum(col[i:j]) / (j - i), 2))
+                else:
+                    out[k].append(col[j - 1])
+            i = j
+
+        return {
+            "success": True,
+            "range": span,
+            "step": step,
+            "resolution": ring.step,
+            "t": out_t,
+            "series": dict(zip(HISTORY_KEYS, out)),
+        }
+
+
+class StatsSampler:
+    """Thread yang memanggil `fetch()` tiap `interval` detik ke `history`."""
+
+    def __init__(
+        self,
+        history: StatsHistory,
+        fetch: Callable[[], Optional[Dict[str, Any]]],
+        interval: float = 1.0,
+    ):
+        self.history = history
+        self.fetch = fetch
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="stats-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                stats = self.fetch()
+                if stats:
+                    self.history.record(stats)
+            except Exception as e:
+                logger.debug(f"Stats sample failed: {e}")
+
+            # Jadwal tetap (tanpa drift); tick yang terlewat tidak dikejar
+            next_tick += self.interval
+            now = time.monotonic()
+            if next_tick < now:
+                next_tick = now + self.interval
+            self._stop.wait(next_tick - now)
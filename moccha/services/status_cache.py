@@ -0,0 +1,151 @@
+"""Cache status service: TTL pendek, single-flight, batas waktu per request."""
+
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ("value", "at", "valid", "gen", "error", "refreshing", "done")
+
+    def __init__(self):
+        self.value: Optional[Dict[str, Any]] = None
+        self.at = 0.0
+        self.valid = False
+        self.gen = 0
+        self.error: Optional[str] = None
+        self.refreshing = False
+        self.done = threading.Event()
+
+
+class StatusCache:
+    """
+    Hasil get_status() per service, dibagi semua request.
+
+    - Umur < `ttl`: langsung dari cache, tanpa RPC.
+    - Umur < `max_stale`: nilai lama dikembalikan segera (`stale`) dan
+      satu refresh dijalankan di background.
+    - Tidak ada nilai / terlalu tua: refresh dijalankan lalu ditunggu
+      maksimal `budget` detik; lewat dari itu caller mendapat nilai lama
+      atau placeholder `pending`, refresh tetap jalan di background.
+
+    Refresh per key selalu single-flight: request yang datang saat
+    refresh berjalan menunggu refresh yang sama, jadi backend yang mati
+    hanya diblok oleh satu thread, bukan oleh setiap request dashboard.
+    """
+
+    def __init__(self, ttl: float = 2.0, budget: float = 0.5, max_stale: float = 30.0):
+        self.ttl = ttl
+        self.budget = budget
+        self.max_stale = max_stale
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.timeouts = 0
+
+    def configure(self, ttl: float, budget: float, max_stale: float) -> None:
+        self.ttl, self.budget, self.max_stale = ttl, budget, max_stale
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Lupakan nilai (mis. setelah start/stop) supaya request berikut refresh."""
+        with self._lock:
+            keys = [key] if key is not None else list(self._entries)
+            for k in keys:
+                entry = self._entries.get(k)
+                if entry is not None:
+                    entry.valid = False
+                    entry.gen += 1
+
+    def _refresh(self, key: str, entry: _Entry, fn: Callable[[], Dict[str, Any]], gen: int) -> None:
+        started = time.monotonic()
+        try:
+            value = fn()
+            error = None
+        except Exception as e:
+            logger.error(f"Status refresh for {key} failed: {e}")
+            value, error = {"error": str(e)}, str(e)
+        elapsed = time.monotonic() - started
+        if elapsed > self.budget:
+            logger.warning(f"Status refresh for {key} took {elapsed:.1f}s")
+        with self._lock:
+            entry.value = value
+            entry.error = error
+            entry.at = time.monotonic()
+            # Refresh yang mulai sebelum invalidate() tidak membuat nilai valid
+            entry.valid = entry.gen == gen
+            entry.refreshing = False
+            done, entry.done = entry.done, threading.Event()
+        done.set()
+
+    def _start_refresh(self, key: str, entry: _Entry, fn: Callable[[], Dict[str, Any]]) -> threading.Event:
+        """Mulai refresh jika belum ada (dipanggil dengan lock)."""
+        if not entry.refreshing:
+            entry.refreshing = True
+            threading.Thread(
+                target=self._refresh, args=(key, entry, fn, entry.gen),
+                name=f"status-{key}", daemon=True,
+            ).start()
+        return entry.done
+
+    def get(self, key: str, fn: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Status `key`; `fn` dipanggil (di thread lain) hanya saat perlu refresh."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry()
+            age = time.monotonic() - entry.at
+            if entry.valid and age < self.ttl:
+                self.hits += 1
+                return self._annotate(entry.value, age)
+            if entry.valid and age < self.max_stale:
+                self.hits += 1
+                self._start_refresh(key, entry, fn)
+                return self._annotate(entry.value, age, stale=True)
+            self.misses += 1
+            done = self._start_refresh(key, entry, fn)
+
+        deadline = time.monotonic() + self.budget
+        while done.wait(max(0.0, deadline - time.monotonic())):
+            with self._lock:
+                if entry.valid:
+                    return self._annotate(entry.value, time.monotonic() - entry.at)
+                # ✅ FIX: Refresh yang selesai mulai sebelum invalidate()
+                # (mis. status "running" sebelum stop) → refresh lagi
+                done = self._start_refresh(key, entry, fn)
+            if time.monotonic() >= deadline:
+                break
+
+        # Nilai yang sudah di-invalidate (start/stop/config) tidak dipakai
+        self.timeouts += 1
+        with self._lock:
+            if entry.valid:
+                return self._annotate(entry.value, time.monotonic() - entry.at, stale=True)
+        return {
+            "running": False,
+            "connected": False,
+            "pending": True,
+            "message": f"status not available within {self.budget:g}s",
+        }
+
+    @staticmethod
+    def _annotate(value: Dict[str, Any], age: float, stale: bool = False) -> Dict[str, Any]:
+        out = dict(value)
+        out["status_age"] = round(age, 2)
+        if stale:
+            out["stale"] = True
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ttl": self.ttl,
+            "budget": self.budget,
+            "max_stale": self.max_stale,
+            "hits": self.hits,
+            "misses": self.misses,
+            "timeouts": self.timeouts,
+            "keys": len(self._entries),
+        }
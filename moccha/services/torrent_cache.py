@@ -0,0 +1,312 @@
+"""Torrent state cache - satu refresher untuk semua request."""
+
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Field yang dipakai list_torrents()
+LIST_FIELDS = [
+    'name', 'state', 'progress',
+    'download_payload_rate', 'upload_payload_rate',
+    'num_seeds', 'num_peers',
+    'total_wanted', 'total_done',
+    'eta', 'ratio', 'save_path',
+]
+
+# Field skalar tambahan untuk detail; files/peers/trackers tidak di-cache
+DETAIL_FIELDS = [
+    'total_size', 'hash', 'message',
+    'tracker_host', 'time_added',
+]
+
+CACHE_FIELDS = LIST_FIELDS + DETAIL_FIELDS
+
+SESSION_KEYS = [
+    'upload_rate', 'download_rate',
+    'dht_nodes', 'num_peers',
+    'payload_upload_rate', 'payload_download_rate',
+    'total_upload', 'total_download',
+]
+
+ACTIVE_STATES = {"Downloading", "Checking", "Allocating", "Moving"}
+
+
+class TorrentStateCache:
+    """
+    Snapshot state semua torrent di memori, di-refresh oleh satu thread.
+
+    Refresher memakai koneksi RPC sendiri (bukan dari pool) karena diff
+    mode `core.get_torrents_status(..., diff=True)` dihitung per sesi
+    RPC: daemon hanya mengirim field yang berubah sejak call sebelumnya
+    di sesi yang sama. Torrent yang hilang dari hasil berarti sudah
+    dihapus.
+
+    Snapshot bersifat copy-on-write: setiap refresh membuat dict baru,
+    row yang tidak berubah dipakai ulang, dan row yang sudah dipublish
+    tidak pernah dimutasi. Reader cukup ambil referensi tanpa lock.
+
+    Args:
+        client_factory: Callable yang membuat DelugeRPCClient baru.
+        decode:         Fungsi decode bytes → str untuk hasil RPC.
+        fast_interval:  Detik antar refresh saat ada torrent aktif.
+        idle_interval:  Detik antar refresh saat semua idle.
+        remote_errors:  Exception dari daemon (mis. argumen diff tidak
+                        dikenal) - bukan error transport.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Any],
+        decode: Callable[[Any], Any],
+        fast_interval: float = 1.0,
+        idle_interval: float = 10.0,
+        remote_errors: Tuple[type, ...] = (),
+    ):
+        self._factory = client_factory
+        self.remote_errors = tuple(remote_errors)
+        self._decode = decode
+        self.fast_interval = float(fast_interval)
+        self.idle_interval = float(idle_interval)
+
+        self._client = None
+        self._diff_supported = True
+
+        self._torrents: Dict[str, Dict[str, Any]] = {}
+        self._index = None
+        self._stats: Dict[str, Any] = {}
+        self._updated = 0.0
+        self._active = False
+        self.seq = 0
+        self.last_error: Optional[str] = None
+
+        # Dipanggil setelah tiap refresh: fn(changed, removed, stats, seq)
+        self._listeners: List[Callable[..., None]] = []
+
+        self._refresh_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ─────────────────────────────────────────────
+    # Lifecycle
+    # ─────────────────────────────────────────────
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+
+        # Event baru per run: refresher lama yang belum selesai (stop
+        # timeout) tidak ikut hidup lagi oleh start berikutnya
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(self._stop,),
+            name="deluge-torrent-cache", daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        thread, self._thread = self._thread, None
+        if thread:
+            thread.join(timeout=5)
+            if thread.is_alive():
+                # ✅ FIX: Masih di tengah RPC (session besar) → jangan
+                # putus client di bawahnya; refresher membersihkan sendiri
+                logger.info("Torrent cache refresher still busy; it cleans up on exit")
+                return
+        self._reset()
+
+    def _reset(self) -> None:
+        """Putus client dan kosongkan snapshot (setelah refresher berhenti)."""
+        with self._refresh_lock:
+            self._drop_client()
+            self._torrents = {}
+            self._index = None
+            self._stats = {}
+            self._updated = 0.0
+            self._ready.clear()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def invalidate(self) -> None:
+        """Minta refresh secepatnya (dipanggil setelah add/pause/remove)."""
+        self._wake.set()
+
+    def sync(self) -> bool:
+        """Refresh sinkron (mis. sebelum resolve filter batch)."""
+        if not self.running:
+            return False
+        try:
+            self.refresh()
+            return True
+        except Exception as e:
+            self.last_error = str(e)
+            logger.warning(f"Torrent cache sync failed: {e}")
+            return False
+
+    def add_listener(self, fn: Callable[..., None]) -> None:
+        """
+        Daftarkan `fn(changed, removed, stats, seq)` yang dipanggil dari
+        thread refresher setelah snapshot baru dipublish. `changed`
+        berisi {id: field yang berubah} (row penuh untuk torrent baru),
+        `removed` list id yang hilang.
+        """
+        if fn not in self._listeners:
+            self._listeners = self._listeners + [fn]
+
+    def remove_listener(self, fn: Callable[..., None]) -> None:
+        self._listeners = [l for l in self._listeners if l != fn]
+
+    def wait_ready(self, timeout: float) -> bool:
+        """Tunggu snapshot pertama; False jika belum ada dalam `timeout`."""
+        return self._ready.wait(timeout)
+
+    # ─────────────────────────────────────────────
+    # Refresher
+    # ─────────────────────────────────────────────
+
+    def _run(self, stop: threading.Event) -> None:
+        try:
+            while not stop.is_set():
+                try:
+                    self.refresh()
+                except Exception as e:
+                    self.last_error = str(e)
+                    logger.warning(f"Torrent cache refresh failed: {e}")
+                    self._drop_client()
+
+                interval = self.fast_interval if self._active else self.idle_interval
+                self._wake.wait(interval)
+                self._wake.clear()
+        finally:
+            # stop() yang timeout menyerahkan cleanup ke sini; jika sudah
+            # di-start lagi, state dan client milik run yang baru
+            if stop is self._stop and stop.is_set():
+                self._reset()
+
+    def _get_client(self):
+        if self._client is None:
+            client = self._factory()
+            client.connect()
+            self._client = client
+            # Sesi baru → daemon akan kirim snapshot penuh lagi
+            self._diff_supported = True
+        return self._client
+
+    def _drop_client(self) -> None:
+        client, self._client = self._client, None
+        if client:
+            try:
+                client.disconnect()
+            except Exception:
+                pass
+
+    def _fetch_torrents(self, client) -> Dict[str, Any]:
+        if self._diff_supported:
+            try:
+                return client.call(
+                    'core.get_torrents_status', {}, CACHE_FIELDS, True
+                )
+            except Exception as e:
+                # Daemon lama tanpa argumen diff → fallback snapshot penuh
+                if not isinstance(e, self.remote_errors):
+                    raise
+                logger.info(f"Diff mode unavailable, using full snapshots: {e}")
+                self._diff_supported = False
+
+        return client.call('core.get_torrents_status', {}, CACHE_FIELDS)
+
+    def refresh(self) -> None:
+        """Satu tick: ambil delta torrent + session stats, publish snapshot."""
+        with self._refresh_lock:
+            client = self._get_client()
+            raw = self._fetch_torrents(client)
+            stats = client.call('core.get_session_status', SESSION_KEYS)
+
+            if self._stop.is_set():
+                return              # stop() selama RPC: jangan publish
+
+            previous = self._torrents
+            torrents: Dict[str, Dict[str, Any]] = {}
+            active = False
+            listeners = self._listeners
+            changed: Dict[str, Dict[str, Any]] = {}
+
+            for raw_id, raw_info in raw.items():
+                tid = self._decode(raw_id)
+                changes = self._decode(raw_info) if raw_info else None
+                row = previous.get(tid)
+
+                if changes:
+                    if listeners:
+                        # Snapshot penuh (tanpa diff) → hitung delta sendiri
+                        delta = changes if row is None else {
+                            k: v for k, v in changes.items() if row.get(k) != v
+                        }
+                        if delta:
+                            changed[tid] = dict(delta, id=tid)
+                    row = dict(row, **changes) if row else changes
+                    row['id'] = tid
+                elif row is None:
+                    continue
+
+                torrents[tid] = row
+                if (
+                    row.get('state') in ACTIVE_STATES
+                    or row.get('download_payload_rate')
+                    or row.get('upload_payload_rate')
+                ):
+                    active = True
+
+            self._torrents = torrents
+            self._stats = self._decode(stats)
+            self._active = active
+            self._updated = time.monotonic()
+            self.seq += 1
+            self.last_error = None
+            self._ready.set()
+
+            if listeners:
+                removed = [tid for tid in previous if tid not in torrents]
+                for fn in listeners:
+                    try:
+                        fn(changed, removed, self._stats, self.seq)
+                    except Exception as e:
+                        logger.warning(f"Torrent cache listener failed: {e}")
+
+    # ─────────────────────────────────────────────
+    # Readers
+    # ─────────────────────────────────────────────
+
+    def age(self) -> Optional[float]:
+        """Umur snapshot dalam detik, None jika belum pernah refresh."""
+        if not self._updated:
+            return None
+        return round(time.monotonic() - self._updated, 2)
+
+    def torrents(self) -> List[Dict[str, Any]]:
+        return list(self._torrents.values())
+
+    def index(self):
+        """TorrentIndex untuk snapshot saat ini, dibangun sekali per refresh."""
+        torrents = self._torrents
+        cached = self._index
+        if cached is None or cached[0] is not torrents:
+            from .torrent_query import TorrentIndex
+            cached = (torrents, TorrentIndex(list(torrents.values())))
+            self._index = cached
+        return cached[1]
+
+    def get(self, torrent_id: str) -> Optional[Dict[str, Any]]:
+        return self._torrents.get(torrent_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return self._stats
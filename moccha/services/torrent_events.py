@@ -0,0 +1,154 @@
+"""Server-Sent Events untuk update torrent, di-feed oleh TorrentStateCache."""
+
+import json
+import queue
+import logging
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Komentar SSE agar tunnel/proxy tidak menutup koneksi idle
+PING_INTERVAL = 15.0
+MAX_BACKLOG = 64
+
+
+def _message(event: str, data: Any, seq: Optional[int] = None) -> bytes:
+    lines = []
+    if seq is not None:
+        lines.append(f"id: {seq}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, separators=(",", ":")))
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+class _Subscriber:
+    __slots__ = ("queue", "resync")
+
+    def __init__(self):
+        self.queue: "queue.Queue[bytes]" = queue.Queue(MAX_BACKLOG)
+        self.resync = False
+
+
+class TorrentEventHub:
+    """
+    Fan-out delta torrent ke semua client SSE.
+
+    Hub mendaftar sebagai listener cache, jadi berapa pun jumlah viewer
+    deluged tetap hanya di-poll oleh satu refresher. Tiap tick di-encode
+    sekali lalu bytes yang sama dimasukkan ke queue semua subscriber.
+    Subscriber yang tertinggal (queue penuh) tidak memblok refresher:
+    backlog-nya dibuang dan ia menerima snapshot baru.
+    """
+
+    def __init__(self, cache):
+        self._cache = cache
+        self._subs: List[_Subscriber] = []
+        self._lock = threading.Lock()
+        self._snapshot: Optional[tuple] = None
+        self._last_stats: Optional[Dict[str, Any]] = None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subs)
+
+    # ─────────────────────────────────────────────
+    # Producer (thread refresher cache)
+    # ─────────────────────────────────────────────
+
+    def _on_refresh(
+        self,
+        changed: Dict[str, Dict[str, Any]],
+        removed: List[str],
+        stats: Dict[str, Any],
+        seq: int,
+    ) -> None:
+        messages = []
+        if changed or removed:
+            messages.append(_message("delta", {
+                "seq": seq,
+                "torrents": changed,
+                "removed": removed,
+            }, seq))
+        # Stats hanya dikirim jika berubah; koneksi idle dijaga oleh ping
+        if stats != self._last_stats:
+            self._last_stats = stats
+            messages.append(_message("stats", {"seq": seq, "stats": stats}))
+        if not messages:
+            return
+
+        for sub in self._subs:
+            if sub.resync:
+                continue
+            try:
+                for msg in messages:
+                    sub.queue.put_nowait(msg)
+            except queue.Full:
+                sub.resync = True
+                self._drain(sub)
+                # Bangunkan consumer supaya langsung kirim snapshot
+                sub.queue.put_nowait(b"")
+
+    @staticmethod
+    def _drain(sub: _Subscriber) -> None:
+        try:
+            while True:
+                sub.queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    # ─────────────────────────────────────────────
+    # Consumer (satu per request SSE)
+    # ─────────────────────────────────────────────
+
+    def _subscribe(self) -> _Subscriber:
+        sub = _Subscriber()
+        with self._lock:
+            self._subs = self._subs + [sub]
+            if len(self._subs) == 1:
+                self._last_stats = self._cache.stats()
+                self._cache.add_listener(self._on_refresh)
+        return sub
+
+    def _unsubscribe(self, sub: _Subscriber) -> None:
+        with self._lock:
+            self._subs = [s for s in self._subs if s is not sub]
+            if not self._subs:
+                self._cache.remove_listener(self._on_refresh)
+                self._snapshot = None
+                self._last_stats = None
+
+    def _snapshot_message(self) -> bytes:
+        """Snapshot penuh, di-encode sekali per seq untuk semua viewer."""
+        seq = self._cache.seq
+        cached = self._snapshot
+        if cached is None or cached[0] != seq:
+            msg = _message("snapshot", {
+                "seq": seq,
+                "torrents": self._cache.torrents(),
+                "stats": self._cache.stats(),
+            }, seq)
+            cached = (seq, msg)
+            self._snapshot = cached
+        return cached[1]
+
+    def stream(self, ping_interval: float = PING_INTERVAL) -> Iterator[bytes]:
+        """Generator SSE: snapshot awal, lalu delta/stats; ping saat idle."""
+        # Subscribe dulu supaya tidak ada delta yang terlewat di antara
+        # snapshot dan event pertama (delta bersifat idempotent)
+        sub = self._subscribe()
+        try:
+            yield b"retry: 3000\n\n"
+            yield self._snapshot_message()
+            while True:
+                if sub.resync:
+                    sub.resync = False
+                    yield self._snapshot_message()
+                try:
+                    msg = sub.queue.get(timeout=ping_interval)
+                except queue.Empty:
+                    msg = b": ping\n\n"
+                if msg:
+                    yield msg
+        finally:
+            self._unsubscribe(sub)
@@ -0,0 +1,376 @@
+"""Index file per torrent dan pagination untuk files/peers/trackers."""
+
+import re
+import fnmatch
+import posixpath
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+from .torrent_query import TorrentQuery
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+# Field per sub-resource; default = yang dikirim tanpa `fields=`
+FILE_FIELDS = ['index', 'path', 'size', 'offset', 'progress', 'priority']
+FILE_DEFAULT_FIELDS = ['index', 'path', 'size', 'progress', 'priority']
+PEER_FIELDS = [
+    'ip', 'client', 'country', 'progress', 'seed',
+    'down_speed', 'up_speed',
+]
+TRACKER_FIELDS = ['url', 'tier', 'message']
+
+# Field file yang berubah-ubah → diambil live, bukan dari index
+LIVE_FILE_FIELDS = {'progress': 'file_progress', 'priority': 'file_priorities'}
+
+# Key untuk filter prefix per sub-resource
+PREFIX_KEYS = {'peers': 'ip', 'trackers': 'url'}
+
+# Priority file Deluge 2.x: 0 = skip, 1 = low, 4 = normal, 7 = high
+PRIORITY_SKIP = 0
+PRIORITY_NORMAL = 4
+PRIORITY_MAX = 7
+
+
+def _prefix_end(prefix: str) -> str:
+    """String terkecil yang lebih besar dari semua string ber-prefix `prefix`."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class PageQuery:
+    """
+    Query untuk sub-resource torrent (files/peers/trackers).
+
+    Query params:
+        prefix=Season 1/        Filter prefix (path / ip / url)
+        fields=path,size        Projection
+        offset=0&limit=100      Pagination (limit maks 1000)
+    """
+
+    def __init__(
+        self,
+        fields: List[str],
+        prefix: Optional[str] = None,
+        offset: int = 0,
+        limit: int = DEFAULT_LIMIT,
+    ):
+        self.fields = fields
+        self.prefix = prefix or None
+        self.offset = offset
+        self.limit = limit
+
+    @classmethod
+    def from_args(
+        cls,
+        args: Mapping[str, str],
+        allowed: List[str],
+        default: Optional[List[str]] = None,
+    ) -> "PageQuery":
+        """Parse request.args. Raise ValueError jika invalid."""
+        fields = TorrentQuery._split(args.get("fields"))
+        unknown = [f for f in fields if f not in allowed]
+        if unknown:
+            raise ValueError(
+                f"Unknown field(s): {', '.join(unknown)}. "
+                f"Valid: {', '.join(allowed)}"
+            )
+
+        limit = TorrentQuery._int(args.get("limit"), "limit", DEFAULT_LIMIT)
+        return cls(
+            fields=fields or list(default or allowed),
+            prefix=args.get("prefix"),
+            offset=TorrentQuery._int(args.get("offset"), "offset", 0),
+            limit=min(limit, MAX_LIMIT),
+        )
+
+    def page(self, items: List[Dict[str, Any]], key: str) -> Dict[str, Any]:
+        """Filter prefix, paginate dan project list kecil (peers/trackers)."""
+        if self.prefix:
+            items = [i for i in items if str(i.get(key) or "").startswith(self.prefix)]
+        chunk = items[self.offset:self.offset + self.limit]
+        return {
+            "items": [{f: i.get(f) for f in self.fields} for i in chunk],
+            "count": len(chunk),
+            "total": len(items),
+            "offset": self.offset,
+            "limit": self.limit,
+        }
+
+
+def _ext(path: str) -> str:
+    return posixpath.splitext(path)[1].lower().lstrip(".")
+
+
+class FileMatch:
+    """
+    Seleksi file dalam satu torrent. Semua kriteria di-AND.
+
+        prefix=Season 1/        Prefix path (bisect di FileIndex)
+        glob=*.mkv              fnmatch pada path lengkap; pola tanpa '/'
+                                dicocokkan ke nama file saja
+        regex=S01E0[1-3]        re.search pada path
+        ext=mkv,mp4             Ekstensi (case-insensitive, lewat index)
+        indexes=[0, 3]          File index eksplisit (hanya body JSON)
+    """
+
+    def __init__(
+        self,
+        prefix: Optional[str] = None,
+        glob: Optional[str] = None,
+        regex: Optional[str] = None,
+        ext: Optional[List[str]] = None,
+        indexes: Optional[List[int]] = None,
+    ):
+        self.prefix = prefix or None
+        self.glob = glob or None
+        self.ext = [e.lower().lstrip(".") for e in ext or [] if e] or None
+        self.indexes = set(indexes) if indexes is not None else None
+        self._glob_re = None
+        if self.glob:
+            self._glob_name = "/" not in self.glob
+            self._glob_re = re.compile(fnmatch.translate(self.glob))
+        try:
+            self._regex = re.compile(regex) if regex else None
+        except re.error as e:
+            raise ValueError(f"Invalid regex: {e}")
+
+    @classmethod
+    def from_args(cls, args: Mapping[str, Any]) -> "FileMatch":
+        """Dari request.args atau body JSON. Raise ValueError jika invalid."""
+        ext = args.get("ext")
+        if isinstance(ext, str):
+            ext = TorrentQuery._split(ext)
+        indexes = args.get("indexes")
+        if isinstance(indexes, str):
+            try:
+                indexes = [int(i) for i in TorrentQuery._split(indexes)]
+            except ValueError:
+                raise ValueError("'indexes' must be a list of integers")
+        if indexes is not None:
+            if not isinstance(indexes, list) or not all(
+                isinstance(i, int) for i in indexes
+            ):
+                raise ValueError("'indexes' must be a list of integers")
+        return cls(
+            prefix=args.get("prefix"),
+            glob=args.get("glob"),
+            regex=args.get("regex"),
+            ext=ext,
+            indexes=indexes,
+        )
+
+    def __bool__(self) -> bool:
+        return any((
+            self.prefix, self.glob, self._regex, self.ext,
+            self.indexes is not None,
+        ))
+
+    def matches(self, index: int, path: str) -> bool:
+        if self.indexes is not None and index not in self.indexes:
+            return False
+        if self.prefix and not path.startswith(self.prefix):
+            return False
+        if self._glob_re is not None:
+            target = posixpath.basename(path) if self._glob_name else path
+            if not self._glob_re.match(target):
+                return False
+        if self._regex is not None and not self._regex.search(path):
+            return False
+        if self.ext and _ext(path) not in self.ext:
+            return False
+        return True
+
+
+class FileSelection:
+    """
+    Aturan include/exclude (glob) yang diberikan saat add.
+
+    File dipilih jika cocok dengan salah satu `include` (atau `include`
+    kosong) dan tidak cocok dengan `exclude` mana pun. Semantik glob
+    sama dengan FileMatch.
+    """
+
+    def __init__(
+        self,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+    ):
+        self.include = [FileMatch(glob=g) for g in include or [] if g]
+        self.exclude = [FileMatch(glob=g) for g in exclude or [] if g]
+
+    @classmethod
+    def from_args(cls, args: Mapping[str, Any]) -> "FileSelection":
+        """`include`/`exclude`: list glob atau string dipisah koma."""
+        rules = {}
+        for key in ("include", "exclude"):
+            value = args.get(key)
+            if isinstance(value, str):
+                value = TorrentQuery._split(value)
+            if value is not None and not (
+                isinstance(value, list) and all(isinstance(v, str) for v in value)
+            ):
+                raise ValueError(f"'{key}' must be a list of glob patterns")
+            rules[key] = value
+        return cls(**rules)
+
+    def __bool__(self) -> bool:
+        return bool(self.include or self.exclude)
+
+    def wants(self, index: int, path: str) -> bool:
+        if self.include and not any(m.matches(index, path) for m in self.include):
+            return False
+        return not any(m.matches(index, path) for m in self.exclude)
+
+    def priorities(self, files: List[Dict[str, Any]]) -> List[int]:
+        """Priority per file (urut file index): normal atau skip."""
+        return [
+            PRIORITY_NORMAL if self.wants(f['index'], f['path']) else PRIORITY_SKIP
+            for f in sorted(files, key=lambda f: f['index'])
+        ]
+
+
+class FileIndex:
+    """
+    Daftar file satu torrent, di-sort per path sekali saat dibangun.
+
+    Filter prefix = dua bisect pada list path yang sudah sorted, jadi
+    halaman dari torrent dengan 40k file tidak perlu scan semua file.
+    Path/size/offset tidak berubah setelah metadata ada; progress dan
+    priority diambil live per request.
+    """
+
+    def __init__(self, files: List[Dict[str, Any]]):
+        rows = sorted(
+            (str(f.get('path') or ""), int(f.get('index', i)), f)
+            for i, f in enumerate(files)
+        )
+        self.paths = [r[0] for r in rows]
+        self.indexes = [r[1] for r in rows]
+        self.files = {r[1]: r[2] for r in rows}
+        self.total_size = sum(int(f.get('size') or 0) for f in files)
+
+        # ekstensi → posisi (urut path), untuk query ext= tanpa scan
+        self.by_ext: Dict[str, List[int]] = {}
+        for pos, path in enumerate(self.paths):
+            self.by_ext.setdefault(_ext(path), []).append(pos)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def range(self, prefix: Optional[str] = None) -> range:
+        """Posisi (di urutan path) file yang cocok dengan prefix."""
+        if not prefix:
+            return range(0, len(self.paths))
+        lo = bisect_left(self.paths, prefix)
+        hi = bisect_left(self.paths, _prefix_end(prefix), lo)
+        return range(lo, hi)
+
+    def select(self, match: Optional[FileMatch] = None) -> Sequence[int]:
+        """Posisi (urut path) file yang cocok dengan `match`."""
+        if not match:
+            return range(0, len(self.paths))
+
+        span = self.range(match.prefix)
+        if match.ext:
+            # Mulai dari index ekstensi, dibatasi range prefix
+            candidates = sorted(
+                pos for e in set(match.ext) for pos in self.by_ext.get(e, ())
+                if pos in span
+            )
+        else:
+            candidates = span
+
+        if (
+            match._glob_re is None and match._regex is None
+            and match.indexes is None
+        ):
+            return candidates
+        return [
+            pos for pos in candidates
+            if match.matches(self.indexes[pos], self.paths[pos])
+        ]
+
+    def file_indexes(self, match: Optional[FileMatch] = None) -> List[int]:
+        """File index Deluge (bukan posisi) yang cocok dengan `match`."""
+        return [self.indexes[pos] for pos in self.select(match)]
+
+    def page(
+        self,
+        query: PageQuery,
+        live: Optional[Dict[str, List[Any]]] = None,
+        match: Optional[FileMatch] = None,
+    ) -> Dict[str, Any]:
+        """
+        Satu halaman file. `live` berisi array per file dari Deluge
+        (`file_progress`, `file_priorities`), di-index dengan file index.
+        """
+        if match is None:
+            matched = self.range(query.prefix)
+        else:
+            if query.prefix and not match.prefix:
+                match.prefix = query.prefix
+            matched = self.select(match)
+        chunk = matched[query.offset:query.offset + query.limit]
+        live = live or {}
+
+        items = []
+        for pos in chunk:
+            idx = self.indexes[pos]
+            f = self.files[idx]
+            row = {}
+            for field in query.fields:
+                if field in LIVE_FILE_FIELDS:
+                    values = live.get(LIVE_FILE_FIELDS[field]) or ()
+                    row[field] = values[idx] if idx < len(values) else None
+                elif field == 'index':
+                    row[field] = idx
+                else:
+                    row[field] = f.get(field)
+            items.append(row)
+
+        return {
+            "items": items,
+            "count": len(items),
+            "total": len(matched),
+            "offset": query.offset,
+            "limit": query.limit,
+        }
+
+
+class FileIndexCache:
+    """LRU FileIndex per torrent ID; dibangun sekali lalu dipakai ulang."""
+
+    def __init__(self, max_size: int = 32):
+        self.max_size = max_size
+        self._items: "OrderedDict[str, FileIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, torrent_id: str) -> Optional[FileIndex]:
+        with self._lock:
+            index = self._items.get(torrent_id)
+            if index is not None:
+                self._items.move_to_end(torrent_id)
+            return index
+
+    def put(self, torrent_id: str, index: FileIndex) -> None:
+        with self._lock:
+            self._items[torrent_id] = index
+            self._items.move_to_end(torrent_id)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, torrent_id: Optional[str] = None) -> None:
+        with self._lock:
+            if torrent_id is None:
+                self._items.clear()
+            else:
+                self._items.pop(torrent_id, None)
+
+    def on_refresh(self, changed, removed, stats, seq) -> None:
+        """Listener TorrentStateCache: buang index torrent yang dihapus."""
+        if removed:
+            with self._lock:
+                for tid in removed:
+                    self._items.pop(tid, None)
@@ -0,0 +1,307 @@
+"""Query torrent list: filter, field projection, sort, dan pagination."""
+
+import json
+import base64
+import binascii
+from bisect import bisect_right
+from urllib.parse import parse_qsl
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from .torrent_cache import LIST_FIELDS
+
+# State yang dikenal Deluge (filter_dict harus pakai kapitalisasi ini)
+KNOWN_STATES = {
+    s.lower(): s for s in (
+        "Active", "Allocating", "Checking", "Downloading", "Seeding",
+        "Paused", "Error", "Queued", "Moving",
+    )
+}
+
+MAX_LIMIT = 1000
+
+
+class TorrentIndex:
+    """
+    Index sekunder di atas satu snapshot torrent (list row immutable).
+
+    Dibangun sekali per snapshot oleh `TorrentStateCache.index()` dan
+    dipakai ulang oleh semua query sampai refresh berikutnya.
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.rows = rows
+        self.by_state: Dict[str, List[Dict[str, Any]]] = {}
+        self.active: List[Dict[str, Any]] = []
+        self.names: Dict[str, str] = {}
+
+        for row in rows:
+            self.by_state.setdefault(row.get('state'), []).append(row)
+            if row.get('download_payload_rate') or row.get('upload_payload_rate'):
+                self.active.append(row)
+            self.names[row['id']] = (row.get('name') or "").lower()
+
+    def candidates(self, states: Optional[List[str]]) -> List[Dict[str, Any]]:
+        if not states:
+            return self.rows
+
+        result: List[Dict[str, Any]] = []
+        seen = set()
+        for state in states:
+            rows = self.active if state == "Active" else self.by_state.get(state, [])
+            for row in rows:
+                if row['id'] not in seen:
+                    seen.add(row['id'])
+                    result.append(row)
+        return result
+
+
+class _SortKey:
+    """Key sort multi-field dengan arah per field; id selalu ascending."""
+
+    __slots__ = ("values", "desc")
+
+    def __init__(self, values: tuple, desc: tuple):
+        self.values = values
+        self.desc = desc
+
+    def __lt__(self, other: "_SortKey") -> bool:
+        for a, b, d in zip(self.values, other.values, self.desc):
+            if a == b:
+                continue
+            return b < a if d else a < b
+        return False
+
+
+class TorrentQuery:
+    """
+    Parsed query untuk `GET /api/torrents`.
+
+    Query params:
+        state=Downloading,Seeding   Filter state (pushdown ke Deluge)
+        id=<id>,<id>                Filter ID (pushdown ke Deluge)
+        name~=ubuntu                Substring nama, case-insensitive
+        fields=name,progress        Projection (`id` selalu ikut)
+        sort=-progress,name         Sort; prefix `-` = descending
+        offset=0&limit=50           Pagination offset
+        cursor=<token>              Keyset pagination (dari `next_cursor`)
+    """
+
+    def __init__(
+        self,
+        states: Optional[List[str]] = None,
+        ids: Optional[List[str]] = None,
+        name: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        sort: Optional[List[str]] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ):
+        self.states = states or []
+        self.ids = ids or []
+        self._id_set = set(self.ids)
+        self.name = name.lower() if name else None
+        self.fields = fields or list(LIST_FIELDS)
+        self.sort = sort or []
+        self.offset = offset
+        self.limit = limit
+        self.cursor = cursor
+
+    # ─────────────────────────────────────────────
+    # Parsing
+    # ─────────────────────────────────────────────
+
+    @staticmethod
+    def _split(value: Optional[str]) -> List[str]:
+        if not value:
+            return []
+        return [v.strip() for v in value.split(",") if v.strip()]
+
+    @staticmethod
+    def _int(value: Optional[str], name: str, default: Optional[int]) -> Optional[int]:
+        if value in (None, ""):
+            return default
+        try:
+            n = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"'{name}' must be an integer")
+        if n < 0:
+            raise ValueError(f"'{name}' must be >= 0")
+        return n
+
+    @classmethod
+    def from_args(cls, args: Mapping[str, str]) -> "TorrentQuery":
+        """Parse query string (request.args). Raise ValueError jika invalid."""
+        states = []
+        for s in cls._split(args.get("state")):
+            if s.lower() not in KNOWN_STATES:
+                raise ValueError(
+                    f"Unknown state '{s}'. "
+                    f"Valid: {', '.join(sorted(KNOWN_STATES.values()))}"
+                )
+            states.append(KNOWN_STATES[s.lower()])
+
+        limit = cls._int(args.get("limit"), "limit", None)
+        if limit is not None:
+            limit = min(limit, MAX_LIMIT)
+
+        fields = [f for f in cls._split(args.get("fields")) if f != "id"]
+
+        return cls(
+            states=states,
+            ids=cls._split(args.get("id")),
+            name=args.get("name~") or None,
+            fields=fields or None,
+            sort=cls._split(args.get("sort")),
+            offset=cls._int(args.get("offset"), "offset", 0),
+            limit=limit,
+            cursor=args.get("cursor") or None,
+        )
+
+    @classmethod
+    def from_filter(cls, expr: Any) -> "TorrentQuery":
+        """
+        Parse filter expression dari body JSON, mis. batch operation:
+        `{"state": ["Paused"], "name~": "ubuntu"}` atau query string
+        `"state=Paused&name~=ubuntu"`. Hanya key filter yang dipakai.
+        """
+        if isinstance(expr, str):
+            expr = dict(parse_qsl(expr, keep_blank_values=False))
+        if not isinstance(expr, Mapping):
+            raise ValueError("filter must be an object or query string")
+
+        args = {}
+        for key in ("state", "id", "name~"):
+            value = expr.get(key)
+            if isinstance(value, (list, tuple)):
+                value = ",".join(str(v) for v in value)
+            if value:
+                args[key] = str(value)
+
+        if not args:
+            raise ValueError("filter must contain state, id or name~")
+        return cls.from_args(args)
+
+    # ─────────────────────────────────────────────
+    # Pushdown ke Deluge
+    # ─────────────────────────────────────────────
+
+    def deluge_filter(self) -> Dict[str, Any]:
+        """Bagian filter yang bisa dievaluasi `core.get_torrents_status`."""
+        filter_dict: Dict[str, Any] = {}
+        if self.states:
+            filter_dict["state"] = list(self.states)
+        if self.ids:
+            filter_dict["id"] = list(self.ids)
+        return filter_dict
+
+    def sort_fields(self) -> List[str]:
+        return [s.lstrip("-") for s in self.sort]
+
+    def required_fields(self) -> List[str]:
+        """Field yang perlu diambil: projection + sort + filter lokal."""
+        needed = list(self.fields)
+        extra = self.sort_fields()
+        if self.name:
+            extra.append('name')
+        for f in extra:
+            if f not in needed:
+                needed.append(f)
+        return needed
+
+    # ─────────────────────────────────────────────
+    # Evaluasi lokal
+    # ─────────────────────────────────────────────
+
+    def _matches(self, row: Dict[str, Any], index: Optional[TorrentIndex]) -> bool:
+        if self.ids and row['id'] not in self._id_set:
+            return False
+        if self.name:
+            name = (
+                index.names.get(row['id'])
+                if index else (row.get('name') or "").lower()
+            )
+            if self.name not in (name or ""):
+                return False
+        return True
+
+    def _key(self, row: Dict[str, Any]) -> _SortKey:
+        values = []
+        for f in self.sort_fields():
+            v = row.get(f)
+            values.append((v is None, v))
+        values.append((False, row['id']))
+        desc = tuple(s.startswith("-") for s in self.sort) + (False,)
+        return _SortKey(tuple(values), desc)
+
+    @staticmethod
+    def encode_cursor(key: _SortKey) -> str:
+        raw = json.dumps([list(v) for v in key.values], separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def _decode_cursor(self) -> _SortKey:
+        try:
+            token = self.cursor + "=" * (-len(self.cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(token.encode()))
+            values = tuple(tuple(v) for v in values)
+        except (ValueError, TypeError, binascii.Error):
+            raise ValueError("Invalid cursor")
+
+        desc = tuple(s.startswith("-") for s in self.sort) + (False,)
+        if len(values) != len(desc):
+            raise ValueError("Cursor does not match sort order")
+        return _SortKey(values, desc)
+
+    def apply(
+        self,
+        rows: Iterable[Dict[str, Any]],
+        index: Optional[TorrentIndex] = None,
+        prefiltered: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Filter, sort, paginate, dan project `rows`.
+
+        Jika `index` diberikan, filter state memakai index (tanpa scan
+        seluruh row) dan rows diabaikan. `prefiltered=True` berarti rows
+        sudah difilter Deluge dengan `deluge_filter()` — filter state
+        tidak dievaluasi ulang (field `state` belum tentu ikut diambil).
+        """
+        if index is not None:
+            rows = index.candidates(self.states)
+        elif self.states and not prefiltered:
+            wanted = set(self.states)
+            rows = [
+                r for r in rows
+                if r.get('state') in wanted
+                or ("Active" in wanted and (
+                    r.get('download_payload_rate') or r.get('upload_payload_rate')
+                ))
+            ]
+
+        matched = [r for r in rows if self._matches(r, index)]
+        total = len(matched)
+
+        keyed = sorted(((self._key(r), r) for r in matched), key=lambda kr: kr[0])
+
+        start = self.offset
+        if self.cursor:
+            start = bisect_right([k for k, _ in keyed], self._decode_cursor())
+
+        end = total if self.limit is None else start + self.limit
+        page = keyed[start:end]
+
+        keys = ['id'] + self.fields
+        torrents = [{k: r.get(k) for k in keys} for _, r in page]
+
+        next_cursor = None
+        if page and end < total:
+            next_cursor = self.encode_cursor(page[-1][0])
+
+        return {
+            "torrents": torrents,
+            "count": len(torrents),
+            "total": total,
+            "offset": start,
+            "limit": self.limit,
+            "next_cursor": next_cursor,
+        }
@@ -0,0 +1,267 @@
+"""Riwayat rate per torrent: EWMA, rata-rata 5 menit, dan ETA yang stabil."""
+
+import math
+import time
+import logging
+import threading
+from array import array
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # NumPy opsional; tanpa itu estimasi dihitung per slot
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Field turunan yang bisa diminta lewat `fields=` di /api/torrents
+DERIVED_FIELDS = ['rate_avg_5m', 'eta_smoothed']
+
+WINDOW = 300.0          # detik untuk rate_avg_5m
+SAMPLES = 16            # sampel total_done per torrent di ring
+SPACING = WINDOW / (SAMPLES - 1)
+EWMA_TAU = 60.0         # konstanta waktu EWMA (detik)
+MIN_HISTORY = 60.0      # di bawah ini ETA pakai EWMA, bukan rata-rata window
+
+_NAN = float("nan")
+
+
+class TorrentRateHistory:
+    """
+    Ring buffer kolumnar per torrent, diisi dari refresh TorrentStateCache.
+
+    Tiap torrent mendapat satu slot. Datanya disimpan di array('d')
+    datar (slot × SAMPLES), jadi semua torrent bisa dihitung sekaligus
+    dengan NumPy tanpa menyalin data. Yang disimpan per slot:
+    - ring (waktu, total_done), satu sampel tiap ~20 s, hanya saat
+      total_done berubah
+    - EWMA download_payload_rate. Rate dianggap konstan di antara dua
+      perubahan, jadi EWMA cukup di-update saat rate berubah dan bisa
+      diproyeksikan ke waktu baca secara eksak. Torrent idle tidak
+      disentuh sama sekali per refresh.
+    """
+
+    def __init__(self, cache, tau: float = EWMA_TAU):
+        self._cache = cache
+        self.tau = tau
+        self._lock = threading.Lock()
+
+        self._slots: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._cap = 0
+
+        self._t = array('d')           # cap × SAMPLES
+        self._v = array('d')           # cap × SAMPLES
+        self._head = array('l')        # index sampel terbaru per slot
+        self._ewma = array('d')
+        self._rate = array('d')        # rate terakhir
+        self._rate_t = array('d')      # waktu rate terakhir berubah
+
+        self._memo: Optional[tuple] = None
+
+    # ─────────────────────────────────────────────
+    # Slot
+    # ─────────────────────────────────────────────
+
+    def _grow(self) -> None:
+        extra = max(64, self._cap)
+        self._t.extend(array('d', [_NAN]) * (extra * SAMPLES))
+        self._v.extend(array('d', [_NAN]) * (extra * SAMPLES))
+        self._head.extend(array('l', [0]) * extra)
+        self._ewma.extend(array('d', [0.0]) * extra)
+        self._rate.extend(array('d', [0.0]) * extra)
+        self._rate_t.extend(array('d', [0.0]) * extra)
+        self._free.extend(range(self._cap + extra - 1, self._cap - 1, -1))
+        self._cap += extra
+
+    def _slot(self, tid: str, now: float, row: Dict[str, Any]) -> int:
+        slot = self._slots.get(tid)
+        if slot is None:
+            if not self._free:
+                self._grow()
+            slot = self._free.pop()
+            self._slots[tid] = slot
+            base = slot * SAMPLES
+            for i in range(base, base + SAMPLES):
+                self._t[i] = _NAN
+                self._v[i] = _NAN
+            self._head[slot] = 0
+            self._t[base] = now
+            self._v[base] = float(row.get('total_done') or 0)
+            rate = float(row.get('download_payload_rate') or 0)
+            self._ewma[slot] = rate
+            self._rate[slot] = rate
+            self._rate_t[slot] = now
+        return slot
+
+    def reset(self) -> None:
+        """Lupakan semua history (mis. setelah disconnect dari daemon)."""
+        with self._lock:
+            self._free.extend(self._slots.values())
+            self._slots.clear()
+            self._memo = None
+
+    # ─────────────────────────────────────────────
+    # Update (listener cache)
+    # ─────────────────────────────────────────────
+
+    def on_refresh(
+        self,
+        changed: Dict[str, Dict[str, Any]],
+        removed: List[str],
+        stats: Dict[str, Any],
+        seq: int,
+    ) -> None:
+        now = time.monotonic()
+        snapshot = self._cache
+        with self._lock:
+            for tid in removed:
+                slot = self._slots.pop(tid, None)
+                if slot is not None:
+                    self._free.append(slot)
+
+            for tid, delta in changed.items():
+                row = snapshot.get(tid)
+                if row is None:
+                    continue
+                new = tid not in self._slots
+                slot = self._slot(tid, now, row)
+                if new:
+                    continue
+
+                if 'download_payload_rate' in delta:
+                    r = self._rate[slot]
+                    decay = math.exp(-(now - self._rate_t[slot]) / self.tau)
+                    self._ewma[slot] = r + (self._ewma[slot] - r) * decay
+                    self._rate[slot] = float(delta['download_payload_rate'] or 0)
+                    self._rate_t[slot] = now
+
+                if 'total_done' in delta:
+                    # Sampel terbaru "live" (ditimpa) sampai berjarak
+                    # SPACING dari sampel sebelumnya, lalu dibekukan
+                    base = slot * SAMPLES
+                    head = self._head[slot]
+                    prev = self._t[base + (head - 1) % SAMPLES]
+                    if not self._t[base + head] - prev < SPACING:
+                        head = (head + 1) % SAMPLES
+                        self._head[slot] = head
+                    self._t[base + head] = now
+                    self._v[base + head] = float(delta['total_done'] or 0)
+
+    # ─────────────────────────────────────────────
+    # Estimasi
+    # ─────────────────────────────────────────────
+
+    def _estimate_numpy(self, ids, slots, done, wanted, now):
+        t = np.frombuffer(self._t, dtype=np.float64).reshape(-1, SAMPLES)[slots]
+        v = np.frombuffer(self._v, dtype=np.float64).reshape(-1, SAMPLES)[slots]
+        rows = np.arange(len(slots))
+        cutoff = now - WINDOW
+
+        # Titik awal = sampel terakhir sebelum cutoff (span sedikit > WINDOW,
+        # t0 dan v0 dari sampel yang sama); jika belum ada, sampel tertua
+        before = np.where(t <= cutoff, t, -np.inf)
+        has_before = np.isfinite(before.max(axis=1))
+        idx = np.where(
+            has_before,
+            before.argmax(axis=1),
+            np.where(np.isnan(t), np.inf, t).argmin(axis=1),
+        )
+        t0 = t[rows, idx]
+        v0 = v[rows, idx]
+        span = now - t0
+        avg = np.where(span > 0, (done - v0) / np.maximum(span, 1e-9), 0.0)
+        avg = np.maximum(avg, 0.0)
+
+        r = np.frombuffer(self._rate, dtype=np.float64)[slots]
+        e = np.frombuffer(self._ewma, dtype=np.float64)[slots]
+        rt = np.frombuffer(self._rate_t, dtype=np.float64)[slots]
+        ewma = r + (e - r) * np.exp(-(now - rt) / self.tau)
+
+        rate = np.where(span >= MIN_HISTORY, avg, ewma)
+        remaining = np.maximum(wanted - done, 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            eta = np.where(remaining == 0, 0.0, remaining / rate)
+        eta = np.where(np.isfinite(eta), eta, -1.0)
+
+        return {
+            tid: {
+                'rate_avg_5m': round(float(a), 1),
+                'eta_smoothed': None if x < 0 else int(x),
+            }
+            for tid, a, x in zip(ids, avg.tolist(), eta.tolist())
+        }
+
+    def _estimate_python(self, ids, slots, done, wanted, now):
+        cutoff = now - WINDOW
+        out = {}
+        for tid, slot, d, w in zip(ids, slots, done, wanted):
+            base = slot * SAMPLES
+            best_t, best_v, old_t, old_v = None, None, None, None
+            for i in range(base, base + SAMPLES):
+                ti = self._t[i]
+                if ti != ti:  # NaN
+                    continue
+                if ti <= cutoff and (best_t is None or ti > best_t):
+                    best_t, best_v = ti, self._v[i]
+                if old_t is None or ti < old_t:
+                    old_t, old_v = ti, self._v[i]
+
+            t0, v0 = (best_t, best_v) if best_t is not None else (old_t, old_v)
+            span = now - t0 if t0 is not None else 0.0
+            avg = max((d - v0) / span, 0.0) if span > 0 else 0.0
+
+            r = self._rate[slot]
+            ewma = r + (self._ewma[slot] - r) * math.exp(
+                -(now - self._rate_t[slot]) / self.tau
+            )
+            rate = avg if span >= MIN_HISTORY else ewma
+            remaining = max(w - d, 0.0)
+            if remaining == 0:
+                eta = 0
+            elif rate > 0:
+                eta = int(remaining / rate)
+            else:
+                eta = None
+
+            out[tid] = {'rate_avg_5m': round(avg, 1), 'eta_smoothed': eta}
+        return out
+
+    def estimates(self) -> Dict[str, Dict[str, Any]]:
+        """
+        {id: {rate_avg_5m, eta_smoothed}} untuk semua torrent di snapshot
+        cache. Dihitung sekali per refresh cache (memo per seq).
+        """
+        seq = self._cache.seq
+        memo = self._memo
+        if memo is not None and memo[0] == seq:
+            return memo[1]
+
+        rows = self._cache.torrents()
+        now = time.monotonic()
+        with self._lock:
+            ids, slots, done, wanted = [], [], [], []
+            for row in rows:
+                slot = self._slots.get(row['id'])
+                if slot is None:
+                    continue
+                ids.append(row['id'])
+                slots.append(slot)
+                done.append(float(row.get('total_done') or 0))
+                wanted.append(float(row.get('total_wanted') or 0))
+
+            if np is not None and ids:
+                result = self._estimate_numpy(
+                    ids, np.array(slots), np.array(done), np.array(wanted), now
+                )
+            else:
+                result = self._estimate_python(ids, slots, done, wanted, now)
+
+        self._memo = (seq, result)
+        return result
+
+    def augment(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Salinan `rows` dengan field turunan (None jika belum ada data)."""
+        est = self.estimates()
+        empty = dict.fromkeys(DERIVED_FIELDS)
+        return [dict(row, **est.get(row['id'], empty)) for row in rows]
@@ -0,0 +1,168 @@
+"""Baca file torrent yang masih di-download, menunggu piece yang belum ada."""
+
+import os
+import time
+import logging
+import threading
+from typing import Callable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Status piece dari Deluge (`pieces`): 0 missing, 1 available, 2 downloading
+PIECE_COMPLETE = 3
+
+READ_CHUNK = 1 << 20
+
+
+class TorrentFileStream:
+    """
+    Satu file dalam torrent, dibaca per range langsung dari disk.
+
+    Byte file dipetakan ke piece lewat `offset` file di dalam torrent.
+    Bagian yang piece-nya sudah lengkap langsung dibaca; saat pembaca
+    sampai di piece yang belum ada, `boost()` dipanggil sekali (stream
+    mode + priority file dinaikkan) lalu status piece di-poll sampai
+    piece itu lengkap atau `timeout` habis.
+
+    Args:
+        fetch_pieces: fn() → list status piece, atau None jika semua
+                      piece sudah lengkap (torrent seeding).
+        boost:        fn() yang menaikkan prioritas file ini.
+        path:         Path file di disk.
+        size:         Ukuran file.
+        offset:       Offset file di dalam torrent (byte).
+        piece_length: Ukuran piece torrent.
+        pieces:       Status piece awal (hasil fetch_pieces()).
+    """
+
+    def __init__(
+        self,
+        fetch_pieces: Callable[[], Optional[List[int]]],
+        boost: Callable[[], None],
+        path: str,
+        size: int,
+        offset: int,
+        piece_length: int,
+        pieces: Optional[List[int]],
+        poll_interval: float = 0.5,
+        timeout: float = 300.0,
+    ):
+        self._fetch = fetch_pieces
+        self._boost = boost
+        self.path = path
+        self.size = size
+        self.offset = offset
+        self.piece_length = max(1, int(piece_length))
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+        self._pieces = pieces
+        self._fetched = time.monotonic()
+        self._boosted = False
+        self._lock = threading.Lock()
+
+    # ─────────────────────────────────────────────
+    # Piece
+    # ─────────────────────────────────────────────
+
+    def _piece(self, pos: int) -> int:
+        return (self.offset + pos) // self.piece_length
+
+    def _refresh(self) -> None:
+        with self._lock:
+            if time.monotonic() - self._fetched < self.poll_interval:
+                return
+            self._pieces = self._fetch()
+            self._fetched = time.monotonic()
+
+    def _complete(self, piece: int) -> bool:
+        pieces = self._pieces
+        return pieces is None or (
+            piece < len(pieces) and pieces[piece] == PIECE_COMPLETE
+        )
+
+    def available(self, pos: int, stop: int) -> int:
+        """
+        Byte terakhir (≤ stop) yang bisa dibaca berurutan dari `pos`
+        tanpa menunggu; -1 jika piece di `pos` belum lengkap.
+        """
+        if self._pieces is None:
+            return stop
+        piece = self._piece(pos)
+        last = self._piece(stop)
+        if not self._complete(piece):
+            return -1
+        while piece < last and self._complete(piece + 1):
+            piece += 1
+        end = (piece + 1) * self.piece_length - self.offset - 1
+        return min(stop, end)
+
+    def _wait(self, pos: int, stop: int) -> int:
+        ready = self.available(pos, stop)
+        if ready >= 0:
+            return ready
+
+        if not self._boosted:
+            self._boosted = True
+            try:
+                self._boost()
+            except Exception as e:
+                logger.warning(f"Stream boost failed for {self.path}: {e}")
+
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            self._refresh()
+            ready = self.available(pos, stop)
+            if ready >= 0:
+                return ready
+        raise TimeoutError(
+            f"Piece {self._piece(pos)} not downloaded within {self.timeout:g}s"
+        )
+
+    # ─────────────────────────────────────────────
+    # Read
+    # ─────────────────────────────────────────────
+
+    def iter_range(self, start: int, end: int, chunk: int = READ_CHUNK) -> Iterator[bytes]:
+        """Yield byte [start, end] (inklusif), menunggu piece bila perlu."""
+        pos = start
+        f = None
+        stalled = None
+        try:
+            while pos <= end:
+                ready = self._wait(pos, min(end, pos + chunk - 1))
+                data = b""
+                try:
+                    if f is None:
+                        f = open(self.path, "rb")
+                    f.seek(pos)
+                    data = f.read(ready - pos + 1)
+                except FileNotFoundError:
+                    pass
+                if not data:
+                    # Piece tercatat lengkap tapi belum ada di disk
+                    stalled = stalled or time.monotonic()
+                    if time.monotonic() - stalled > self.timeout:
+                        raise TimeoutError(f"{self.path} not readable at byte {pos}")
+                    time.sleep(self.poll_interval)
+                    continue
+                stalled = None
+                yield data
+                pos += len(data)
+
+        except TimeoutError as e:
+            # Putus di tengah: client lanjut dengan Range dari posisi terakhir
+            logger.warning(f"Stream {self.path} stopped at byte {pos}: {e}")
+        finally:
+            if f is not None:
+                f.close()
+
+
+def resolve_path(save_path: str, file_path: str) -> Optional[str]:
+    """Path file di disk; None jika keluar dari save_path."""
+    root = os.path.realpath(save_path)
+    path = os.path.realpath(os.path.join(root, *file_path.split("/")))
+    if path != root and not path.startswith(root + os.sep):
+        return None
+    return path
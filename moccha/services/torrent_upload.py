@@ -0,0 +1,134 @@
+"""Upload .torrent: spool ke disk, baca arsip, encode base64 per chunk."""
+
+import os
+import base64
+import shutil
+import tarfile
+import zipfile
+import logging
+import tempfile
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+
+from moccha.utils.bencode import BencodeError, info_hash
+
+logger = logging.getLogger(__name__)
+
+# Kelipatan 3 → tiap chunk base64 tanpa padding di tengah
+ENCODE_CHUNK = 3 * 16 * 1024
+COPY_CHUNK = 64 * 1024
+
+# .torrent yang lebih besar dari ini hampir pasti bukan .torrent
+MAX_TORRENT_BYTES = 32 * 1024 * 1024
+
+
+def spool_stream(stream: BinaryIO, path: str, max_bytes: Optional[int] = None) -> int:
+    """
+    Salin stream (request body / file upload) ke `path` per chunk.
+    Memori tetap sebesar satu chunk berapa pun ukuran upload.
+    """
+    written = 0
+    with open(path, "wb") as out:
+        while True:
+            chunk = stream.read(COPY_CHUNK)
+            if not chunk:
+                break
+            written += len(chunk)
+            if max_bytes is not None and written > max_bytes:
+                raise ValueError(f"Upload exceeds {max_bytes} bytes")
+            out.write(chunk)
+    return written
+
+
+def b64encode_stream(stream: BinaryIO) -> bytes:
+    """
+    Base64 encode dari stream per chunk, tanpa menyimpan salinan raw
+    utuh di samping hasil encode.
+    """
+    parts = []
+    while True:
+        chunk = stream.read(ENCODE_CHUNK)
+        if not chunk:
+            break
+        parts.append(base64.b64encode(chunk))
+    return b"".join(parts)
+
+
+def b64encode_bytes(raw: bytes) -> bytes:
+    """Sama seperti b64encode_stream, untuk data yang sudah di memori."""
+    view = memoryview(raw)
+    return b"".join(
+        base64.b64encode(view[i:i + ENCODE_CHUNK])
+        for i in range(0, len(view), ENCODE_CHUNK)
+    )
+
+
+def _read_limited(stream: BinaryIO, size: int, name: str) -> bytes:
+    if size > MAX_TORRENT_BYTES:
+        raise ValueError(f"{name}: too large for a .torrent ({size} bytes)")
+    return stream.read(MAX_TORRENT_BYTES + 1)
+
+
+def iter_torrents(path: str, filename: str) -> Iterator[Tuple[str, Any]]:
+    """
+    Yield (name, raw_bytes) untuk setiap .torrent di file spool.
+
+    `path` boleh berupa satu .torrent, arsip zip, atau tar (termasuk
+    .tar.gz/.tgz). Member yang bukan .torrent dilewati; member yang
+    gagal dibaca di-yield sebagai (name, Exception).
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                if info.is_dir() or not info.filename.lower().endswith(".torrent"):
+                    continue
+                try:
+                    with zf.open(info) as f:
+                        yield info.filename, _read_limited(f, info.file_size, info.filename)
+                except Exception as e:
+                    yield info.filename, e
+        return
+
+    if tarfile.is_tarfile(path):
+        with tarfile.open(path, mode="r:*") as tf:
+            # Iterasi streaming: member dibaca satu per satu
+            for member in tf:
+                if not member.isfile() or not member.name.lower().endswith(".torrent"):
+                    continue
+                try:
+                    f = tf.extractfile(member)
+                    yield member.name, _read_limited(f, member.size, member.name)
+                except Exception as e:
+                    yield member.name, e
+        return
+
+    try:
+        yield filename, read_torrent_file(path, filename)
+    except Exception as e:
+        yield filename, e
+
+
+def read_torrent_file(path: str, name: Optional[str] = None) -> bytes:
+    with open(path, "rb") as f:
+        return _read_limited(f, os.fstat(f.fileno()).st_size, name or path)
+
+
+def prepare(name: str, raw: bytes) -> Dict[str, Any]:
+    """Validasi .torrent dan hitung info hash; raw tidak disimpan."""
+    try:
+        tid = info_hash(raw)
+    except BencodeError as e:
+        raise ValueError(f"{name}: not a valid .torrent ({e})")
+    return {
+        "name": name,
+        "torrent_id": tid,
+        "size": len(raw),
+    }
+
+
+def make_spool_dir(base: str) -> str:
+    os.makedirs(base, exist_ok=True)
+    return tempfile.mkdtemp(prefix="upload-", dir=base)
+
+
+def remove_spool_dir(path: str) -> None:
+    shutil.rmtree(path, ignore_errors=True)
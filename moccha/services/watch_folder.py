@@ -0,0 +1,354 @@
+"""Watch folder: ambil .torrent/.magnet dari auto_add_folder secara batch."""
+
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+from moccha.utils import inotify
+
+logger = logging.getLogger(__name__)
+
+SUFFIXES = (".torrent", ".magnet")
+DONE_DIR = "done"
+FAILED_DIR = "failed"
+
+_MASK = (
+    inotify.IN_CREATE | inotify.IN_MODIFY | inotify.IN_CLOSE_WRITE
+    | inotify.IN_MOVED_TO | inotify.IN_MOVED_FROM | inotify.IN_DELETE
+    | inotify.IN_DELETE_SELF | inotify.IN_MOVE_SELF | inotify.IN_ONLYDIR
+)
+
+# File yang tidak pernah di-close (mis. hardlink) dianggap selesai setelah ini
+_STALE_WRITE = 30.0
+
+
+def _wanted(name: str) -> bool:
+    return not name.startswith(".") and name.lower().endswith(SUFFIXES)
+
+
+class WatchFolder:
+    """
+    Pantau satu folder dan serahkan file baru ke `handle` dalam batch.
+
+    Mode inotify: file dianggap siap setelah IN_CLOSE_WRITE/IN_MOVED_TO
+    dan tidak ada event lagi selama `debounce` detik. Burst di-coalesce:
+    batch dikirim saat folder tenang `debounce` detik, saat `batch_size`
+    file siap, atau paling lambat `max_wait` detik setelah file pertama.
+    Tanpa inotify (non-Linux, limit watch habis) folder di-scan tiap
+    `poll_interval` detik; file siap setelah ukuran/mtime stabil.
+
+    `handle(paths)` mengembalikan {path: error atau None}. File sukses
+    dipindah ke `done/`, gagal ke `failed/`. Jika `handle` raise (mis.
+    daemon belum connect) file dibiarkan dan dicoba lagi nanti.
+    """
+
+    def __init__(
+        self,
+        folder: str,
+        handle: Callable[[List[str]], Dict[str, Optional[str]]],
+        debounce: float = 1.0,
+        max_wait: float = 5.0,
+        batch_size: int = 200,
+        poll_interval: float = 5.0,
+        retry_delay: float = 10.0,
+        use_inotify: bool = True,
+    ):
+        self.folder = folder
+        self.handle = handle
+        self.debounce = debounce
+        self.max_wait = max_wait
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.use_inotify = use_inotify
+        self.mode: Optional[str] = None
+
+        # name → monotonic waktu event terakhir / pertama terlihat
+        self._pending: Dict[str, float] = {}
+        self._first_seen: Dict[str, float] = {}
+        self._writing = set()
+        self._seen: Dict[str, tuple] = {}
+        self._last_event = 0.0
+        self._retry_at = 0.0
+        self._rescan = False
+
+        self._done = 0
+        self._failed = 0
+        self.last_error: Optional[str] = None
+
+        self._stop = threading.Event()
+        self._wake: Optional[tuple] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # ─────────────────────────────────────────────
+    # Lifecycle
+    # ─────────────────────────────────────────────
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self) -> None:
+        if self.running:
+            return
+        os.makedirs(self.folder, exist_ok=True)
+        if self._wake:
+            self.stop()              # pipe worker lama yang sudah mati
+        self._stop.clear()
+        # Pipe dibuat/ditutup oleh start/stop (bukan worker), jadi stop()
+        # tidak pernah menulis ke fd yang sudah ditutup atau dipakai ulang
+        self._wake = os.pipe()
+        self._thread = threading.Thread(
+            target=self._run, name="watch-folder", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        wake = self._wake
+        if wake:
+            # Bangunkan select() inotify supaya stop tidak menunggu timeout
+            try:
+                os.write(wake[1], b"x")
+            except OSError:
+                pass
+        thread, self._thread = self._thread, None
+        if thread:
+            thread.join(timeout=5)
+        # Worker yang masih jalan (join timeout) tetap memegang pipe-nya
+        if wake and not (thread and thread.is_alive()):
+            self._wake = None
+            for fd in wake:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "folder": self.folder,
+            "mode": self.mode,
+            "running": self.running,
+            "pending": len(self._pending),
+            "done": self._done,
+            "failed": self._failed,
+            "last_error": self.last_error,
+        }
+
+    # ─────────────────────────────────────────────
+    # Loop
+    # ─────────────────────────────────────────────
+
+    def _open_inotify(self) -> Optional["inotify.Inotify"]:
+        if not (self.use_inotify and inotify.available()):
+            return None
+        ino = None
+        try:
+            ino = inotify.Inotify()
+            ino.add_watch(self.folder, _MASK)
+            return ino
+        except OSError as e:
+            logger.warning(f"inotify unavailable for {self.folder} ({e}), polling")
+            if ino:
+                ino.close()
+            return None
+
+    def _run(self) -> None:
+        ino = self._open_inotify()
+        self.mode = "inotify" if ino else "poll"
+        logger.info(f"Watching {self.folder} ({self.mode})")
+
+        try:
+            # File yang sudah ada sebelum watcher jalan
+            self._scan()
+            next_scan = time.monotonic() + self.poll_interval
+
+            while not self._stop.is_set():
+                timeout = self._timeout()
+                if ino:
+                    self._on_events(ino, ino.read(timeout, self._wake[0]))
+                    if self._rescan:
+                        self._rescan = False
+                        self._scan()
+                else:
+                    self._stop.wait(min(timeout, max(0.0, next_scan - time.monotonic())))
+                    if time.monotonic() >= next_scan:
+                        self._scan()
+                        next_scan = time.monotonic() + self.poll_interval
+
+                self._flush()
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Watch folder {self.folder} stopped: {e}")
+        finally:
+            if ino:
+                ino.close()
+
+    def _touch(self, name: str, now: float) -> None:
+        self._pending[name] = now
+        self._first_seen.setdefault(name, now)
+        self._last_event = now
+
+    def _forget(self, name: str) -> None:
+        self._pending.pop(name, None)
+        self._first_seen.pop(name, None)
+        self._writing.discard(name)
+        self._seen.pop(name, None)
+
+    def _on_events(self, ino: "inotify.Inotify", events: List["inotify.Event"]) -> None:
+        now = time.monotonic()
+        for ev in events:
+            if ev.mask & inotify.IN_Q_OVERFLOW:
+                # Event hilang: scan ulang folder sekali
+                self._rescan = True
+                continue
+
+            if ev.mask & (inotify.IN_DELETE_SELF | inotify.IN_MOVE_SELF):
+                logger.warning(f"Watch folder {self.folder} removed, recreating")
+                for wd in list(ino.watches):
+                    ino.rm_watch(wd)
+                os.makedirs(self.folder, exist_ok=True)
+                ino.add_watch(self.folder, _MASK)
+                self._rescan = True
+                continue
+
+            if ev.mask & inotify.IN_ISDIR or not _wanted(ev.name):
+                continue
+
+            if ev.mask & (inotify.IN_DELETE | inotify.IN_MOVED_FROM):
+                self._forget(ev.name)
+            elif ev.mask & (inotify.IN_CLOSE_WRITE | inotify.IN_MOVED_TO):
+                self._writing.discard(ev.name)
+                self._touch(ev.name, now)
+            elif ev.mask & (inotify.IN_CREATE | inotify.IN_MODIFY):
+                self._writing.add(ev.name)
+                self._touch(ev.name, now)
+
+    def _scan(self) -> None:
+        """Scan folder; file baru/berubah ditandai aktivitas."""
+        now = time.monotonic()
+        current = {}
+        try:
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    if not _wanted(entry.name):
+                        continue
+                    try:
+                        if not entry.is_file():
+                            continue
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    sig = (st.st_size, st.st_mtime_ns)
+                    current[entry.name] = sig
+                    if self._seen.get(entry.name) != sig:
+                        self._touch(entry.name, now)
+        except FileNotFoundError:
+            os.makedirs(self.folder, exist_ok=True)
+
+        for name in set(self._pending) - set(current):
+            self._forget(name)
+        self._seen = current
+
+    # ─────────────────────────────────────────────
+    # Batching
+    # ─────────────────────────────────────────────
+
+    def _ready(self, now: float) -> List[str]:
+        return sorted(
+            name for name, last in self._pending.items()
+            if now - last >= (_STALE_WRITE if name in self._writing else self.debounce)
+        )
+
+    def _stable(self, names: List[str], now: float) -> List[str]:
+        """Mode poll: stat ulang kandidat; yang masih berubah ditunda."""
+        stable = []
+        for name in names:
+            try:
+                st = os.stat(os.path.join(self.folder, name))
+            except OSError:
+                self._forget(name)
+                continue
+            sig = (st.st_size, st.st_mtime_ns)
+            if self._seen.get(name) == sig:
+                stable.append(name)
+            else:
+                self._seen[name] = sig
+                self._touch(name, now)
+        return stable
+
+    def _timeout(self) -> float:
+        """Detik sampai flush berikutnya mungkin terjadi."""
+        if not self._pending:
+            return self.poll_interval
+        now = time.monotonic()
+        # ✅ FIX: File yang masih ditulis baru siap `_STALE_WRITE` detik
+        # setelah event terakhirnya; tanpa ini deadline sudah lewat dan
+        # loop berputar tiap 50 ms selama file itu ditulis
+        ready_at = min(
+            last + (_STALE_WRITE if name in self._writing else self.debounce)
+            for name, last in self._pending.items()
+        )
+        deadline = min(
+            self._last_event + self.debounce,
+            min(self._first_seen.values()) + self.max_wait,
+        )
+        deadline = max(deadline, ready_at, self._retry_at)
+        return min(self.poll_interval, max(0.05, deadline - now))
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        now = time.monotonic()
+        if now < self._retry_at:
+            return
+
+        ready = self._ready(now)
+        if ready and self.mode == "poll":
+            ready = self._stable(ready, now)
+        if not ready:
+            return
+
+        quiet = now - self._last_event >= self.debounce
+        overdue = now - min(self._first_seen[n] for n in ready) >= self.max_wait
+        if not (quiet or overdue or len(ready) >= self.batch_size):
+            return
+
+        for i in range(0, len(ready), self.batch_size):
+            names = ready[i:i + self.batch_size]
+            paths = [os.path.join(self.folder, n) for n in names]
+            try:
+                results = self.handle(paths)
+            except Exception as e:
+                self.last_error = str(e)
+                self._retry_at = time.monotonic() + self.retry_delay
+                logger.warning(f"Watch folder ingest deferred: {e}")
+                return
+
+            for name, path in zip(names, paths):
+                error = results.get(path, "Not processed")
+                self._move(name, DONE_DIR if error is None else FAILED_DIR)
+                if error is None:
+                    self._done += 1
+                else:
+                    self._failed += 1
+                    logger.warning(f"Watch folder: {name} failed: {error}")
+                self._forget(name)
+
+    def _move(self, name: str, subdir: str) -> None:
+        target_dir = os.path.join(self.folder, subdir)
+        os.makedirs(target_dir, exist_ok=True)
+
+        target = os.path.join(target_dir, name)
+        stem, ext = os.path.splitext(name)
+        n = 1
+        while os.path.exists(target):
+            target = os.path.join(target_dir, f"{stem}.{n}{ext}")
+            n += 1
+
+        try:
+            os.rename(os.path.join(self.folder, name), target)
+        except OSError as e:
+            logger.warning(f"Cannot move {name} to {subdir}/: {e}")
@@ -0,0 +1,117 @@
+"""Minimal bencode encoder/decoder untuk metadata .torrent."""
+
+import hashlib
+from typing import Any, Tuple
+
+
+class BencodeError(ValueError):
+    """Raised when data is not valid bencode."""
+
+
+def _decode(data: bytes, i: int) -> Tuple[Any, int]:
+    try:
+        c = data[i:i + 1]
+        if c == b"i":
+            end = data.index(b"e", i)
+            return int(data[i + 1:end]), end + 1
+
+        if c == b"l":
+            i += 1
+            items = []
+            while data[i:i + 1] != b"e":
+                value, i = _decode(data, i)
+                items.append(value)
+            return items, i + 1
+
+        if c == b"d":
+            i += 1
+            result = {}
+            while data[i:i + 1] != b"e":
+                key, i = _decode(data, i)
+                value, i = _decode(data, i)
+                result[key] = value
+            return result, i + 1
+
+        if c.isdigit():
+            colon = data.index(b":", i)
+            length = int(data[i:colon])
+            start = colon + 1
+            if start + length > len(data):
+                raise BencodeError("String exceeds data length")
+            return data[start:start + length], start + length
+
+    except (ValueError, IndexError) as e:
+        if isinstance(e, BencodeError):
+            raise
+        raise BencodeError(f"Invalid bencode at offset {i}: {e}")
+
+    raise BencodeError(f"Invalid bencode at offset {i}")
+
+
+def bdecode(data: bytes) -> Any:
+    """Decode bencode; strings tetap bytes."""
+    value, end = _decode(data, 0)
+    if end != len(data):
+        raise BencodeError("Trailing data after bencoded value")
+    return value
+
+
+def bencode(value: Any) -> bytes:
+    """Encode int/bytes/str/list/dict ke bencode (key dict di-sort)."""
+    out = []
+
+    def enc(v):
+        if isinstance(v, bool):
+            v = int(v)
+        if isinstance(v, int):
+            out.append(b"i%de" % v)
+        elif isinstance(v, (bytes, str)):
+            b = v.encode() if isinstance(v, str) else v
+            out.append(b"%d:" % len(b))
+            out.append(b)
+        elif isinstance(v, (list, tuple)):
+            out.append(b"l")
+            for item in v:
+                enc(item)
+            out.append(b"e")
+        elif isinstance(v, dict):
+            out.append(b"d")
+            items = [
+                (k.encode() if isinstance(k, str) else k, item)
+                for k, item in v.items()
+            ]
+            for k, item in sorted(items):
+                enc(k)
+                enc(item)
+            out.append(b"e")
+        else:
+            raise BencodeError(f"Cannot bencode {type(v).__name__}")
+
+    enc(value)
+    return b"".join(out)
+
+
+def info_bytes(data: bytes) -> bytes:
+    """Dict `info` persis seperti di file (raw bytes, tanpa re-encode)."""
+    if data[:1] != b"d":
+        raise BencodeError("Torrent must be a bencoded dict")
+
+    i = 1
+    while data[i:i + 1] != b"e":
+        key, i = _decode(data, i)
+        start = i
+        _, i = _decode(data, i)
+        if key == b"info":
+            return data[start:i]
+        if i >= len(data):
+            break
+
+    raise BencodeError("Torrent has no info dict")
+
+
+def info_hash(data: bytes) -> str:
+    """
+    SHA-1 (hex) dari dict `info` persis seperti di file - tanpa
+    re-encode, jadi hasilnya sama dengan info hash yang dipakai Deluge.
+    """
+    return hashlib.sha1(info_bytes(data)).hexdigest()
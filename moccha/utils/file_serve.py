@@ -0,0 +1,168 @@
+"""Serve file dari disk: sandbox path, validator If-Range, body zero-copy."""
+
+import os
+import socket
+import logging
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK = 1 << 20
+
+
+# ─────────────────────────────────────────────
+# Path
+# ─────────────────────────────────────────────
+
+def _within(path: str, root: str) -> bool:
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+def _hidden(path: str, root: str) -> bool:
+    """True jika ada komponen di bawah `root` yang diawali '.' (config, state, auth)."""
+    rel = os.path.relpath(path, root)
+    return rel != "." and any(part.startswith(".") for part in rel.split(os.sep))
+
+
+def resolve(
+    roots: List[str], requested: Optional[str], base: Optional[str] = None
+) -> Optional[str]:
+    """
+    Path yang diminta → realpath di dalam salah satu `roots`, atau None.
+
+    Path relatif dicoba terhadap `base` (workspace) lalu tiap root; path
+    absolut (dengan atau tanpa '/' di depan, karena route `<path:...>`
+    membuang slash awal) diterima jika berada di dalam salah satu root.
+    Kosong = root pertama. Dotfile/dot-directory tidak pernah dilayani.
+    """
+    roots = [os.path.realpath(r) for r in roots if r]
+    if not roots:
+        return None
+    requested = (requested or "").strip()
+    if not requested:
+        return roots[0]
+
+    candidates = []
+    if os.path.isabs(requested):
+        candidates.append(requested)
+    else:
+        if base:
+            candidates.append(os.path.join(base, requested))
+        candidates.extend(os.path.join(root, requested) for root in roots)
+        candidates.append(os.sep + requested)
+
+    for candidate in candidates:
+        path = os.path.realpath(candidate)
+        root = next((r for r in roots if _within(path, r)), None)
+        if root and not _hidden(path, root) and os.path.exists(path):
+            return path
+    return None
+
+
+# ─────────────────────────────────────────────
+# Validator
+# ─────────────────────────────────────────────
+
+def etag(st: os.stat_result) -> str:
+    return f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+
+def last_modified(st: os.stat_result) -> str:
+    return formatdate(st.st_mtime, usegmt=True)
+
+
+def if_range_matches(header: Optional[str], st: os.stat_result) -> bool:
+    """
+    True jika Range boleh dipakai: tanpa If-Range, atau If-Range cocok
+    dengan ETag (strong) / Last-Modified file saat ini.
+    """
+    if not header:
+        return True
+    header = header.strip()
+    if header.startswith('"') or header.startswith("W/"):
+        return header == etag(st)
+    try:
+        when = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return int(when.timestamp()) == int(st.st_mtime)
+
+
+def listing(path: str) -> List[Dict[str, Any]]:
+    """Isi satu direktori (os.scandir, satu stat per entry)."""
+    items = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                st = entry.stat()
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+            items.append({
+                "name": entry.name,
+                "type": "dir" if is_dir else "file",
+                "size": st.st_size,
+                "modified": datetime.fromtimestamp(st.st_mtime).isoformat(timespec="seconds"),
+            })
+    items.sort(key=lambda i: (i["type"] != "dir", i["name"]))
+    return items
+
+
+# ─────────────────────────────────────────────
+# Body
+# ─────────────────────────────────────────────
+
+class FileRangeBody:
+    """
+    Iterable WSGI untuk `length` byte file mulai dari `start`.
+
+    Di server dev Werkzeug (socket ada di environ `werkzeug.socket`),
+    iterable ini pertama me-yield b"" supaya status + header di-flush,
+    lalu mengirim isi file langsung ke socket dengan socket.sendfile()
+    (os.sendfile, zero-copy; fallback send() untuk socket TLS). Jika
+    server menyediakan `wsgi.file_wrapper`, file utuh diserahkan ke
+    wrapper itu. Selain itu dibaca per chunk dengan buffer tetap.
+    """
+
+    def __init__(self, path: str, start: int, length: int, environ: Dict[str, Any]):
+        self.path = path
+        self.start = start
+        self.length = length
+        self._sock = environ.get("werkzeug.socket")
+        self._file_wrapper = environ.get("wsgi.file_wrapper")
+        self._file = None
+
+    def _sendfile(self, sock: socket.socket) -> Iterator[bytes]:
+        yield b""  # flush status + header sebelum menulis ke socket
+        sent = sock.sendfile(self._file, self.start, self.length)
+        if sent < self.length:
+            raise IOError(f"{self.path}: sent {sent} of {self.length} bytes")
+
+    def _read(self) -> Iterator[bytes]:
+        self._file.seek(self.start)
+        remaining = self.length
+        while remaining > 0:
+            data = self._file.read(min(READ_CHUNK, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+    def __iter__(self) -> Iterator[bytes]:
+        self._file = open(self.path, "rb")
+        if self._sock is not None:
+            return self._sendfile(self._sock)
+        if self._file_wrapper is not None and self.start == 0:
+            size = os.fstat(self._file.fileno()).st_size
+            if size == self.length:
+                return iter(self._file_wrapper(self._file, READ_CHUNK))
+        return self._read()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,44 @@
+"""Parsing header HTTP Range (single range, RFC 7233)."""
+
+from typing import Optional, Tuple
+
+
+class RangeNotSatisfiable(ValueError):
+    """Range valid secara sintaks tapi di luar ukuran file (→ 416)."""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    `Range: bytes=a-b` → (start, end) inklusif, atau None jika header
+    tidak ada / tidak didukung (multi-range, unit lain) sehingga file
+    dikirim utuh dengan 200. Raise RangeNotSatisfiable untuk 416.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, sep, last = spec.strip().partition("-")
+    if not sep or not (first or last):
+        return None
+    try:
+        start = int(first) if first else None
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+
+    if start is None:
+        # bytes=-N → N byte terakhir
+        if end <= 0:
+            raise RangeNotSatisfiable(header)
+        return max(0, size - end), size - 1
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    if start < 0 or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def content_range(start: int, end: int, size: int) -> str:
+    return f"bytes {start}-{end}/{size}"
@@ -0,0 +1,139 @@
+"""Wrapper minimal Linux inotify via ctypes (tanpa dependency tambahan)."""
+
+import os
+import errno
+import ctypes
+import ctypes.util
+import select
+import struct
+import logging
+from typing import List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+
+_libc = None
+
+
+def _load_libc():
+    global _libc
+    if _libc is None:
+        name = ctypes.util.find_library("c") or "libc.so.6"
+        lib = ctypes.CDLL(name, use_errno=True)
+        lib.inotify_init1.argtypes = [ctypes.c_int]
+        lib.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        lib.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        _libc = lib
+    return _libc
+
+
+def available() -> bool:
+    """True jika inotify bisa dipakai (Linux + libc mengekspor fungsinya)."""
+    if not hasattr(os, "uname") or os.uname().sysname != "Linux":
+        return False
+    try:
+        return hasattr(_load_libc(), "inotify_init1")
+    except OSError:
+        return False
+
+
+class Event(NamedTuple):
+    wd: int
+    mask: int
+    cookie: int
+    name: str
+
+
+class Inotify:
+    """
+    Satu inotify instance. `read()` mengembalikan semua event yang
+    tersedia sekaligus, jadi burst ribuan event dibaca dalam beberapa
+    syscall saja.
+    """
+
+    def __init__(self):
+        libc = _load_libc()
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.fd = fd
+        self.watches = {}
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = _libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch({path}): {os.strerror(err)}")
+        self.watches[wd] = path
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        if self.watches.pop(wd, None) is not None:
+            _libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self, timeout: Optional[float] = None, wake_fd: Optional[int] = None) -> List[Event]:
+        """
+        Tunggu maks `timeout` detik lalu baca semua event yang ada.
+        `wake_fd` (mis. ujung baca pipe) membangunkan select lebih awal.
+        """
+        if self.fd < 0:
+            return []
+        fds = [self.fd] if wake_fd is None else [self.fd, wake_fd]
+        ready, _, _ = select.select(fds, [], [], timeout)
+        if self.fd not in ready:
+            return []
+
+        events = []
+        while True:
+            try:
+                buf = os.read(self.fd, _READ_SIZE)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                raise
+            if not buf:
+                break
+
+            pos = 0
+            while pos + _EVENT.size <= len(buf):
+                wd, mask, cookie, length = _EVENT.unpack_from(buf, pos)
+                pos += _EVENT.size
+                name = buf[pos:pos + length].rstrip(b"\0")
+                pos += length
+                if mask & IN_IGNORED:
+                    self.watches.pop(wd, None)
+                events.append(Event(wd, mask, cookie, os.fsdecode(name)))
+
+        return events
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+            self.watches.clear()
+
+    def __enter__(self) -> "Inotify":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
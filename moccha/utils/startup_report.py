@@ -0,0 +1,187 @@
+"""`moccha debug startup`: waktu import (-X importtime) dan fase startup."""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+from typing import Any, Dict, List, Optional
+
+_PREFIX = "import time:"
+
+
+def parse_importtime(text: str) -> List[Dict[str, Any]]:
+    """
+    Baris `-X importtime` → [{module, self_us, cumulative_us, depth}],
+    urut seperti output (anak sebelum parent).
+    """
+    rows = []
+    for line in text.splitlines():
+        if not line.startswith(_PREFIX):
+            continue
+        parts = line[len(_PREFIX):].split("|", 2)
+        if len(parts) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue                     # baris header
+        name = parts[2].rstrip()
+        stripped = name.lstrip(" ")
+        rows.append({
+            "module": stripped,
+            "self_us": self_us,
+            "cumulative_us": cumulative_us,
+            "depth": (len(name) - len(stripped) - 1) // 2,
+        })
+    return rows
+
+
+# ─────────────────────────────────────────────
+# Probe (jalan di interpreter baru dengan -X importtime)
+# ─────────────────────────────────────────────
+
+def _ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def probe(workspace: str, load: List[str]) -> Dict[str, Any]:
+    """Ukur fase startup daemon; dicetak sebagai JSON oleh __main__."""
+    phases: Dict[str, float] = {}
+
+    t = time.perf_counter()
+    from moccha.app import create_app
+    phases["import moccha.app"] = _ms(t)
+
+    t = time.perf_counter()
+    app = create_app(workspace=workspace)
+    phases["create_app"] = _ms(t)
+    sm = app.config["SERVICE_MANAGER"]
+
+    client = app.test_client()
+    t = time.perf_counter()
+    client.get("/ping")
+    phases["first /ping"] = _ms(t)
+
+    t = time.perf_counter()
+    client.get("/")
+    phases["first /"] = _ms(t)
+
+    # Modul service yang ter-import sebelum ada yang memakainya → harus kosong
+    imported = {
+        name: spec.target.partition(":")[0] in sys.modules
+        for name, spec in ((n, sm.registry.get(n)) for n in sm.registry)
+    }
+    extra = [m for m in ("deluge_client", "psutil", "requests") if m in sys.modules]
+
+    loads = {}
+    for name in load:
+        t = time.perf_counter()
+        service = sm.get_service(name)
+        spec = sm.registry.get(name)
+        loads[name] = {
+            "ok": service is not None,
+            "total_ms": _ms(t),
+            "import_ms": spec.import_ms if spec else None,
+            "error": (spec.error if spec else "unknown service")
+                     or sm._init_errors.get(name),
+        }
+
+    return {
+        "phases": phases,
+        "registry": sm.registry.to_dict(),
+        "enabled": sm.enabled_services(),
+        "service_modules_imported": imported,
+        "heavy_modules_imported": extra,
+        "loads": loads,
+    }
+
+
+# ─────────────────────────────────────────────
+# Report (proses CLI)
+# ─────────────────────────────────────────────
+
+def run_report(
+    workspace: Optional[str] = None,
+    load: Optional[List[str]] = None,
+    top: int = 15,
+    timeout: float = 120,
+) -> Dict[str, Any]:
+    """
+    Jalankan probe di interpreter baru (`python -X importtime`), supaya
+    cache sys.modules proses CLI tidak ikut terukur. Tanpa `workspace`,
+    probe memakai direktori sementara (config default).
+    """
+    tmp = None
+    if not workspace:
+        tmp = workspace = tempfile.mkdtemp(prefix="moccha-startup-")
+    cmd = [sys.executable, "-X", "importtime", "-m", __name__,
+           "--workspace", workspace]
+    for name in load or []:
+        cmd += ["--load", name]
+
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+
+    started = time.perf_counter()
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout, env=env)
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+    wall_ms = _ms(started)
+
+    rows = parse_importtime(proc.stderr)
+    report: Dict[str, Any] = {
+        "success": proc.returncode == 0,
+        "wall_ms": wall_ms,
+        "modules": len(rows),
+        "import_ms": round(sum(r["self_us"] for r in rows) / 1000, 1),
+    }
+
+    # Per package top-level (moccha, flask, werkzeug, ...)
+    packages: Dict[str, int] = {}
+    for r in rows:
+        root_pkg = r["module"].split(".", 1)[0]
+        packages[root_pkg] = packages.get(root_pkg, 0) + r["self_us"]
+    report["by_package"] = [
+        {"package": p, "ms": round(us / 1000, 1)}
+        for p, us in sorted(packages.items(), key=lambda i: -i[1])[:top]
+    ]
+    report["slowest"] = [
+        {"module": r["module"], "self_ms": round(r["self_us"] / 1000, 1),
+         "cumulative_ms": round(r["cumulative_us"] / 1000, 1)}
+        for r in sorted(rows, key=lambda r: -r["self_us"])[:top]
+    ]
+
+    result = None
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith("{"):
+            try:
+                result = json.loads(line)
+            except ValueError:
+                pass
+            break
+    if result is not None:
+        report.update(result)
+    else:
+        errors = [l for l in proc.stderr.splitlines() if not l.startswith(_PREFIX)]
+        report["error"] = "\n".join(errors[-10:]) or f"probe exited with {proc.returncode}"
+        report["success"] = False
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    import logging
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workspace", required=True)
+    parser.add_argument("--load", action="append", default=[])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+    print(json.dumps(probe(args.workspace, args.load)))
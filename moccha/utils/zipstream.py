@@ -0,0 +1,223 @@
+"""Zip tanpa kompresi (STORED) yang di-generate on the fly, dengan Zip64."""
+
+import os
+import time
+import zlib
+import struct
+from typing import Iterator, List, NamedTuple, Optional
+
+READ_CHUNK = 1 << 20
+
+_U32 = 0xFFFFFFFF
+_U16 = 0xFFFF
+
+# Flag: bit 3 = CRC/size di data descriptor, bit 11 = nama UTF-8
+_FLAGS = 0x0808
+_VERSION = 20
+_VERSION_ZIP64 = 45
+_MADE_BY = (3 << 8) | _VERSION_ZIP64   # Unix
+
+_LOCAL = struct.Struct("<IHHHHHIIIHH")
+_CENTRAL = struct.Struct("<IHHHHHHIIIHHHHHII")
+_DESCRIPTOR = struct.Struct("<IIII")
+_DESCRIPTOR64 = struct.Struct("<IIQQ")
+_EOCD = struct.Struct("<IHHHHIIH")
+_EOCD64 = struct.Struct("<IQHHIIQQQQ")
+_LOCATOR64 = struct.Struct("<IIQI")
+
+
+class ZipEntry(NamedTuple):
+    path: str       # path di disk
+    name: str       # nama di dalam zip ('/' sebagai separator)
+    size: int
+    mtime: float
+    mode: int
+
+
+def _dos_time(mtime: float):
+    t = time.localtime(mtime)
+    if t.tm_year < 1980:
+        return 0, (0 << 9) | (1 << 5) | 1
+    return (
+        (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+        ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday,
+    )
+
+
+def collect(root: str, prefix: Optional[str] = None) -> List[ZipEntry]:
+    """
+    Semua file regular di bawah `root` (os.scandir, urut nama).
+    Symlink dilewati supaya isi zip tidak keluar dari root; dotfile dan
+    dot-directory (config, state) juga dilewati.
+    """
+    prefix = prefix if prefix is not None else os.path.basename(root.rstrip(os.sep))
+    entries = []
+    stack = [(root, prefix)]
+    while stack:
+        path, name = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                items = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        dirs = []
+        for item in items:
+            if item.name.startswith(".") or item.is_symlink():
+                continue
+            arcname = f"{name}/{item.name}" if name else item.name
+            try:
+                if item.is_dir():
+                    dirs.append((item.path, arcname))
+                elif item.is_file():
+                    st = item.stat()
+                    entries.append(ZipEntry(
+                        item.path, arcname, st.st_size, st.st_mtime, st.st_mode
+                    ))
+            except OSError:
+                continue
+        stack.extend(reversed(dirs))
+    return entries
+
+
+class ZipStream:
+    """
+    Zip STORED dari daftar file, ditulis sebagai iterator bytes.
+
+    Ukuran setiap file sudah diketahui dari stat, jadi total panjang
+    zip (`len()`) bisa dihitung sebelum byte pertama dikirim →
+    Content-Length. CRC32 dihitung sambil streaming dan ditulis di
+    data descriptor. Memori konstan (satu buffer baca), tanpa file
+    sementara. Zip64 dipakai per entry hanya bila perlu (file atau
+    offset ≥ 4 GiB, atau > 65535 entry).
+    """
+
+    def __init__(self, entries: List[ZipEntry], chunk: int = READ_CHUNK):
+        self.entries = entries
+        self.chunk = chunk
+        self._plan = []
+        offset = 0
+        for e in entries:
+            name = e.name.encode("utf-8")
+            zip64 = e.size >= _U32 or offset >= _U32
+            local = _LOCAL.size + len(name) + (20 if zip64 else 0)
+            desc = _DESCRIPTOR64.size if zip64 else _DESCRIPTOR.size
+            self._plan.append((e, name, offset, zip64))
+            offset += local + e.size + desc
+
+        self._cd_offset = offset
+        self._cd_size = sum(
+            _CENTRAL.size + len(name) + self._central_extra_len(e, off)
+            for e, name, off, _ in self._plan
+        )
+        self._zip64_end = (
+            len(entries) >= _U16
+            or self._cd_offset >= _U32
+            or self._cd_size >= _U32
+        )
+        end = _EOCD.size
+        if self._zip64_end:
+            end += _EOCD64.size + _LOCATOR64.size
+        self._length = self._cd_offset + self._cd_size + end
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def length(self) -> int:
+        return self._length
+
+    @staticmethod
+    def _central_extra_len(e: ZipEntry, offset: int) -> int:
+        n = (16 if e.size >= _U32 else 0) + (8 if offset >= _U32 else 0)
+        return 4 + n if n else 0
+
+    # ─────────────────────────────────────────────
+    # Records
+    # ─────────────────────────────────────────────
+
+    def _local(self, e: ZipEntry, name: bytes, zip64: bool) -> bytes:
+        t, d = _dos_time(e.mtime)
+        if zip64:
+            extra = struct.pack("<HHQQ", 1, 16, 0, 0)
+            size = _U32
+        else:
+            extra = b""
+            size = 0
+        return _LOCAL.pack(
+            0x04034B50, _VERSION_ZIP64 if zip64 else _VERSION, _FLAGS, 0,
+            t, d, 0, size, size, len(name), len(extra),
+        ) + name + extra
+
+    def _central(self, e: ZipEntry, name: bytes, offset: int, crc: int) -> bytes:
+        t, d = _dos_time(e.mtime)
+        fields = []
+        if e.size >= _U32:
+            fields += [e.size, e.size]
+        if offset >= _U32:
+            fields.append(offset)
+        extra = (
+            struct.pack("<HH", 1, 8 * len(fields)) + struct.pack(f"<{len(fields)}Q", *fields)
+            if fields else b""
+        )
+        size = _U32 if e.size >= _U32 else e.size
+        version = _VERSION_ZIP64 if fields else _VERSION
+        return _CENTRAL.pack(
+            0x02014B50, _MADE_BY, version, _FLAGS, 0, t, d, crc,
+            size, size, len(name), len(extra), 0, 0, 0,
+            (e.mode & 0xFFFF) << 16,
+            _U32 if offset >= _U32 else offset,
+        ) + name + extra
+
+    def _end(self) -> bytes:
+        count = len(self._plan)
+        out = b""
+        if self._zip64_end:
+            eocd64_offset = self._cd_offset + self._cd_size
+            out += _EOCD64.pack(
+                0x06064B50, _EOCD64.size - 12, _MADE_BY, _VERSION_ZIP64,
+                0, 0, count, count, self._cd_size, self._cd_offset,
+            )
+            out += _LOCATOR64.pack(0x07064B50, 0, eocd64_offset, 1)
+        return out + _EOCD.pack(
+            0x06054B50, 0, 0,
+            min(count, _U16), min(count, _U16),
+            min(self._cd_size, _U32), min(self._cd_offset, _U32), 0,
+        )
+
+    # ─────────────────────────────────────────────
+    # Stream
+    # ─────────────────────────────────────────────
+
+    def _data(self, e: ZipEntry, crcs: List[int]) -> Iterator[bytes]:
+        crc = 0
+        remaining = e.size
+        with open(e.path, "rb") as f:
+            while remaining > 0:
+                data = f.read(min(self.chunk, remaining))
+                if not data:
+                    # File mengecil setelah stat: zip tidak bisa valid lagi
+                    raise IOError(f"{e.path} shrank while zipping")
+                crc = zlib.crc32(data, crc)
+                remaining -= len(data)
+                yield data
+        crcs.append(crc)
+
+    def __iter__(self) -> Iterator[bytes]:
+        crcs: List[int] = []
+        for e, name, offset, zip64 in self._plan:
+            yield self._local(e, name, zip64)
+            yield from self._data(e, crcs)
+            if zip64:
+                yield _DESCRIPTOR64.pack(0x08074B50, crcs[-1], e.size, e.size)
+            else:
+                yield _DESCRIPTOR.pack(0x08074B50, crcs[-1], e.size, e.size)
+
+        central = []
+        for (e, name, offset, _), crc in zip(self._plan, crcs):
+            central.append(self._central(e, name, offset, crc))
+            if len(central) >= 256:
+                yield b"".join(central)
+                central = []
+        if central:
+            yield b"".join(central)
+        yield self._end()
@@ -18,6 +18,10 @@ setup(
             # Ini bikin command "colab-server" bisa dipanggil dari terminal
             'moccha=moccha.cli:main',
         ],
+        # Service di-import saat pertama dipakai (lihat services/registry.py)
+        'moccha.services': [
+            'deluge=moccha.services.deluge_service:DelugeService',
+        ],
     },
     python_requires='>=3.7',
 )
\ No newline at end of file